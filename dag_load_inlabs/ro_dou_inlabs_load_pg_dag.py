@@ -15,7 +15,7 @@ from airflow.sdk import get_current_context, Variable
 from airflow.providers.common.sql.operators.sql import SQLCheckOperator
 
 
-from ro_dou_src.utils.open_search.config import RO_DOU_INLABS_USE_OPENSEARCH  # type: ignore
+from ro_dou_src.utils.open_search.config import get_flag  # type: ignore
 
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
@@ -24,6 +24,7 @@ sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 DEST_DIR = "download_inlabs"
 DEST_CONN_ID = "inlabs_db"
 INLABS_CONN_ID = "inlabs_portal"
+DOWNLOAD_WORKERS = int(os.getenv("RO_DOU__INLABS_DOWNLOAD_WORKERS", 4))
 STG_TABLE = "dou_inlabs.article_raw"
 
 
@@ -48,6 +49,30 @@ def _notify_on_failure(context):
         logging.error(f"Error in _notify_on_failure: {str(e)}", exc_info=True)
 
 
+def _register_percolator_queries(client, reference_date: str) -> None:
+    """Register the terms of every YAML in `RO_DOU__DAG_CONF_DIR` in
+    the OpenSearch percolator before indexing the day's articles, and
+    delete the expired matches."""
+    from ro_dou_src.parsers import YAMLParser, list_yaml_files  # type: ignore
+    from ro_dou_src.utils.open_search.percolator import Percolator  # type: ignore
+
+    dag_configs = []
+    for filepath in list_yaml_files(
+        os.getenv("RO_DOU__DAG_CONF_DIR", "").split(":")
+    ):
+        try:
+            dag_configs.append(YAMLParser(filepath).parse())
+        except Exception as e:
+            logging.warning("Skipping %s on percolator registration: %s", filepath, e)
+
+    percolator = Percolator(client)
+    percolator.register(dag_configs, reference_date)
+    logging.info(
+        "Correspondências expiradas removidas: %s",
+        percolator.prune_matches(reference_date),
+    )
+
+
 # DAG
 
 default_args = {
@@ -86,6 +111,7 @@ def load_inlabs():
         import zipfile
         from urllib.parse import urljoin
         from airflow.sdk.bases.hook import BaseHook  # type: ignore
+        from ro_dou_src.utils.downloader import Downloader  # type: ignore
 
         def _create_directories():
             subprocess.run(f"mkdir -p {dest_path}", shell=True, check=True)
@@ -124,7 +150,9 @@ def load_inlabs():
                 raise ValueError("No files found for this date: %s" % reference_date)
             return files
 
-        def _download_files():
+        def _download_n_unzip_files():
+            """Download the files concurrently, unzipping each one as
+            soon as it is downloaded."""
             session = _get_session()
             cookie = session.cookies.get("inlabs_session_cookie")
             headers = {
@@ -137,93 +165,69 @@ def load_inlabs():
                 logging.error("Files not found for date %s", reference_date)
                 return False
 
-            for file in files:
-                r = session.request(
-                    "GET",
-                    urljoin(inlabs_conn.host, f"index.php{file}"),
-                    headers=headers,
+            downloads = {
+                urljoin(inlabs_conn.host, f"index.php{file}"): os.path.join(
+                    dest_path, file.split("dl=")[1]
                 )
-                with open(os.path.join(dest_path, file.split("dl=")[1]), "wb") as f:
-                    f.write(r.content)
+                for file in files
+            }
+            downloader = Downloader(session, max_workers=DOWNLOAD_WORKERS)
+            for zip_file_path in downloader.download_all(downloads, headers):
+                with zipfile.ZipFile(zip_file_path, "r") as zip_ref:
+                    zip_ref.extractall(os.path.join(dest_path, reference_date))
+                logging.info("Unzipped file: %s", zip_file_path)
 
             logging.info("Downloaded files: %s", files)
 
             return True
 
-        def _unzip_files():
-            all_files = os.listdir(dest_path)
-            # filter zip files
-            zip_files = [file for file in all_files if file.endswith(".zip")]
-            for zip_file in zip_files:
-                zip_file_path = os.path.join(dest_path, zip_file)
-                with zipfile.ZipFile(zip_file_path, "r") as zip_ref:
-                    zip_ref.extractall(os.path.join(dest_path, reference_date))
-            logging.info("Unzipped files: %s", zip_files)
-
         inlabs_conn = BaseHook.get_connection(INLABS_CONN_ID)
         dest_path = os.path.join(Variable.get("path_tmp"), DEST_DIR)
         _create_directories()
-        files_exists = _download_files()
-
-        if files_exists:
-            _unzip_files()
 
-        return files_exists
+        return _download_n_unzip_files()
 
     @task
     def load_data(reference_date: str) -> None:
-        from bs4 import BeautifulSoup
         import glob
-        import pandas as pd
-        from slugify import slugify  # type: ignore
+        from contextlib import closing
         from airflow.providers.postgres.hooks.postgres import PostgresHook  # type: ignore
+        from ro_dou_src.utils.inlabs_partitions import (  # type: ignore
+            ensure_partition,
+            ensure_partitioned_table,
+            ensure_partitions,
+        )
+        from ro_dou_src.utils.inlabs_xml import iter_articles  # type: ignore
+        from ro_dou_src.utils.pg_copy import replace_day  # type: ignore
+        from ro_dou_src.utils.term_matcher import normalize, plain_text  # type: ignore
 
         def _read_files():
+            """Yield the articles of every XML file, one at a time."""
             dest_path = os.path.join(Variable.get("path_tmp"), DEST_DIR)
-            df = pd.DataFrame()
-            for xml_file in glob.glob(
+            xml_files = glob.iglob(
                 os.path.join(dest_path, reference_date, "**/*.xml"), recursive=True
-            ):
-                df1 = pd.read_xml(xml_file)
-                df2 = pd.read_xml(xml_file, xpath="//body")
-                df = pd.concat([df, df1.join(df2)], ignore_index=True)
-
-            df.columns = [slugify(col, separator="_") for col in df.columns]
-            df.drop(columns=["body"], inplace=True)
-            df["pubdate"] = pd.to_datetime(df["pubdate"], format="%d/%m/%Y")
-            df["assina"] = df["texto"].apply(_get_assina)
-
-            return df
-
-        def _get_assina(text):
-            soup = BeautifulSoup(text, "html.parser")
-            p_tags = soup.find_all("p", class_="assina")
-            return ", ".join([p.text for p in p_tags]) if p_tags else None
-
-        def _clean_db(hook: PostgresHook):
-            table_exists = hook.get_first(f"""
-                SELECT EXISTS (
-                    SELECT 1
-                    FROM information_schema.tables
-                    WHERE table_name = '{STG_TABLE.split(".")[1]}'
-                );
-            """)
-            if table_exists[0]:
-                hook.run(
-                    f"DELETE FROM {STG_TABLE} WHERE DATE(pubdate) = '{reference_date}'"
-                )
+            )
+            for record in iter_articles(xml_files):
+                # Accent-folded copies, so searches do not normalize every hit
+                record["texto_norm"] = normalize(plain_text(record.get("texto")))
+                record["assina_norm"] = normalize(record["assina"])
+                yield record
 
-        df = _read_files()
         hook = PostgresHook(DEST_CONN_ID)
-        _clean_db(hook)
-        df.to_sql(
-            name=STG_TABLE.split(".")[1],
-            schema=STG_TABLE.split(".", maxsplit=1)[0],
-            con=hook.get_sqlalchemy_engine(),
-            if_exists="append",
-            index=False,
-        )
-        logging.info("Table `%s` updated with %s lines.", STG_TABLE, len(df))
+        with closing(hook.get_conn()) as conn:
+            ensure_partitioned_table(conn, STG_TABLE)
+            with conn.cursor() as cursor:
+                ensure_partition(cursor, STG_TABLE, reference_date)
+            conn.commit()
+            # The files may hold articles published in other months
+            loaded = replace_day(
+                conn,
+                STG_TABLE,
+                reference_date,
+                _read_files(),
+                prepare=lambda cursor, stage: ensure_partitions(cursor, STG_TABLE, stage),
+            )
+        logging.info("Table `%s` updated with %s lines.", STG_TABLE, loaded)
 
     check_loaded_data = SQLCheckOperator(
         task_id="check_loaded_data",
@@ -233,14 +237,15 @@ def load_inlabs():
                 FROM
                     {STG_TABLE}
                 WHERE
-                    DATE(pubdate) = '{{{{ ti.xcom_pull(task_ids='get_reference_date')}}}}'
+                    pubdate >= '{{{{ ti.xcom_pull(task_ids='get_reference_date')}}}}'::date
+                    AND pubdate < '{{{{ ti.xcom_pull(task_ids='get_reference_date')}}}}'::date + 1
             """,
     )
 
     @task.branch
     def check_if_should_run_indexer():
 
-        if RO_DOU_INLABS_USE_OPENSEARCH.lower() == "true":
+        if get_flag("RO_DOU_INLABS_USE_OPENSEARCH"):
             logging.info("OpenSearch enabled. Running indexer task.")
             return "indexer_data"
 
@@ -255,8 +260,11 @@ def load_inlabs():
     def indexer_data(reference_date: str) -> None:
         from ro_dou_src.utils.open_search.indexer import Indexer  # type: ignore
 
+        use_percolator = get_flag("RO_DOU_INLABS_USE_PERCOLATOR")
         indexer = Indexer(conn_id=DEST_CONN_ID)
-        indexer.run(reference_date)
+        if use_percolator:
+            _register_percolator_queries(indexer.client, reference_date)
+        indexer.run(reference_date, percolate=use_percolator)
 
     @task.branch(trigger_rule="none_failed_min_one_success")
     def check_if_first_run_of_day():
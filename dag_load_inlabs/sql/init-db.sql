@@ -4,13 +4,16 @@ CREATE DATABASE inlabs;
 
 CREATE SCHEMA IF NOT EXISTS dou_inlabs;
 
+CREATE EXTENSION IF NOT EXISTS pg_trgm SCHEMA dou_inlabs;
+CREATE EXTENSION IF NOT EXISTS unaccent SCHEMA dou_inlabs;
+
 CREATE TABLE IF NOT EXISTS dou_inlabs.article_raw (
-    id BIGINT PRIMARY KEY,
+    id BIGINT NOT NULL,
     name TEXT,
     idoficio BIGINT,
     pubname TEXT,
     arttype TEXT,
-    pubdate TIMESTAMP WITHOUT TIME ZONE,
+    pubdate TIMESTAMP WITHOUT TIME ZONE NOT NULL,
     artclass TEXT,
     artcategory TEXT,
     artsize BIGINT,
@@ -31,5 +34,14 @@ CREATE TABLE IF NOT EXISTS dou_inlabs.article_raw (
     titulo TEXT,
     subtitulo TEXT,
     texto TEXT,
-    assina TEXT
-  )
\ No newline at end of file
+    assina TEXT,
+    texto_norm TEXT,
+    assina_norm TEXT,
+    PRIMARY KEY (id, pubdate)
+  ) PARTITION BY RANGE (pubdate);
+
+-- One partition per month is created by the ro-dou_inlabs_load_pg DAG.
+CREATE INDEX IF NOT EXISTS article_raw_pubdate_idx ON dou_inlabs.article_raw (pubdate);
+CREATE INDEX IF NOT EXISTS article_raw_pubname_idx ON dou_inlabs.article_raw (pubname);
+CREATE INDEX IF NOT EXISTS article_raw_artcategory_idx ON dou_inlabs.article_raw (artcategory);
+CREATE INDEX IF NOT EXISTS article_raw_texto_norm_trgm_idx ON dou_inlabs.article_raw USING gin (texto_norm dou_inlabs.gin_trgm_ops);
\ No newline at end of file
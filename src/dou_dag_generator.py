@@ -3,6 +3,11 @@ Dynamic DAG generator with YAML config system to create DAG which
 searches terms in the Gazzete [Diário Oficial da União-DOU] and send it
 by email to the  provided `recipient_emails` list. The DAGs are
 generated by YAML config files at `dag_confs` folder.
+
+This module is imported on every parse of the DAG files, so the
+searchers, hooks and notification senders (and their pandas,
+BeautifulSoup, OpenSearch and apprise dependencies) are only imported
+by the task callables which use them.
 """
 
 import ast
@@ -10,13 +15,15 @@ import logging
 import os
 import sys
 import textwrap
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Union
-from functools import reduce
+from typing import Callable, Dict, List, Optional, Union
+from functools import partial, reduce
 from urllib.parse import urlparse
 
 from airflow import DAG
-from airflow.sdk import TaskGroup, Variable
+from airflow.sdk import Metadata, TaskGroup, Variable
 from airflow.sdk.definitions.asset import Dataset
 
 from airflow.providers.standard.operators.empty import EmptyOperator
@@ -27,25 +34,24 @@ from airflow.timetables.trigger import CronTriggerTimetable
 
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 from utils.date import get_reference_date
+from utils.deadline import deadline
 
-from notification.notifier import Notifier
-from utils.select_terms import TermSelector
-from notification.email_sender import EmailSender
-from notification.notification_sender import NotificationSender
-from parsers import DAGConfig, YAMLParser
+from parsers import DAGConfig, DAGConfigCache, YAMLParser, list_yaml_files
 from schemas import FetchTermsConfig
-from searchers import (
-    BaseSearcher,
-    DOUSearcher,
-    QDSearcher,
-    INLABSSearcher,
-    DOESPSearcher,
-)
+from search_coordinator import SearchCoordinator
 
 
 
 SearchResult = Dict[str, Dict[str, Dict[str, List[dict]]]]
 
+SEARCH_TIMEOUT = float(os.getenv("RO_DOU__SEARCH_TIMEOUT", 3600))
+
+
+def source_timeout(source: str) -> float:
+    """Seconds the search of `source` may take in ``perform_searches``,
+    from ``RO_DOU__<SOURCE>_SEARCH_TIMEOUT`` or ``RO_DOU__SEARCH_TIMEOUT``."""
+    return float(os.getenv(f"RO_DOU__{source}_SEARCH_TIMEOUT", SEARCH_TIMEOUT))
+
 
 def _channel_name_from_url(url: str) -> str:
     """Extract the notification channel name from a URL."""
@@ -69,8 +75,8 @@ def merge_results(*dicts: SearchResult) -> SearchResult:
     def merge_two(dict1, dict2):
         merged = {}
 
-        # Combine keys from both dictionaries
-        all_keys = set(dict1) | set(dict2)
+        # Combine keys from both dictionaries, in order
+        all_keys = list(dict1) + [key for key in dict2 if key not in dict1]
 
         for key in all_keys:
             value1 = dict1.get(key)
@@ -130,15 +136,9 @@ class DouDigestDagGenerator:
     DEFAULT_SCHEDULE = "0 5 * * *"
 
     parser = YAMLParser
-    searchers: Dict[str, BaseSearcher]
 
     def __init__(self):
-        self.searchers = {
-            "DOU": DOUSearcher(),
-            "QD": QDSearcher(),
-            "INLABS": INLABSSearcher(),
-            "DOESP": DOESPSearcher(),
-        }
+        self._searchers = None
 
         self.on_failure_callback = self._notify_on_failure
         # self.on_retry_callback = None
@@ -163,6 +163,39 @@ class DouDigestDagGenerator:
         except Exception as e:
             logging.error(f"Error in _notify_on_failure: {str(e)}", exc_info=True)
 
+    @property
+    def searchers(self) -> dict:
+        """Searchers of each source, built on first use by a task."""
+        if self._searchers is None:
+            from searchers import (
+                DOUSearcher,
+                QDSearcher,
+                INLABSSearcher,
+                DOESPSearcher,
+            )
+
+            self._searchers = {
+                "DOU": DOUSearcher(),
+                "QD": QDSearcher(),
+                "INLABS": INLABSSearcher(),
+                "DOESP": DOESPSearcher(),
+            }
+        return self._searchers
+
+    @staticmethod
+    def select_terms_from_airflow_variable(variable: str) -> list:
+        """Task callable fetching the search terms from an Airflow variable."""
+        from utils.select_terms import TermSelector
+
+        return TermSelector().select_terms_from_airflow_variable(variable)
+
+    @staticmethod
+    def select_terms_from_db(sql: str, conn_id: str):
+        """Task callable fetching the search terms from a database."""
+        from utils.select_terms import TermSelector
+
+        return TermSelector().select_terms_from_db(sql, conn_id)
+
     @staticmethod
     def prepare_doc_md(specs: DAGConfig, config_file: str) -> str:
         """Prepares the markdown documentation for a dag.
@@ -254,8 +287,12 @@ class DouDigestDagGenerator:
             is_default_schedule = False
 
         if specs.dataset is not None:
+            dataset = specs.dataset
+            if dataset == "inlabs" and SearchCoordinator.enabled():
+                # Run after the shared INLABS searches are stored
+                dataset = SearchCoordinator.OUTPUT_DATASET
             schedule = self._update_schedule_with_dataset(
-                dataset=specs.dataset,
+                dataset=dataset,
                 schedule=schedule,
                 is_default_schedule=is_default_schedule,
             )
@@ -265,19 +302,64 @@ class DouDigestDagGenerator:
     def generate_dags(self):
         """Iterates over the YAML files and creates all dags"""
 
-        files_list = []
-
-        for directory in self.YAMLS_DIR_LIST:
-            for dirpath, _, filenames in os.walk(directory):
-                for filename in filenames:
-                    if any(ext in filename for ext in [".yaml", ".yml"]):
-                        files_list.extend([os.path.join(dirpath, filename)])
+        files_list = list_yaml_files(self.YAMLS_DIR_LIST)
+        cache = DAGConfigCache(parser=self.parser)
 
         for filepath in files_list:
-            dag_specs = self.parser(filepath).parse()
+            dag_specs = cache.parse(filepath)
             dag_id = dag_specs.id
             globals()[dag_id] = self.create_dag(dag_specs, filepath)
 
+        cache.save()
+
+        if SearchCoordinator.enabled():
+            globals()[SearchCoordinator.DAG_ID] = self.create_search_coordinator_dag()
+
+    def run_shared_searches(self, **context):
+        """Run the INLABS searches shared by the DAGs and trigger them."""
+        reference_date = get_reference_date(context)
+        cache = DAGConfigCache(parser=self.parser)
+        dag_configs = []
+        for filepath in list_yaml_files(self.YAMLS_DIR_LIST):
+            try:
+                dag_configs.append(cache.parse(filepath))
+            except Exception as e:
+                # The DAG of this file is not coordinated and runs its own
+                # searches, if it loads at all.
+                logging.warning("Skipping %s on shared searches: %s", filepath, e)
+        SearchCoordinator().run(dag_configs, reference_date)
+        yield Metadata(
+            Dataset(SearchCoordinator.OUTPUT_DATASET),
+            {"reference_date": reference_date.isoformat()},
+        )
+
+    def create_search_coordinator_dag(self) -> DAG:
+        """Creates the DAG which runs the shared INLABS searches once the
+        INLABS data is loaded."""
+        dag = DAG(
+            SearchCoordinator.DAG_ID,
+            default_args={
+                "owner": "airflow",
+                "start_date": datetime(2021, 10, 18),
+                "depends_on_past": False,
+                "retries": 1,
+                "retry_delay": timedelta(minutes=2),
+            },
+            schedule=[Dataset("inlabs")],
+            description="Executa uma única vez as buscas INLABS comuns às DAGs",
+            catchup=False,
+            tags=["ro-dou", "inlabs"],
+        )
+
+        with dag:
+            PythonOperator(
+                task_id="run_shared_searches",
+                python_callable=self.run_shared_searches,
+                outlets=[Dataset(SearchCoordinator.OUTPUT_DATASET)],
+            )
+
+        return dag
+
     def _parse_term_list(self, term_list):
         """Converte term_list para lista, tratando aspas duplas extras."""
         if not isinstance(term_list, str):
@@ -327,11 +409,21 @@ class DouDigestDagGenerator:
         pubtype: List[str],
         excerpt_size: Optional[int],
         number_of_excerpts: Optional[int],
+        search_key: Optional[str] = None,
         **context,
     ) -> dict:
-        """Performs the search in each source and merge the results"""
+        """Performs the search in each source and merge the results.
+
+        The sources are searched concurrently, so the task takes as long
+        as the slowest source, and their results are merged in source order.
+        Each source must finish within ``source_timeout(source)`` seconds.
+        """
+        searchers = self.searchers
+        reference_date = get_reference_date(context)
+        searches = {}
         if "DOU" in sources:
-            dou_result = self.searchers["DOU"].exec_search(
+            searches["DOU"] = partial(
+                searchers["DOU"].exec_search,
                 term_list=term_list,
                 dou_sections=dou_sections,
                 search_date=search_date,
@@ -343,13 +435,13 @@ class DouDigestDagGenerator:
                 department_ignore=department_ignore,
                 terms_ignore=terms_ignore,
                 pubtype=pubtype,
-                reference_date=get_reference_date(context),
+                reference_date=reference_date,
             )
         elif "INLABS" in sources:
-            terms = self._parse_term_list(term_list)
-            inlabs_result = self.searchers["INLABS"].exec_search(
+            searches["INLABS"] = partial(
+                searchers["INLABS"].exec_search,
                 ai_config=ai_config,
-                terms=terms,
+                terms=self._parse_term_list(term_list),
                 dou_sections=dou_sections,
                 search_date=search_date,
                 department=department,
@@ -365,22 +457,26 @@ class DouDigestDagGenerator:
                 ai_search_config=ai_search_config,
                 show_relevancy=show_relevancy,
                 pubtype=pubtype,
-                reference_date=get_reference_date(context),
+                reference_date=reference_date,
+                search_key=search_key,
+                use_search_coordinator=SearchCoordinator.triggered_run(context),
             )
 
         if "QD" in sources:
-            qd_result = self.searchers["QD"].exec_search(
+            searches["QD"] = partial(
+                searchers["QD"].exec_search,
                 territory_id=territory_id,
                 term_list=term_list,
                 is_exact_search=is_exact_search,
-                reference_date=get_reference_date(context),
+                reference_date=reference_date,
                 excerpt_size=excerpt_size,
                 number_of_excerpts=number_of_excerpts,
                 result_as_email=result_as_email,
             )
 
         if "DOESP" in sources:
-            doesp_result = self.searchers["DOESP"].exec_search(
+            searches["DOESP"] = partial(
+                searchers["DOESP"].exec_search,
                 term_list=term_list,
                 journals=journals,
                 search_date=search_date,
@@ -390,23 +486,10 @@ class DouDigestDagGenerator:
                 department_ignore=department_ignore,
                 terms_ignore=terms_ignore,
                 pubtype=pubtype,
-                reference_date=get_reference_date(context),
+                reference_date=reference_date,
             )
 
-        if "DOU" in sources and "QD" in sources:
-            result = merge_results(qd_result, dou_result)
-        elif "INLABS" in sources and "QD" in sources:
-            result = merge_results(qd_result, inlabs_result)
-        elif "DOESP" in sources and "QD" in sources:
-            result = merge_results(qd_result, doesp_result)
-        elif "DOU" in sources:
-            result = dou_result
-        elif "INLABS" in sources:
-            result = inlabs_result
-        elif "DOESP" in sources:
-            result = doesp_result
-        else:
-            result = qd_result
+        result = self._run_searches(searches)
 
         # Add more specs info
         search_dict = {}
@@ -418,6 +501,61 @@ class DouDigestDagGenerator:
 
         return search_dict
 
+    @staticmethod
+    def _run_searches(searches: Dict[str, Callable[[], SearchResult]]) -> SearchResult:
+        """Run the search of each source in its own thread and merge the
+        results in the order of `searches`.
+
+        Each source runs under a ``deadline`` of its ``source_timeout``,
+        which the searchers check between pages and terms, so a source
+        that times out stops instead of running on in the background.
+
+        Raises:
+            TimeoutError: If a source does not finish within its
+                ``source_timeout``.
+        """
+        if not searches:
+            return {}
+
+        def run(source: str, search: Callable[[], SearchResult]) -> SearchResult:
+            with deadline(source_timeout(source)):
+                return search()
+
+        executor = ThreadPoolExecutor(max_workers=len(searches))
+        started = time.monotonic()
+        pending = {
+            executor.submit(run, source, search): (source, started + source_timeout(source))
+            for source, search in searches.items()
+        }
+        results = {}
+        try:
+            while pending:
+                timeout_at = min(timeout_at for _, timeout_at in pending.values())
+                done, _ = wait(
+                    pending,
+                    timeout=max(0, timeout_at - time.monotonic()),
+                    return_when=FIRST_COMPLETED,
+                )
+                for future in done:
+                    source, _ = pending.pop(future)
+                    results[source] = future.result()
+                    logging.info(
+                        "%s search finished in %.1fs", source, time.monotonic() - started
+                    )
+                expired = [
+                    source
+                    for source, timeout_at in pending.values()
+                    if timeout_at <= time.monotonic()
+                ]
+                if expired:
+                    raise TimeoutError(
+                        f"Search timed out for source(s): {', '.join(expired)}"
+                    )
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return reduce(merge_results, [results[source] for source in searches])
+
     def get_xcom_pull_tasks(self, num_searches, **context):
         """Retrieve XCom values from multiple tasks and append them to a new list.
         Function required for Airflow version 2.10.0 or later
@@ -461,6 +599,8 @@ class DouDigestDagGenerator:
         **context,
     ) -> None:
         """Send user notification for a single channel"""
+        from notification.notifier import Notifier
+
         search_report = self.get_xcom_pull_tasks(num_searches=num_searches, **context)
         report_date = get_reference_date(context).strftime("%d/%m/%Y")
         if channel:
@@ -469,6 +609,10 @@ class DouDigestDagGenerator:
                 search_report=search_report, report_date=report_date
             )
             return
+        if sender_class is None:
+            from notification.notification_sender import NotificationSender
+
+            sender_class = NotificationSender
         if webhook_url:
             sender = sender_class(specs.report, webhook_url=webhook_url)
         else:
@@ -525,7 +669,6 @@ class DouDigestDagGenerator:
 
                     # determine the terms list
                     term_list = []
-                    term_selector = TermSelector()
                     # is it a directly defined list of terms or is it a
                     # configuration for fetching terms from a data source?
                     if subsearch.terms is None:
@@ -536,7 +679,7 @@ class DouDigestDagGenerator:
                     elif terms_come_from_airflow_variable:
                         select_terms_from_airflow_variable_task = PythonOperator(
                             task_id=f"select_terms_from_airflow_variable_{counter}",
-                            python_callable=term_selector.select_terms_from_airflow_variable,
+                            python_callable=self.select_terms_from_airflow_variable,
                             op_kwargs={
                                 "variable": subsearch.terms.from_airflow_variable
                             },
@@ -550,7 +693,7 @@ class DouDigestDagGenerator:
                     elif terms_come_from_db:
                         select_terms_from_db_task = PythonOperator(
                             task_id=f"select_terms_from_db_{counter}",
-                            python_callable=term_selector.select_terms_from_db,
+                            python_callable=self.select_terms_from_db,
                             op_kwargs={
                                 "sql": subsearch.terms.from_db_select.sql,
                                 "conn_id": subsearch.terms.from_db_select.conn_id,
@@ -593,6 +736,7 @@ class DouDigestDagGenerator:
                             "excerpt_size": subsearch.excerpt_size,
                             "number_of_excerpts": subsearch.number_of_excerpts,
                             "result_as_email": result_as_html(specs),
+                            "search_key": specs.search_key(counter),
                         },
                     )
 
@@ -638,7 +782,6 @@ class DouDigestDagGenerator:
                         op_kwargs={
                             "num_searches": len(searches),
                             "specs": specs,
-                            "sender_class": NotificationSender,
                             "webhook_url": url,
                         },
                     )
@@ -675,7 +818,7 @@ class DouDigestDagGenerator:
                     op_kwargs={
                         "num_searches": len(searches),
                         "specs": specs,
-                        "sender_class": EmailSender,
+                        "channel": "email",
                     },
                 )
                 has_matches_task >> notify_task
@@ -8,6 +8,7 @@ so you can adapt selectors quickly.
 """
 
 import logging
+import os
 import time
 from datetime import datetime
 from typing import List, Optional
@@ -24,6 +25,8 @@ except Exception:
     # Allow running tests without Airflow installed
     BaseHook = object
 
+from utils import deadline
+from utils.http_cache import HTTPCache
 from utils.search_domains import SearchDate, Field, calculate_from_datetime, SectionDOESP
 
 
@@ -34,16 +37,27 @@ class DOESPHook(BaseHook):
     - This uses the discovered journals endpoint to map "cadernos" (seções) to ids.
     - The main search endpoint used here is an API endpoint discovered in the site
       (may need adjustment if the API changes).
+    - Successful responses are shared with other DAGs through `cache` for
+      ``RO_DOU__DOESP_CACHE_TTL`` seconds.
     """
 
     BASE_WEB_URL = "https://doe.sp.gov.br/"
     JOURNALS_API_URL = "https://do-api-web-search.doe.sp.gov.br/v2/journals"
     SEARCH_API_URL = "https://do-api-web-search.doe.sp.gov.br/v2/advanced-search/publications"
+    cache = HTTPCache("doesp", ttl=int(os.getenv("RO_DOU__DOESP_CACHE_TTL", 3600)))
 
     def __init__(self, *args, **kwargs):
         super().__init__()
 
     def _request(self, url: str, params: Optional[dict] = None, headers: Optional[dict] = None, with_retry: bool = True, timeout: int = 10):
+        cached = self.cache.get(url, params)
+        if cached is not None:
+            return cached
+        response = self._request_uncached(url, params, headers, with_retry, timeout)
+        self.cache.set(url, params, response)
+        return response
+
+    def _request_uncached(self, url: str, params: Optional[dict] = None, headers: Optional[dict] = None, with_retry: bool = True, timeout: int = 10):
         hdrs = {
             "User-Agent": "Mozilla/5.0 (compatible; Ro-DOU/0.7; +https://github.com/gestaogovbr/Ro-dou)",
             "Accept": "application/json, text/plain, */*",
@@ -52,14 +66,14 @@ class DOESPHook(BaseHook):
             hdrs.update(headers)
 
         try:
-            r = requests.get(url, params=params, headers=hdrs, timeout=timeout)
+            r = requests.get(url, params=params, headers=hdrs, timeout=deadline.timeout(timeout))
             r.raise_for_status()
             return r
         except requests.exceptions.RequestException as e:
             logging.error("Request error to %s: %s", url, e)
             if with_retry:
-                time.sleep(5)
-                r = requests.get(url, params=params, headers=hdrs, timeout=timeout)
+                time.sleep(deadline.timeout(5))
+                r = requests.get(url, params=params, headers=hdrs, timeout=deadline.timeout(timeout))
                 r.raise_for_status()
                 return r
             raise
@@ -4,11 +4,16 @@ API Hooks for querying the Official Gazette (Diário Oficial da União)
 import sys
 import os
 import logging
+import re
+import threading
 from datetime import datetime
+from email.utils import parsedate_to_datetime
+from random import random
 import time
 import json
-from typing import List
+from typing import List, Optional, Tuple, Union
 import requests
+from requests.adapters import HTTPAdapter
 
 from airflow.sdk.bases.hook import BaseHook
 
@@ -16,9 +21,71 @@ from bs4 import BeautifulSoup
 
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 from utils.search_domains import SearchDate, Field, Section, calculate_from_datetime
+from utils import deadline
+from utils.http_cache import HTTPCache
+from utils.rate_limiter import TokenBucket
+
+
+def _build_session(pool_maxsize: int) -> requests.Session:
+    """Return a session keeping up to `pool_maxsize` connections alive
+    per host."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_maxsize)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
 
 
 class DOUHook(BaseHook):
+    """Searches the DOU website.
+
+    Requests share a pooled keep-alive session. Every request to
+    in.gov.br, of any thread, takes a token from the shared
+    `rate_limiter`, limited to ``REQUESTS_PER_SECOND``.
+
+    Connection errors, timeouts, ``RETRY_STATUS`` responses and pages
+    without the results script, the usual transient error page of the
+    site, are retried up to ``MAX_RETRIES`` times with exponential backoff and jitter, or
+    after the delay sent in the ``Retry-After`` header. The latency of
+    every request is kept and summarized by ``latency_stats``.
+
+    Successful responses with the results script are shared with other
+    DAGs through `cache` for ``RO_DOU__DOU_CACHE_TTL`` seconds.
+    """
+
+    REQUESTS_PER_SECOND = float(os.getenv("RO_DOU__DOU_REQUESTS_PER_SECOND", 1))
+    # One connection per thread of the DOUSearcher
+    POOL_MAXSIZE = int(os.getenv("RO_DOU__DOU_MAX_WORKERS", 4))
+    MAX_RETRIES = int(os.getenv("RO_DOU__DOU_MAX_RETRIES", 5))
+    BACKOFF_FACTOR = 2
+    BACKOFF_MAX = 60
+    RETRY_STATUS = {429, 500, 502, 503, 504}
+    TIMEOUT = 10
+    HEADERS = {
+        "User-Agent": "Mozilla/5.0 (compatible; Ro-DOU/0.7; +https://github.com/gestaogovbr/Ro-dou)",
+        "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8",
+        "Cache-Control": "no-cache",
+    }
+    rate_limiter = TokenBucket(REQUESTS_PER_SECOND)
+    session = _build_session(POOL_MAXSIZE)
+    cache = HTTPCache("dou", ttl=int(os.getenv("RO_DOU__DOU_CACHE_TTL", 3600)))
+    RESULTS_SCRIPT_ID = "_br_com_seatecnologia_in_buscadou_BuscaDouPortlet_params"
+    # Patterns of the elements read from a result page, matched on the
+    # raw bytes instead of parsing the whole page.
+    _RESULTS_SCRIPT_RE = re.compile(
+        rb"<script\b[^>]*\bid\s*=\s*[\"']"
+        + RESULTS_SCRIPT_ID.encode()
+        + rb"[\"'][^>]*>(.*?)</script\s*>",
+        re.DOTALL | re.IGNORECASE,
+    )
+    _LAST_PAGE_RE = re.compile(
+        rb"<button\b[^>]*\bid\s*=\s*[\"']lastPage[\"'][^>]*>(.*?)</button\s*>",
+        re.DOTALL | re.IGNORECASE,
+    )
+    _SECOND_PAGE_RE = re.compile(
+        rb"<button\b[^>]*\bid\s*=\s*[\"']2btn[\"']", re.IGNORECASE
+    )
+    _TAG_RE = re.compile(rb"<[^>]*>")
     IN_WEB_BASE_URL = "https://www.in.gov.br/web/dou/-/"
     IN_API_BASE_URL = "https://www.in.gov.br/consulta/-/buscar/dou"
     SEC_DESCRIPTION = {
@@ -40,13 +107,21 @@ class DOUHook(BaseHook):
     }
 
     def __init__(self, *args, **kwargs):
-        pass
+        self._latencies: List[float] = []
+        self._retries = 0
+        self._stats_lock = threading.Lock()
 
     def _get_query_str(self, term, field, is_exact_search):
         """
         For terms with more than one word,
-        add double quotes at the beginning and end
+        add double quotes at the beginning and end.
+        A list of terms is joined in a single ``OR`` query.
         """
+        if isinstance(term, list):
+            return " OR ".join(
+                self._get_query_str(t, field, is_exact_search) for t in term
+            )
+
         if is_exact_search:
             term = f'"{term}"'
 
@@ -57,48 +132,184 @@ class DOUHook(BaseHook):
 
 
     def _request_page(self, with_retry: bool, payload: dict):
-        headers = {
-            "User-Agent": "Mozilla/5.0 (compatible; Ro-DOU/0.7; +https://github.com/gestaogovbr/Ro-dou)",
-            "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8",
-            "Cache-Control": "no-cache",
+        cached = self.cache.get(self.IN_API_BASE_URL, payload)
+        if cached is not None:
+            return cached
+        response = self._request_page_uncached(with_retry, payload)
+        # A page without the results script fails the search, and must
+        # not fail the searches of other DAGs for the whole TTL.
+        if self.cache.ttl > 0 and self._has_results_script(response.content):
+            self.cache.set(self.IN_API_BASE_URL, payload, response)
+        return response
+
+    def _request_page_uncached(self, with_retry: bool, payload: dict):
+        url = self.IN_API_BASE_URL
+        max_retries = self.MAX_RETRIES if with_retry else 0
+        attempt = 0
+
+        while True:
+            self.rate_limiter.acquire()
+            start = time.monotonic()
+            response = None
+            try:
+                response = self.session.get(
+                    url,
+                    params=payload,
+                    headers=self.HEADERS,
+                    timeout=deadline.timeout(self.TIMEOUT),
+                )
+            except requests.exceptions.SSLError as ssl_err:
+                if not url.startswith("https://"):
+                    raise
+                logging.error("SSL Error: %s", ssl_err)
+                logging.info("Trying fallback to HTTP…")
+                url = url.replace("https://", "http://", 1)
+                continue
+            except (
+                requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout,
+            ) as error:
+                if attempt >= max_retries:
+                    logging.error("General Error accessing DOU API: %s", error)
+                    raise
+                failure = str(error)
+            finally:
+                self._record(time.monotonic() - start)
+
+            if response is not None:
+                if response.status_code in self.RETRY_STATUS and attempt < max_retries:
+                    failure = f"HTTP {response.status_code}"
+                else:
+                    response.raise_for_status()
+                    if not response.url.startswith("https://"):
+                        logging.warning("Using HTTP. Final URL: %s", response.url)
+                    if self._has_results_script(response.content) or attempt >= max_retries:
+                        return response
+                    failure = "page without the results script"
+                    # Its Retry-After, if any, is not about this failure.
+                    response = None
+
+            delay = self._retry_delay(attempt, response)
+            attempt += 1
+            with self._stats_lock:
+                self._retries += 1
+            logging.info(
+                "Attempt %s of %s failed (%s). Trying again in %.1f seconds...",
+                attempt,
+                max_retries,
+                failure,
+                delay,
+            )
+            time.sleep(deadline.timeout(delay))
+
+    def _retry_delay(self, attempt: int, response: Optional[requests.Response]) -> float:
+        """Return the seconds to wait before retrying: the ``Retry-After``
+        header of `response`, if any, or an exponential backoff with
+        jitter."""
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                try:
+                    retry_at = parsedate_to_datetime(retry_after)
+                    return max(0.0, retry_at.timestamp() - time.time())
+                except (TypeError, ValueError):
+                    pass
+        backoff = min(self.BACKOFF_MAX, self.BACKOFF_FACTOR * 2**attempt)
+        return backoff / 2 + random() * backoff / 2
+
+    def _record(self, latency: float):
+        with self._stats_lock:
+            self._latencies.append(latency)
+
+    def latency_stats(self, reset: bool = True) -> dict:
+        """Return the number of requests and retries and the latency, in
+        seconds, of the requests made since the last reset.
+
+        Args:
+            reset (bool): Clear the collected latencies. Defaults to True.
+        """
+        with self._stats_lock:
+            latencies = sorted(self._latencies)
+            retries = self._retries
+            if reset:
+                self._latencies = []
+                self._retries = 0
+
+        if not latencies:
+            return {"requests": 0, "retries": retries}
+        return {
+            "requests": len(latencies),
+            "retries": retries,
+            "mean": round(sum(latencies) / len(latencies), 3),
+            "p95": round(latencies[int(0.95 * (len(latencies) - 1))], 3),
+            "max": round(latencies[-1], 3),
         }
 
-        try:
-            # First try with HTTPS
-            response = requests.get(self.IN_API_BASE_URL, params=payload, headers=headers, timeout=10)
+    @classmethod
+    def _has_results_script(cls, content: Union[bytes, str]) -> bool:
+        """Return whether the page may hold the results script, without
+        parsing it."""
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        return cls.RESULTS_SCRIPT_ID.encode() in content
+
+    @classmethod
+    def _parse_page(cls, content: bytes) -> Tuple[int, Optional[list]]:
+        """Return the number of pages and the results of a search page.
+
+        The results script and the pagination buttons are found with
+        regular expressions over the raw page, falling back to parsing
+        the whole page with BeautifulSoup when the script is not found.
+        The results are None when the page has no results script.
+        """
+        if isinstance(content, str):
+            content = content.encode("utf-8")
 
-            # Extra Validation
-            if not response.url.startswith("https://"):
-                logging.warning("Response redirected to HTTP! Final URL: %s", response.url)
+        script = cls._RESULTS_SCRIPT_RE.search(content)
+        if script is None:
+            return cls._parse_page_soup(content)
 
-            response.raise_for_status()
-            return response
+        last_page = cls._LAST_PAGE_RE.search(content)
+        if last_page is not None:
+            # Get the number of pages in the pagination bar
+            number_pages = int(cls._TAG_RE.sub(b"", last_page.group(1)).strip())
+        elif cls._SECOND_PAGE_RE.search(content):
+            # issue https://github.com/gestaogovbr/Ro-dou/issues/101
+            number_pages = 2
+        else:
+            # If is a single page
+            number_pages = 1
 
-        except requests.exceptions.SSLError as ssl_err:
-            logging.error("SSL Error: %s", ssl_err)
-            logging.info("Trying fallback to HTTP…")
+        return number_pages, json.loads(script.group(1))["jsonArray"]
 
-            # Fallback for HTTP
-            http_url = self.IN_API_BASE_URL.replace("https://", "http://")
-            try:
-                response = requests.get(http_url, params=payload, headers=headers, timeout=10)
-                response.raise_for_status()
-                logging.warning("Using HTTP fallback. Final URL: %s", response.url)
-                return response
-            except requests.exceptions.RequestException as e:
-                logging.error("HTTP Fallback Error: %s", e)
-                raise
-
-        except requests.exceptions.RequestException as e:
-            logging.error("General Error accessing DOU API: %s", e)
-            if with_retry:
-                logging.info("Sleep. Trying again in 30 seconds...")
-                time.sleep(30)
-                return requests.get(self.IN_API_BASE_URL, params=payload, headers=headers, timeout=10)
+    @classmethod
+    def _parse_page_soup(cls, content: bytes) -> Tuple[int, Optional[list]]:
+        """Same as ``_parse_page``, parsing the whole page."""
+        soup = BeautifulSoup(content, "html.parser")
+
+        # Checks if there is more than one page of results
+        pagination_tag = soup.find("button", id="lastPage")
+
+        if pagination_tag is not None:
+            # Get the number of pages in the pagination bar
+            number_pages = int(pagination_tag.text.strip())
+        elif soup.find("button", id="2btn"):
+            # issue https://github.com/gestaogovbr/Ro-dou/issues/101
+            number_pages = 2
+        else:
+            # If is a single page
+            number_pages = 1
+
+        script_tag = soup.find("script", id=cls.RESULTS_SCRIPT_ID)
+        if script_tag is None:
+            return number_pages, None
+        return number_pages, json.loads(script_tag.contents[0])["jsonArray"]
 
     def search_text(
         self,
-        search_term: str,
+        search_term: Union[str, List[str]],
         sections: List[Section],
         reference_date: datetime = datetime.now(),
         search_date=SearchDate.DIA,
@@ -110,7 +321,8 @@ class DOUHook(BaseHook):
         Search for a term in the API and return all ocurrences.
 
         Args:
-            - search_term: The term to perform the search with.
+            - search_term: The term to perform the search with, or a
+                list of terms searched with a single ``OR`` query.
             - section: The Journal section to perform the search on.
 
         Return:
@@ -131,26 +343,7 @@ class DOUHook(BaseHook):
         logging.info("Payload content: %s", payload)
         page = self._request_page(payload=payload, with_retry=with_retry)
 
-        soup = BeautifulSoup(page.content, "html.parser")
-
-        # Checks if there is more than one page of results
-        pagination_tag = soup.find(
-            'button', id='lastPage'
-        )
-
-        if (pagination_tag) is not None:
-            # Get the number of pages in the pagination bar
-            number_pages = int(pagination_tag.text.strip())
-        else:
-            # issue https://github.com/gestaogovbr/Ro-dou/issues/101
-            second_page_tag = soup.find(
-                'button', id='2btn'
-            )
-            if second_page_tag:
-                number_pages = 2
-            else:
-                # If is a single page
-                number_pages = 1
+        number_pages, search_results = self._parse_page(page.content)
 
         logging.info("Total pages: %s", number_pages)
 
@@ -175,13 +368,9 @@ class DOUHook(BaseHook):
                 })
 
                 page = self._request_page(payload=payload, with_retry=with_retry)
-                soup = BeautifulSoup(page.content, "html.parser")
-
-            script_tag = soup.find(
-                "script", id="_br_com_seatecnologia_in_buscadou_BuscaDouPortlet_params"
-            )
+                _, search_results = self._parse_page(page.content)
 
-            if script_tag is None:
+            if search_results is None:
                 logging.error(
                     "Script tag with ID '_br_com_seatecnologia_in_buscadou_BuscaDouPortlet_params' not found in DOU response. "
                     "The DOU API may have changed its structure."
@@ -192,8 +381,6 @@ class DOUHook(BaseHook):
                     "The DOU API may have changed its structure."
                 )
 
-            search_results = json.loads(script_tag.contents[0])["jsonArray"]
-
             if search_results:
                 for content in search_results:
                     item = {
@@ -5,7 +5,6 @@ import os
 import re
 import logging
 from datetime import datetime, timedelta
-import unicodedata
 import pandas as pd
 import html2text
 
@@ -19,12 +18,24 @@ from schemas import AIConfig, AISearchConfig  # type: ignore
 from ai.runner import AIRunner
 
 from ro_dou_src.utils.open_search.client_open_search import OpenSearchClient  # type: ignore
-from ro_dou_src.utils.open_search.config import INDEX_NAME, RO_DOU_INLABS_USE_OPENSEARCH  # type: ignore
+from ro_dou_src.utils.open_search.config import INDEX_NAME, get_flag  # type: ignore
+from ro_dou_src.utils.open_search.percolator import Percolator  # type: ignore
 from ro_dou_src.utils.open_search.query_builder import OpenSearchQueryBuilder  # type: ignore
+from ro_dou_src.utils.term_matcher import TermMatcher, normalize  # type: ignore
 from opensearchpy import OpenSearch  # type: ignore
 
 from bs4 import BeautifulSoup
 
+from utils import deadline  # type: ignore
+
+# HTML tag, as counted out of the visible length of excerpts.
+_TAG_RE = re.compile(r"<[^>]+>")
+# Closing tags of the blocks kept whole when trimming excerpts.
+_SEGMENT_CLOSING_RE = {
+    "table": re.compile(r"</table>", re.IGNORECASE),
+    "marker": re.compile(r"</%%>"),
+}
+
 # arttype values that identify annexes/attachments in the INLABS index.
 _ATTACHMENT_ARTTYPE = frozenset({"ANEXO", "QUADRO", "TABELA"})
 
@@ -35,9 +46,25 @@ class INLABSHook(BaseHook):
 
     Attributes:
         CONN_ID (str): DOU INLABS Database Airflow conn id.
+        TERMS_BATCH_SIZE (int): Max number of `texto` terms per OpenSearch
+            query.
+        MSEARCH_MAX_SEARCHES (int): Max number of queries per `_msearch`
+            request.
+        PAGE_SIZE (int): Hits per page when paginating a query with
+            `search_after`.
+        PIT_KEEP_ALIVE (str): Point in time keep alive between pages.
+        MAX_HITS (int): Max number of hits of a search, from
+            ``RO_DOU__INLABS_MAX_HITS``. Every hit of a search is held in
+            memory to be grouped in the report, so the hits past this
+            limit are dropped with a warning.
     """
 
     CONN_ID = "inlabs_db"
+    TERMS_BATCH_SIZE = 500
+    MSEARCH_MAX_SEARCHES = 50
+    PAGE_SIZE = 200
+    PIT_KEEP_ALIVE = "1m"
+    MAX_HITS = int(os.getenv("RO_DOU__INLABS_MAX_HITS", 10000))
 
     def __init__(self, *args, **kwargs):
         pass
@@ -84,6 +111,8 @@ class INLABSHook(BaseHook):
         show_relevancy: bool = False,
         conn_id: str = CONN_ID,
         client: OpenSearch | None = None,
+        search_key: str | None = None,
+        records: list | None = None,
     ) -> dict:
         """Searches the DOU Database with the provided search terms and processes
         the results.
@@ -98,6 +127,13 @@ class INLABSHook(BaseHook):
             use_summary (bool): If exists, use summary as excerpt or full text
             show_relevancy (bool): If True, include a relevancy tag in the report for each result
             conn_id (str): DOU Database Airflow conn id
+            search_key (str, optional): Key of the search in the OpenSearch
+                percolator. When given and the percolator is enabled, the
+                matches stored at indexing time are looked up instead of
+                running the full text query.
+            records (list, optional): Hits already fetched and mapped with
+                ``_map_opensearch_hit`` for this search, as published by the
+                ``SearchCoordinator``. When given, no query is sent.
 
         Returns:
             dict: A dictionary of processed search results.
@@ -106,7 +142,7 @@ class INLABSHook(BaseHook):
                 legacy ``matches`` field.
         """
 
-        if RO_DOU_INLABS_USE_OPENSEARCH.lower() != 'true':
+        if not get_flag("RO_DOU_INLABS_USE_OPENSEARCH"):
             from .inlabs_hook_sql_mode import INLABSSQLModeHook
 
             logging.info(
@@ -127,74 +163,38 @@ class INLABSHook(BaseHook):
                 conn_id=conn_id,
             )
 
-        if client is None:
-            client = OpenSearchClient().get_client()
-
         logging.info("Search term in INLABS HOOK.")
         logging.info(f"Search terms -> {search_terms}")
+        logging.info(f"Text terms -> {search_terms.get('texto', [])}")
 
-        _BATCH_SIZE = 500
-        texto_terms = search_terms.get("texto", [])
-
-        logging.info(f"Text terms -> {texto_terms}")
-        if len(texto_terms) > _BATCH_SIZE:
-            batches = [
-                texto_terms[i : i + _BATCH_SIZE]
-                for i in range(0, len(texto_terms), _BATCH_SIZE)
-            ]
-            seen_ids: set = set()
-            hits = []
-            for batch in batches:
-                batch_terms = {**search_terms, "texto": batch}
-                query = self._generate_opensearch_query(batch_terms)
-                response = client.search(body=query, index=INDEX_NAME)
-                for hit in response["hits"]["hits"]:
-                    if hit["_id"] not in seen_ids:
-                        seen_ids.add(hit["_id"])
-                        hits.append(hit)
+        searched_expression = ", ".join(search_terms.get("texto", []))
+        if records is not None:
+            logging.info("Using results shared by the search coordinator.")
+            main_search_results = records
         else:
-            query = self._generate_opensearch_query(search_terms)
-            response = client.search(body=query, index=INDEX_NAME)
-            hits = response["hits"]["hits"]
-
-        logging.info("Total hits after batching: %s", len(hits))
-
-        # Fetching results for extra edition search terms
-        seen_ids = {hit["_id"] for hit in hits}
-        logging.info("Seen IDs after main search: %s", seen_ids)
-        extra_search_terms = self._adapt_search_terms_to_extra(
-            copy.deepcopy(search_terms)
-        )
-        extra_texto_terms = extra_search_terms.get("texto", [])
+            if client is None:
+                client = OpenSearchClient().get_client()
+            extra_search_terms = self._adapt_search_terms_to_extra(
+                copy.deepcopy(search_terms)
+            )
+            if self._use_percolator(
+                client, search_key, search_terms, extra_search_terms
+            ):
+                hits = self._percolated_hits(
+                    client, search_key, search_terms, extra_search_terms
+                )
+            else:
+                hits = self._search_hits(client, search_terms, extra_search_terms)
 
-        if len(extra_texto_terms) > _BATCH_SIZE:
-            batches = [
-                extra_texto_terms[i : i + _BATCH_SIZE]
-                for i in range(0, len(extra_texto_terms), _BATCH_SIZE)
+            main_search_results = [
+                self._map_opensearch_hit(h, searched_expression=searched_expression)
+                for h in self._limit_hits(hits)
             ]
-            for batch in batches:
-                batch_terms = {**extra_search_terms, "texto": batch}
-                query = self._generate_opensearch_query(batch_terms)
-                response = client.search(body=query, index=INDEX_NAME)
-                for hit in response["hits"]["hits"]:
-                    if hit["_id"] not in seen_ids:
-                        seen_ids.add(hit["_id"])
-                        hits.append(hit)
-        else:
-            query = self._generate_opensearch_query(extra_search_terms)
-            response = client.search(body=query, index=INDEX_NAME)
-            for hit in response["hits"]["hits"]:
-                if hit["_id"] not in seen_ids:
-                    seen_ids.add(hit["_id"])
-                    hits.append(hit)
-
-        logging.info("Total hits after extra edition search: %s", len(hits))
 
-        searched_expression = ", ".join(search_terms.get("texto", []))
-        main_search_results = [
-            self._map_opensearch_hit(h, searched_expression=searched_expression)
-            for h in hits
-        ]
+        logging.info(
+            "Total hits after main and extra edition search: %s",
+            len(main_search_results),
+        )
         all_results = pd.DataFrame(main_search_results)
 
         if not all_results.empty:
@@ -223,6 +223,260 @@ class INLABSHook(BaseHook):
             else {}
         )
 
+    @classmethod
+    def _split_terms_in_batches(cls, payload: dict) -> list:
+        """Split ``payload["texto"]`` in chunks of ``TERMS_BATCH_SIZE`` terms.
+
+        Very long term lists produce bool queries that exceed OpenSearch
+        ``max_clause_count``, so each chunk becomes a separate query.
+
+        Args:
+            payload (dict): A dictionary containing search parameters.
+
+        Returns:
+            list: One payload per batch, sharing all non ``texto`` filters.
+        """
+        texto_terms = payload.get("texto", [])
+        if len(texto_terms) <= cls.TERMS_BATCH_SIZE:
+            return [payload]
+
+        return [
+            {**payload, "texto": texto_terms[i : i + cls.TERMS_BATCH_SIZE]}
+            for i in range(0, len(texto_terms), cls.TERMS_BATCH_SIZE)
+        ]
+
+    @classmethod
+    def _search_hits(
+        cls, client: OpenSearch, search_terms: dict, extra_search_terms: dict
+    ):
+        """Yield the unique hits of the main and extra edition payloads.
+
+        Both payloads are split in term batches and sent together through
+        `_msearch`, so the number of round trips does not grow with the
+        number of batches.
+
+        Args:
+            client (OpenSearch): OpenSearch client instance.
+            search_terms (dict): Main edition search payload.
+            extra_search_terms (dict): Extra edition search payload.
+
+        Yields:
+            dict: Unique hits of the search.
+        """
+        queries = [
+            cls._generate_opensearch_query(batch_terms)
+            for payload in (search_terms, extra_search_terms)
+            for batch_terms in cls._split_terms_in_batches(payload)
+        ]
+        return cls._multi_search_hits(client, queries)
+
+    @classmethod
+    def _multi_search_hits(cls, client: OpenSearch, queries: list):
+        """Execute `queries` through `_msearch` and yield their hits.
+
+        Queries are sent in requests of at most ``MSEARCH_MAX_SEARCHES``
+        searches. Hits are yielded in query order and deduplicated by
+        ``_id``. Queries whose first page does not hold every matching
+        document are then paginated with ``_iter_paginated_hits``, so broad
+        searches are not silently truncated at the query ``size``.
+
+        Args:
+            client (OpenSearch): OpenSearch client instance.
+            queries (list): OpenSearch query bodies.
+
+        Yields:
+            dict: Unique hits of all queries.
+
+        Raises:
+            RuntimeError: If OpenSearch reports an error for any query.
+        """
+        seen_ids: set = set()
+        truncated_queries = []
+        for i in range(0, len(queries), cls.MSEARCH_MAX_SEARCHES):
+            chunk = queries[i : i + cls.MSEARCH_MAX_SEARCHES]
+            body = []
+            for query in chunk:
+                body.extend([{"index": INDEX_NAME}, query])
+            deadline.check()
+            response = client.msearch(body=body)
+
+            for query, item in zip(chunk, response["responses"]):
+                if "error" in item:
+                    raise RuntimeError(
+                        f"OpenSearch multi-search query failed: {item['error']}"
+                    )
+                for hit in item["hits"]["hits"]:
+                    if hit["_id"] not in seen_ids:
+                        seen_ids.add(hit["_id"])
+                        yield hit
+                if cls._is_truncated(item["hits"]):
+                    truncated_queries.append(query)
+
+        for query in truncated_queries:
+            logging.info("Query has more hits than its first page. Paginating.")
+            for page in cls._iter_paginated_hits(client, query):
+                for hit in page:
+                    if hit["_id"] not in seen_ids:
+                        seen_ids.add(hit["_id"])
+                        yield hit
+
+    @staticmethod
+    def _use_percolator(
+        client: OpenSearch,
+        search_key: str | None,
+        search_terms: dict,
+        extra_search_terms: dict,
+    ) -> bool:
+        """Return True if the percolator is enabled and its matches cover
+        the current terms of `search_key` over the whole search date range.
+
+        Queries are registered when the day's articles are indexed, so a
+        search added or changed afterwards, or not registered at all, runs
+        the full text query instead.
+        """
+        if not search_key or not get_flag("RO_DOU_INLABS_USE_PERCOLATOR"):
+            return False
+        terms_hash = Percolator.terms_hash(
+            search_terms["texto"], search_terms.get("terms_ignore")
+        )
+        if Percolator(client).is_registered(
+            search_key, terms_hash, extra_search_terms["pubdate"][0]
+        ):
+            return True
+        logging.info(
+            "Search %s is not registered in the percolator with its current "
+            "terms. Running the full text query.",
+            search_key,
+        )
+        return False
+
+    @classmethod
+    def _percolated_hits(
+        cls,
+        client: OpenSearch,
+        search_key: str,
+        search_terms: dict,
+        extra_search_terms: dict,
+    ):
+        """Yield the hits matched by the percolator for `search_key`.
+
+        The regular term batches of the main and extra edition payloads
+        are queried, restricted to the article ids matched at indexing
+        time, so the text clauses still name the matched terms, highlight
+        them and score the hits. Hits without ``matched_queries`` get the
+        terms of their stored matching expressions.
+
+        Args:
+            client (OpenSearch): OpenSearch client instance.
+            search_key (str): Key of the search in the percolator.
+            search_terms (dict): Main edition search payload.
+            extra_search_terms (dict): Extra edition search payload.
+
+        Yields:
+            dict: Unique hits of the search.
+        """
+        stored = Percolator(client).matched_terms(
+            search_key, extra_search_terms["pubdate"][0], search_terms["pubdate"][-1]
+        )
+        expressions = set(search_terms["texto"])
+        matches = {}
+        for doc_id, doc_expressions in stored.items():
+            # Matches of an article reloaded after a term was removed.
+            terms = [
+                term
+                for expression in doc_expressions
+                if expression in expressions
+                for term in OpenSearchQueryBuilder.texto_terms(expression)
+            ]
+            if terms:
+                matches[doc_id] = list(dict.fromkeys(terms))
+        logging.info("Articles matched by the percolator: %s", len(matches))
+        if not matches:
+            return
+
+        queries = []
+        for payload in (search_terms, extra_search_terms):
+            for batch_terms in cls._split_terms_in_batches(payload):
+                query = cls._generate_opensearch_query(batch_terms)
+                query["query"]["bool"]["filter"].append(
+                    {"ids": {"values": list(matches)}}
+                )
+                queries.append(query)
+
+        for hit in cls._multi_search_hits(client, queries):
+            if not hit.get("matched_queries"):
+                hit["matched_queries"] = matches.get(hit["_id"], [])
+            yield hit
+
+    @classmethod
+    def _limit_hits(cls, hits):
+        """Yield the first ``MAX_HITS`` of the `hits` generator.
+
+        When the limit is reached the generator is closed, which also
+        deletes the point in time of a paginated query.
+        """
+        for count, hit in enumerate(hits):
+            if count == cls.MAX_HITS:
+                logging.warning(
+                    "Search has more than %s hits. The remaining hits were "
+                    "dropped; narrow the search terms or raise "
+                    "RO_DOU__INLABS_MAX_HITS.",
+                    cls.MAX_HITS,
+                )
+                hits.close()
+                return
+            yield hit
+
+    @staticmethod
+    def _is_truncated(hits: dict) -> bool:
+        """Return True when a search response holds fewer hits than the
+        total of matching documents."""
+        total = hits.get("total")
+        if total is None:
+            return False
+        total_value = total["value"] if isinstance(total, dict) else total
+        return total_value > len(hits["hits"])
+
+    @classmethod
+    def _iter_paginated_hits(cls, client: OpenSearch, query: dict):
+        """Yield every hit of `query`, one page at a time.
+
+        Uses a point in time (PIT) so the pages are consistent with each
+        other, and ``search_after`` over the query sort plus the ``id``
+        tiebreaker. The PIT is deleted once the generator is exhausted or
+        closed.
+
+        Args:
+            client (OpenSearch): OpenSearch client instance.
+            query (dict): OpenSearch query body.
+
+        Yields:
+            list: The hits of each page, with up to ``PAGE_SIZE`` items.
+        """
+        pit_id = client.create_point_in_time(
+            index=INDEX_NAME, keep_alive=cls.PIT_KEEP_ALIVE
+        )["pit_id"]
+        body = {
+            **query,
+            "size": cls.PAGE_SIZE,
+            "sort": query.get("sort", []) + [{"id": "asc"}],
+            "pit": {"id": pit_id, "keep_alive": cls.PIT_KEEP_ALIVE},
+        }
+        try:
+            while True:
+                deadline.check()
+                response = client.search(body=body)
+                page = response["hits"]["hits"]
+                if not page:
+                    break
+                yield page
+                if len(page) < cls.PAGE_SIZE:
+                    break
+                body["search_after"] = page[-1]["sort"]
+                body["pit"]["id"] = response.get("pit_id", pit_id)
+        finally:
+            client.delete_point_in_time(body={"pit_id": [pit_id]})
+
     @staticmethod
     def _generate_opensearch_query(payload: dict) -> dict:
         """Build the OpenSearch query body for an INLABS search payload."""
@@ -232,8 +486,21 @@ class INLABSHook(BaseHook):
 
     @staticmethod
     def _matched_terms_from_hit(hit: dict) -> list:
-        """Return sorted matched terms reported by OpenSearch for one hit."""
-        return sorted(set(hit.get("matched_queries", [])), key=str.lower)
+        """Return sorted matched terms reported by OpenSearch for one hit.
+
+        Names of whole expression clauses (see
+        ``OpenSearchQueryBuilder.build_texto_clause``) are not terms and are
+        left out.
+        """
+        prefix = OpenSearchQueryBuilder.EXPRESSION_NAME_PREFIX
+        return sorted(
+            {
+                name
+                for name in hit.get("matched_queries", [])
+                if not name.startswith(prefix)
+            },
+            key=str.lower,
+        )
 
     @classmethod
     def _map_opensearch_hit(cls, hit: dict, searched_expression: str = "") -> dict:
@@ -328,25 +595,21 @@ class INLABSHook(BaseHook):
             # `identifica` column is the publication title. If None
             # can be a table or other text content that is not inside
             # a publication.
-            df["pubname"] = df["pubname"].apply(self._rename_section)
+            # Per-record steps run as a single list comprehension over the
+            # needed columns: `DataFrame.apply(axis=1)` builds a Series for
+            # every row and dominates the time of large digests.
+            sections = {
+                section: self._rename_section(section)
+                for section in df["pubname"].unique()
+            }
+            df["pubname"] = df["pubname"].map(sections)
             df["pubdate"] = df["pubdate"].dt.strftime("%d/%m/%Y")
 
-            # Remove duplicated title then strip HTML tags
-            df["texto"] = df["texto"].apply(self._remove_duplicated_title)
-
-            df["texto"] = df["texto"].apply(self._remove_empty_tr)
-
-            if ignore_inline_tables:
-                df["texto"] = df["texto"].apply(
-                    lambda x: self._replace_inline_tables(x, min_table_rows)
-                )
-
-            if "opensearch_highlights" in df.columns:
-                df["_has_opensearch_highlight"] = df[
-                    "opensearch_highlights"
-                ].apply(self._has_opensearch_highlight)
-            else:
-                df["_has_opensearch_highlight"] = False
+            # Remove duplicated title and empty rows parsing the HTML once
+            df["texto"] = [
+                self._clean_texto(text, ignore_inline_tables, min_table_rows)
+                for text in df["texto"]
+            ]
 
             if ignore_attachments:
                 # A blank/null `identifica` means this record is a table or
@@ -369,70 +632,59 @@ class INLABSHook(BaseHook):
             should_process_matches = "matched_terms" in df.columns or any(text_terms)
 
             if "matched_terms" in df.columns:
-                df["matched_terms"] = df["matched_terms"].apply(
-                    lambda terms: (
-                        sorted(set(terms), key=str.lower)
-                        if isinstance(terms, list)
-                        else []
-                    )
-                )
-                df["matched_terms_text"] = df["matched_terms"].apply(
-                    lambda terms: ", ".join(terms)
-                )
+                df["matched_terms"] = [
+                    sorted(set(terms), key=str.lower) if isinstance(terms, list) else []
+                    for terms in df["matched_terms"]
+                ]
+                df["matched_terms_text"] = [
+                    ", ".join(terms) for terms in df["matched_terms"]
+                ]
                 df["matches"] = df["matched_terms_text"]
             elif any(text_terms):
-                df["matches"] = df.apply(
-                    lambda row: self._find_matches(
-                        row["texto"] + " " + row["identifica"],
-                        keys=text_terms,
-                    ),
-                    axis=1,
-                )
+                # Matched over the cleaned text shown in the report, without
+                # the title paragraph and the omitted inline tables.
+                df["matches"] = [
+                    self._find_matches(text + " " + title, keys=text_terms)
+                    for text, title in zip(df["texto"], df["identifica"])
+                ]
             elif "matches" not in df.columns:
                 df["matches"] = ""
 
             if should_process_matches:
-                df["matches_assina"] = df.apply(
-                    lambda row: self._normalize(row["matches"])
-                    in self._normalize(row["assina"]),
-                    axis=1,
+                highlights = (
+                    df["opensearch_highlights"]
+                    if "opensearch_highlights" in df.columns
+                    else [None] * len(df)
                 )
-                df["texto"] = df.apply(
-                    lambda row: self._highlight_search_text(
-                        [t for t in row["matches"].split(", ") if t],
-                        row["texto"],
-                        (
-                            row["opensearch_highlights"]
-                            if row["_has_opensearch_highlight"]
-                            else []
-                        ),
-                    ),
-                    axis=1,
-                )
-                df["identifica"] = df.apply(
-                    lambda row: self._highlight_terms(
-                        [t for t in row["matches"].split(", ") if t],
-                        row["identifica"],
-                    ),
-                    axis=1,
-                )
-                df["count_assina"] = df.apply(
-                    lambda row: (
-                        row["texto"].count(row["assina"])
-                        if row["assina"] is not None
-                        else 0
-                    ),
-                    axis=1,
+                processed = [
+                    self._process_matches(matches, signature, text, title, hl)
+                    for matches, signature, text, title, hl in zip(
+                        df["matches"],
+                        df["assina"],
+                        df["texto"],
+                        df["identifica"],
+                        highlights,
+                    )
+                ]
+                (
+                    df["texto"],
+                    df["identifica"],
+                    df["matches_assina"],
+                    df["count_assina"],
+                ) = (
+                    [list(column) for column in zip(*processed)]
+                    if processed
+                    else [[], [], [], []]
                 )
                 if ignore_signature_match:
                     df = df[~((df["matches_assina"]) & (df["count_assina"] == 1))]
 
-            def _highlight_row_matches(row):
-                if "<%%>" in row["texto"]:
-                    return row["texto"]
+            def _highlight_row_matches(text, matches):
+                if "<%%>" in text:
+                    return text
                 return self._highlight_terms(
-                    [t for t in row["matches"].split(", ") if t],
-                    row["texto"],
+                    [t for t in matches.split(", ") if t],
+                    text,
                 )
 
             if "has_ementa" not in df.columns:
@@ -455,9 +707,13 @@ class INLABSHook(BaseHook):
                     ].apply(lambda x: self._replace_inline_tables(x, min_table_rows))
                 # Mark if the ementa exists in a new column to be used on the template to display the "Ementa" tag
                 df["has_ementa"] = ementa_has_content
-                df.loc[ementa_has_content, "texto"] = df.loc[
-                    ementa_has_content
-                ].apply(_highlight_row_matches, axis=1)
+                df.loc[ementa_has_content, "texto"] = [
+                    _highlight_row_matches(text, matches)
+                    for text, matches in zip(
+                        df.loc[ementa_has_content, "texto"],
+                        df.loc[ementa_has_content, "matches"],
+                    )
+                ]
 
             df["ai_generated"] = False
 
@@ -483,15 +739,18 @@ class INLABSHook(BaseHook):
                         temperature=ai_search_config.temperature,
                     )
                     df.at[i, "ai_generated"] = True
-                    df.at[i, "texto"] = _highlight_row_matches(df.loc[i])
+                    df.at[i, "texto"] = _highlight_row_matches(
+                        df.at[i, "texto"], df.at[i, "matches"]
+                    )
 
             if not full_text:
                 # Only trim text that was not processed by AI and does not have ementa
                 mask = (~df["ai_generated"]) & (~df["has_ementa"])
 
-                df.loc[mask, "texto"] = df.loc[mask, "texto"].apply(
-                    lambda x: self._trim_text(x, text_length)
-                )
+                df.loc[mask, "texto"] = [
+                    self._trim_text(text, text_length)
+                    for text in df.loc[mask, "texto"]
+                ]
 
             df["display_date_sortable"] = None
 
@@ -564,18 +823,7 @@ class INLABSHook(BaseHook):
 
         def _find_matches(self, text: str, keys: list) -> str:
             """Find configured keys in text using normalized exact matching."""
-            normalized_text = self._normalize(text)
-            matches = [
-                key
-                for key in keys
-                if re.search(
-                    r"\b" + re.escape(self._normalize(key)) + r"\b",
-                    normalized_text,
-                    re.IGNORECASE,
-                )
-            ]
-
-            return ", ".join(sorted(set(matches), key=str.lower))
+            return ", ".join(TermMatcher.cached(keys).find(text))
 
         @staticmethod
         def _normalize(text: str) -> str:
@@ -589,14 +837,7 @@ class INLABSHook(BaseHook):
                 str: The normalized ASCII string.
             """
 
-            return (
-                unicodedata.normalize("NFKD", text)
-                .encode("ascii", "ignore")
-                .decode("ascii")
-                .lower()
-                if isinstance(text, str)
-                else ""
-            )
+            return normalize(text)
 
         @staticmethod
         def _has_opensearch_highlight(highlights) -> bool:
@@ -669,13 +910,8 @@ class INLABSHook(BaseHook):
         def _highlight_terms(self, terms: list, text: str) -> str:
             """Wrap `terms` values in `text` with `<%%>` and `</%%>`.
 
-            Matching is done against a normalized (accent-stripped) version of
-            the text so that a search term like "Ministerio" also highlights
-            "Ministério" in the original text.  Positions found in the normalized
-            text are mapped back to the original text — this is safe because
-            ``_normalize`` maps each source character to exactly one ASCII
-            character (accented Latin letters, cedillas, etc.).  If the lengths
-            diverge for any reason, the method falls back to direct matching.
+            Delegates to the `TermMatcher` of `terms`, cached across calls,
+            so a search term like "Ministerio" also highlights "Ministério".
 
             Args:
                 terms (list): List of terms to be wrapped on text.
@@ -687,27 +923,7 @@ class INLABSHook(BaseHook):
                     and `</%%>`.
             """
 
-            escaped_terms = [re.escape(self._normalize(term)) for term in terms if term]
-            if not escaped_terms:
-                return text
-            pattern = rf"\b({'|'.join(escaped_terms)})\b"
-
-            normalized_text = self._normalize(text)
-
-            if len(normalized_text) != len(text):
-                # direct case-insensitive match on original text
-                direct_pattern = rf"\b({'|'.join(re.escape(t) for t in terms if t)})\b"
-                return re.sub(direct_pattern, r"<%%>\1</%%>", text, flags=re.IGNORECASE)
-
-            result = []
-            last_end = 0
-            for m in re.finditer(pattern, normalized_text, flags=re.IGNORECASE):
-                result.append(text[last_end : m.start()])
-                result.append(f"<%%>{text[m.start() : m.end()]}</%%>")
-                last_end = m.end()
-            result.append(text[last_end:])
-
-            return "".join(result)
+            return TermMatcher.cached(terms).highlight(text)
 
         @staticmethod
         def _visible_len(text: str) -> int:
@@ -746,6 +962,109 @@ class INLABSHook(BaseHook):
                     i -= 1
             return text[i:]
 
+        @staticmethod
+        def _excerpt_segments(text: str) -> list:
+            """Split `text` in a single pass into excerpt segments.
+
+            Each segment is a ``(kind, start, end, visible, spans)`` tuple:
+
+            - ``"table"``: a whole ``<table>…</table>`` block;
+            - ``"marker"``: a whole ``<%%>…</%%>`` highlight;
+            - ``"run"``: the text and tags between them, with its
+              ``("text" | "tag", start, end)`` spans.
+
+            ``visible`` is the number of characters outside HTML tags, as
+            in ``_visible_len``. Trimming then walks the segments instead
+            of scanning the text again, so it runs in time proportional to
+            the length of `text`.
+            """
+            segments = []
+            unclosed = set()
+            run_spans = []
+            run_start = run_visible = 0
+
+            def _close_run(at):
+                nonlocal run_spans, run_visible
+                if run_spans:
+                    segments.append(("run", run_start, at, run_visible, run_spans))
+                run_spans, run_visible = [], 0
+
+            pos = 0
+            while pos < len(text):
+                m = _TAG_RE.search(text, pos)
+                tag_start = m.start() if m else len(text)
+                if tag_start > pos:
+                    if not run_spans:
+                        run_start = pos
+                    run_spans.append(("text", pos, tag_start))
+                    run_visible += tag_start - pos
+                if not m:
+                    break
+
+                kind = (
+                    "table"
+                    if text[tag_start : tag_start + 6].lower() == "<table"
+                    else "marker" if text.startswith("<%%>", tag_start) else "tag"
+                )
+                end = m.end()
+                if kind != "tag":
+                    closing = (
+                        None
+                        if kind in unclosed
+                        else _SEGMENT_CLOSING_RE[kind].search(text, tag_start + 4)
+                    )
+                    if closing is None:
+                        # No closing tag left: keep it as a plain tag
+                        unclosed.add(kind)
+                        kind = "tag"
+                    else:
+                        end = closing.end()
+
+                if kind == "tag":
+                    if not run_spans:
+                        run_start = tag_start
+                    run_spans.append(("tag", tag_start, end))
+                else:
+                    _close_run(tag_start)
+                    visible = len(_TAG_RE.sub("", text[tag_start:end]))
+                    segments.append((kind, tag_start, end, visible, None))
+                pos = end
+
+            _close_run(len(text))
+            return segments
+
+        @staticmethod
+        def _cut_spans_start(spans: list, n: int, default: int) -> int:
+            """Return the position right after the first `n` visible
+            characters of `spans`, or `default` when `n` is not positive."""
+            pos = default
+            if n <= 0:
+                return pos
+            count = 0
+            for kind, start, end in spans:
+                if kind == "text":
+                    if count + end - start >= n:
+                        return start + n - count
+                    count += end - start
+                pos = end
+            return pos
+
+        @staticmethod
+        def _cut_spans_end(spans: list, n: int, default: int) -> int:
+            """Return the position right before the last `n` visible
+            characters of `spans`, or `default` when `n` is not positive."""
+            pos = default
+            if n <= 0:
+                return pos
+            count = 0
+            for kind, start, end in reversed(spans):
+                if kind == "text":
+                    if count + end - start >= n:
+                        return end - (n - count)
+                    count += end - start
+                pos = start
+            return pos
+
         @staticmethod
         def _truncate_from_start(text: str, text_length: int) -> tuple:
             """Take up to `text_length` non-table characters from the start of `text`.
@@ -760,42 +1079,36 @@ class INLABSHook(BaseHook):
             Returns:
                 tuple[str, bool]: (truncated_text, was_truncated)
             """
-            special_re = re.compile(
-                r"<table[\s\S]*?</table>|<%%>[\s\S]*?</%%>", re.IGNORECASE
-            )
-            _vlen = INLABSHook.TextDictHandler._visible_len
-            _cut = INLABSHook.TextDictHandler._cut_visible_start
-            result = []
-            char_count = 0
-            last_end = 0
+            handler = INLABSHook.TextDictHandler
 
-            def _cut_at_word_boundary(segment, cut_text):
-                cut_pos = len(cut_text)
-                if cut_pos < len(segment) and segment[cut_pos].isalnum():
+            def _cut(run, at, remaining):
+                run_start, run_end, spans = (
+                    (run[1], run[2], run[4]) if run else (at, at, [])
+                )
+                cut_pos = handler._cut_spans_start(spans, remaining, run_start)
+                cut_text = text[run_start:cut_pos]
+                if cut_pos < run_end and text[cut_pos].isalnum():
                     cut_text = re.sub(r"\S+$", "", cut_text)
-                return cut_text.rstrip()
+                return text[:run_start] + cut_text.rstrip()
 
-            for m in special_re.finditer(text):
-                non_special = text[last_end : m.start()]
+            char_count = 0
+            run = None
+            for segment in handler._excerpt_segments(text):
+                if segment[0] == "run":
+                    run = segment
+                    continue
                 remaining = text_length - char_count
-                if _vlen(non_special) >= remaining:
-                    result.append(
-                        _cut_at_word_boundary(non_special, _cut(non_special, remaining))
-                    )
-                    return "".join(result), True
-                result.append(non_special)
-                char_count += _vlen(non_special)
-                result.append(m.group(0))
-                last_end = m.end()
+                run_visible = run[3] if run else 0
+                if run_visible >= remaining:
+                    return _cut(run, segment[1], remaining), True
+                char_count += run_visible
+                run = None
 
-            tail = text[last_end:]
             remaining = text_length - char_count
-            if _vlen(tail) > remaining:
-                result.append(_cut_at_word_boundary(tail, _cut(tail, remaining)))
-                return "".join(result), True
+            if run and run[3] > remaining:
+                return _cut(run, run[1], remaining), True
 
-            result.append(tail)
-            return "".join(result), False
+            return text, False
 
         @staticmethod
         def _truncate_from_end(text: str, text_length: int) -> tuple:
@@ -815,43 +1128,23 @@ class INLABSHook(BaseHook):
             Returns:
                 tuple[str, bool]: (truncated_text, was_truncated)
             """
-            table_re = re.compile(r"<table[\s\S]*?</table>", re.IGNORECASE)
-            marker_re = re.compile(r"<%%>[\s\S]*?</%%>")
-            _vlen = INLABSHook.TextDictHandler._visible_len
-            _cut = INLABSHook.TextDictHandler._cut_visible_end
-
-            # Split into (content, seg_type) segments where seg_type is
-            # 'text', 'marker', or 'table'.
-            boundaries = []
-            for m in table_re.finditer(text):
-                boundaries.append((m.start(), m.end(), "table", m.group(0)))
-            for m in marker_re.finditer(text):
-                boundaries.append((m.start(), m.end(), "marker", m.group(0)))
-            boundaries.sort()
-
-            segments = []
-            last_end = 0
-            for start, end, seg_type, content in boundaries:
-                if start > last_end:
-                    segments.append((text[last_end:start], "text"))
-                segments.append((content, seg_type))
-                last_end = end
-            if last_end < len(text):
-                segments.append((text[last_end:], "text"))
+            handler = INLABSHook.TextDictHandler
 
             # Walk segments from the end, accumulating non-table chars
             kept = []
             char_count = 0
             was_truncated = False
 
-            for content, seg_type in reversed(segments):
-                if seg_type == "table":
-                    kept.append(content)
+            for kind, start, end, visible, spans in reversed(
+                handler._excerpt_segments(text)
+            ):
+                if kind == "table":
+                    kept.append(text[start:end])
                     continue
-                if seg_type == "marker":
+                if kind == "marker":
                     if char_count < text_length:
-                        kept.append(content)
-                        char_count += _vlen(content)
+                        kept.append(text[start:end])
+                        char_count += visible
                     else:
                         was_truncated = True
                     continue
@@ -859,13 +1152,14 @@ class INLABSHook(BaseHook):
                 if remaining <= 0:
                     was_truncated = True
                     continue
-                if _vlen(content) > remaining:
-                    kept.append(_cut(content, remaining))
+                if visible > remaining:
+                    cut_pos = handler._cut_spans_end(spans, remaining, end)
+                    kept.append(text[cut_pos:end])
                     char_count += remaining
                     was_truncated = True
                 else:
-                    kept.append(content)
-                    char_count += _vlen(content)
+                    kept.append(text[start:end])
+                    char_count += visible
 
             kept.reverse()
             return "".join(kept), was_truncated
@@ -1005,11 +1299,10 @@ class INLABSHook(BaseHook):
                     selected columns.
             """
 
-            return (
-                df.groupby(group_column)
-                .apply(lambda x: x[cols].apply(lambda y: y.to_dict(), axis=1).tolist())
-                .to_dict()
-            )
+            return {
+                key: group[cols].to_dict("records")
+                for key, group in df.groupby(group_column)
+            }
 
         @staticmethod
         def _replace_inline_tables(text: str, min_table_rows: int = 1) -> str:
@@ -1022,6 +1315,12 @@ class INLABSHook(BaseHook):
             pair). Applies regardless of ``full_text``.
             """
             soup = BeautifulSoup(text, "html.parser")
+            INLABSHook.TextDictHandler._replace_soup_tables(soup, min_table_rows)
+            return str(soup)
+
+        @staticmethod
+        def _replace_soup_tables(soup: BeautifulSoup, min_table_rows: int = 1):
+            """In-place step of ``_replace_inline_tables``."""
             for table in soup.find_all("table"):
                 rows = table.find_all("tr")
                 if len(rows) >= min_table_rows:
@@ -1032,7 +1331,6 @@ class INLABSHook(BaseHook):
                         "html.parser",
                     )
                     table.replace_with(placeholder)
-            return str(soup)
 
         @staticmethod
         def _remove_empty_tr(text: str) -> str:
@@ -1044,14 +1342,17 @@ class INLABSHook(BaseHook):
             ``_replace_inline_tables``.
             """
             soup = BeautifulSoup(text, "html.parser")
+            INLABSHook.TextDictHandler._remove_soup_empty_tr(soup)
+            return str(soup)
 
+        @staticmethod
+        def _remove_soup_empty_tr(soup: BeautifulSoup):
+            """In-place step of ``_remove_empty_tr``."""
             for tr in soup.find_all("tr"):
                 cells = tr.find_all(["td", "th"])
                 if all(not cell.get_text(strip=True) for cell in cells):
                     tr.decompose()
 
-            return str(soup)
-
         def _remove_duplicated_title(self, abstract: str | None) -> str:
             """Remove HTML elements with class 'identifica' from the abstract.
 
@@ -1078,3 +1379,55 @@ class INLABSHook(BaseHook):
                 tag.decompose()
 
             return str(soup)
+
+        def _clean_texto(
+            self,
+            text: str | None,
+            ignore_inline_tables: bool = False,
+            min_table_rows: int = 1,
+        ) -> str:
+            """Apply ``_remove_duplicated_title``, ``_remove_empty_tr`` and,
+            if `ignore_inline_tables`, ``_replace_inline_tables`` to `text`
+            parsing its HTML only once."""
+
+            if not text:
+                return text or ""
+
+            soup = BeautifulSoup(text, "html.parser")
+            for tag in soup.find_all("p", class_="identifica"):
+                tag.decompose()
+            self._remove_soup_empty_tr(soup)
+            if ignore_inline_tables:
+                self._replace_soup_tables(soup, min_table_rows)
+
+            return str(soup)
+
+        def _process_matches(
+            self,
+            matches: str,
+            signature: str | None,
+            text: str,
+            title: str,
+            opensearch_highlights=None,
+        ) -> tuple:
+            """Highlight the matches of one record.
+
+            Returns:
+                tuple: Highlighted ``texto`` and ``identifica``, whether the
+                    matches are in the signature and how many times the
+                    signature appears in the highlighted ``texto``.
+            """
+            terms = [t for t in matches.split(", ") if t]
+            matches_signature = self._normalize(matches) in self._normalize(signature)
+            text = self._highlight_search_text(
+                terms,
+                text,
+                (
+                    opensearch_highlights
+                    if self._has_opensearch_highlight(opensearch_highlights)
+                    else []
+                ),
+            )
+            title = self._highlight_terms(terms, title)
+            signature_count = text.count(signature) if signature is not None else 0
+            return text, title, matches_signature, signature_count
@@ -9,14 +9,71 @@ import logging
 import re
 from datetime import date
 
-import pandas as pd
 from airflow.providers.postgres.hooks.postgres import PostgresHook  # type: ignore
 
+from ro_dou_src.utils.term_matcher import normalize  # type: ignore
 from .inlabs_hook import INLABSHook
 
 
+# Columns mapped by ``TextDictHandler.transform_search_results``.
+SELECT_COLUMNS = [
+    "id",
+    "name",
+    "pubname",
+    "arttype",
+    "pubdate",
+    "artcategory",
+    "pdfpage",
+    "identifica",
+    "ementa",
+    "texto",
+    "assina",
+]
+
+
+class _Parameters(dict):
+    """Named parameters of a query, bound as they are added."""
+
+    def bind(self, value) -> str:
+        """Store `value` and return its placeholder."""
+        name = f"p{len(self)}"
+        self[name] = value
+        return f"%({name})s"
+
+
+def _like_escape(text: str) -> str:
+    return re.sub(r"([\\%_])", r"\\\1", text)
+
+
+def _texto_condition(term: str, params: _Parameters, positive: bool = True) -> str:
+    """Condition matching `term` as whole words of ``texto``.
+
+    Positive terms are looked up in the trigram index of ``texto_norm``
+    by a ``LIKE`` of their words in order, and the regular expression,
+    also served by the index, checks that they are whole words in
+    sequence. ``texto_norm`` is accent-folded and lowercased, as the term
+    is here. A full-text index is not used, as its parser keeps paths,
+    URLs, e-mails and process numbers as single tokens, where words such
+    as ``seges`` in ``seges/me`` would not be found.
+    """
+    words = normalize(term).split()
+    pattern = params.bind(
+        r"\y" + r"\s+".join(re.escape(word) for word in words) + r"\y"
+    )
+    if not positive:
+        return f"texto_norm !~ {pattern}"
+    if not re.search(r"\w", " ".join(words)):
+        return f"texto_norm ~ {pattern}"
+    like = params.bind("%" + "%".join(_like_escape(word) for word in words) + "%")
+    return f"(texto_norm LIKE {like} AND texto_norm ~ {pattern})"
+
+
 class INLABSSQLModeHook(INLABSHook):
-    """Execute INLABS searches directly against PostgreSQL."""
+    """Execute INLABS searches directly against PostgreSQL.
+
+    ``texto`` terms are searched in the trigram index created by the
+    ``ro-dou_inlabs_load_pg`` DAG.
+    """
 
     def search_text(
         self,
@@ -34,25 +91,17 @@ class INLABSSQLModeHook(INLABSHook):
         conn_id: str = INLABSHook.CONN_ID,
         client = None,
     ) -> dict:
-        """Search INLABS using the legacy SQL query path."""
+        """Search INLABS using the legacy SQL query path.
+
+        The main and the extra editions are searched by a single query.
+        """
         hook = PostgresHook(conn_id)
 
         logging.info("Search term in INLABS SQL mode.")
         logging.info("Search terms -> %s", search_terms)
 
-        main_search_queries = self._generate_sql(search_terms)
-        hook.run(main_search_queries["create_extension"], autocommit=True)
-        main_search_results = hook.get_pandas_df(main_search_queries["select"])
-
-        extra_search_terms = self._adapt_search_terms_to_extra(
-            copy.deepcopy(search_terms)
-        )
-        extra_search_queries = self._generate_sql(extra_search_terms)
-        extra_search_results = hook.get_pandas_df(extra_search_queries["select"])
-
-        all_results = pd.concat(
-            [main_search_results, extra_search_results], ignore_index=True
-        )
+        query = self._generate_sql(search_terms)
+        all_results = hook.get_pandas_df(query["select"], parameters=query["parameters"])
 
         filtered_text_terms = self._filter_text_terms(search_terms["texto"])
         return (
@@ -75,8 +124,32 @@ class INLABSSQLModeHook(INLABSHook):
         )
 
     @staticmethod
-    def _generate_sql(payload: dict) -> dict:
-        """Generate legacy SQL queries for INLABS search terms."""
+    def _regex_conditions(key: str, values: list, params: _Parameters) -> str:
+        """Condition matching any of `values` as whole words of `key`."""
+        patterns = [params.bind(r"\y" + value + r"\y") for value in values]
+        return (
+            "("
+            + " OR ".join(
+                [
+                    f"dou_inlabs.unaccent({key}) ~* dou_inlabs.unaccent({pattern})"
+                    for pattern in patterns
+                ]
+            )
+            + ")"
+        )
+
+    @classmethod
+    def _generate_sql(cls, payload: dict) -> dict:
+        """Generate the parameterized query of INLABS search terms.
+
+        The query matches the articles of the ``pubdate`` and ``pubname``
+        of `payload` and, when ``pubname`` is given, of their extra
+        edition (see ``_adapt_search_terms_to_extra``). Every term is
+        bound as a parameter.
+
+        Returns:
+            dict: The query in ``select`` and its ``parameters``.
+        """
         allowed_keys = [
             "name",
             "pubname",
@@ -91,19 +164,42 @@ class INLABSSQLModeHook(INLABSHook):
         ]
         filtered_dict = {k: payload[k] for k in payload if k in allowed_keys}
 
-        pub_date = payload.get("pubdate", [date.today().strftime("%Y-%m-%d")])
-        pub_date_from = pub_date[0]
-        pub_date_to = pub_date[1] if len(pub_date) > 1 else pub_date_from
+        params = _Parameters()
+
+        editions = [
+            {
+                **payload,
+                "pubdate": payload.get("pubdate", [date.today().strftime("%Y-%m-%d")]),
+            }
+        ]
+        if "pubname" in payload:
+            editions.append(cls._adapt_search_terms_to_extra(copy.deepcopy(editions[0])))
+
+        edition_conditions = []
+        for edition in editions:
+            pub_date_from = edition["pubdate"][0]
+            pub_date_to = edition["pubdate"][-1]
+            condition = (
+                f"pubdate BETWEEN {params.bind(pub_date_from)}::date "
+                f"AND {params.bind(pub_date_to)}::date"
+            )
+            if "pubname" in edition:
+                condition += " AND " + cls._regex_conditions(
+                    "pubname", edition["pubname"], params
+                )
+            edition_conditions.append(f"({condition})")
 
         query = (
-            "SELECT * FROM dou_inlabs.article_raw "
-            f"WHERE (pubdate BETWEEN '{pub_date_from}' AND '{pub_date_to}')"
+            f"SELECT {', '.join(SELECT_COLUMNS)} FROM dou_inlabs.article_raw "
+            f"WHERE ({' OR '.join(edition_conditions)})"
         )
 
         term_operators = ["&", "!", "|", "(", ")"]
 
         conditions = []
         for key, values in filtered_dict.items():
+            if key == "pubname":
+                continue
             if key == "texto":
                 if any(values):
                     key_conditions = []
@@ -130,17 +226,14 @@ class INLABSSQLModeHook(INLABSHook):
                                         operator = sub_term
                                     sub_conditions.append(operator)
                                 else:
-                                    operator = "~*" if like_positive else "!~*"
                                     sub_conditions.append(
-                                        rf"dou_inlabs.unaccent({key}) {operator} dou_inlabs.unaccent('\y{sub_term}\y')",
+                                        _texto_condition(sub_term, params, like_positive)
                                     )
 
                             key_conditions.append("(" + "".join(sub_conditions) + ")")
 
                         else:
-                            key_conditions.append(
-                                rf"dou_inlabs.unaccent({key}) ~* dou_inlabs.unaccent('\y{term}\y')"
-                            )
+                            key_conditions.append(_texto_condition(term, params))
 
                     conditions.append("(" + " OR ".join(key_conditions) + ")")
 
@@ -149,7 +242,8 @@ class INLABSSQLModeHook(INLABSHook):
                     "("
                     + " AND ".join(
                         [
-                            rf"dou_inlabs.unaccent(artcategory) !~* dou_inlabs.unaccent('^{value}')"
+                            "dou_inlabs.unaccent(artcategory) !~* "
+                            f"dou_inlabs.unaccent({params.bind('^' + value)})"
                             for value in values
                         ]
                     )
@@ -160,31 +254,24 @@ class INLABSSQLModeHook(INLABSHook):
                     "("
                     + " AND ".join(
                         [
-                            rf"dou_inlabs.unaccent(texto) !~* dou_inlabs.unaccent('\y{value}\y')"
+                            _texto_condition(value, params, positive=False)
                             for value in values
                         ]
                     )
                     + ")"
                 )
             else:
-                conditions.append(
-                    "("
-                    + " OR ".join(
-                        [
-                            rf"dou_inlabs.unaccent({key}) ~* dou_inlabs.unaccent('\y{value}\y')"
-                            for value in values
-                        ]
-                    )
-                    + ")"
-                )
+                conditions.append(cls._regex_conditions(key, values, params))
 
         if conditions:
             query = f"{query} AND {' AND '.join(conditions)}"
+        query = f"{query} ORDER BY pubdate DESC"
 
         logging.info("Generated SQL Query:")
         logging.info(query)
+        logging.info("Parameters: %s", dict(params))
 
         return {
-            "create_extension": "CREATE EXTENSION IF NOT EXISTS unaccent SCHEMA dou_inlabs",
             "select": query,
+            "parameters": dict(params),
         }
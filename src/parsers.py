@@ -1,18 +1,37 @@
 """Abstract and concrete classes to parse DAG configuration from a file."""
 
+import hashlib
+import json
+import logging
 import textwrap
 import os
 import sys
 
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
+import pydantic
 import yaml
 
 from airflow.sdk import Variable
 
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+import schemas
+from ai import config as ai_config, provider as ai_provider
 from schemas import RoDouConfig, DAGConfig
 
 
+def list_yaml_files(directories: List[str]) -> List[str]:
+    """Return the path of every YAML file found under `directories`."""
+    files_list = []
+
+    for directory in directories:
+        for dirpath, _, filenames in os.walk(directory):
+            for filename in filenames:
+                if any(ext in filename for ext in [".yaml", ".yml"]):
+                    files_list.extend([os.path.join(dirpath, filename)])
+
+    return files_list
+
+
 class YAMLParser:
     """Parses YAML file and get the DAG parameters.
 
@@ -70,3 +89,119 @@ class YAMLParser:
             file_name = self.filepath.split("/")[-1]
             error_msg = f"Erro no arquivo {file_name}: {error_msg}"
             raise ValueError(error_msg)
+
+
+class DAGConfigCache:
+    """Keeps the validated ``DAGConfig`` of each YAML file in a local
+    JSON file, so unchanged files skip YAML loading on the next parse of
+    the DAG files.
+
+    Entries are keyed by file path and checked against the file mtime
+    and size. When only the mtime changed the content hash is compared
+    before parsing the file again. Cached configs are stored with
+    ``model_dump`` and validated again with ``model_validate`` when read,
+    so a tampered cache file cannot run code. The whole cache is
+    discarded when the ``schemas``, ``ai.config`` or ``ai.provider``
+    modules or the pydantic version change.
+
+    Example usage::
+
+        cache = DAGConfigCache()
+        dag_specs = cache.parse("dag_confs/example.yaml")
+        cache.save()
+    """
+
+    DEFAULT_PATH = os.path.join(
+        os.getenv("AIRFLOW_HOME", os.path.expanduser("~/airflow")),
+        "ro_dou_dag_configs.json",
+    )
+
+    def __init__(self, parser=YAMLParser, path: Optional[str] = None):
+        """Args:
+        parser (type): Parser of the files not found in the cache.
+            Defaults to ``YAMLParser``.
+        path (str, optional): Path of the cache file. Defaults to the
+            ``RO_DOU__PARSE_CACHE_PATH`` environment variable or
+            ``DEFAULT_PATH``, in ``AIRFLOW_HOME``.
+        """
+        self.parser = parser
+        self.path = path or os.getenv("RO_DOU__PARSE_CACHE_PATH", self.DEFAULT_PATH)
+        self._version = self._schema_version()
+        self._entries = self._load()
+        self._used: Dict[str, list] = {}
+        self._changed = False
+
+    @staticmethod
+    def _schema_version() -> str:
+        version = hashlib.sha1(pydantic.VERSION.encode("utf-8"))
+        for module in (schemas, ai_config, ai_provider):
+            with open(module.__file__, "rb") as file:
+                version.update(file.read())
+        return version.hexdigest()
+
+    def _load(self) -> Dict[str, list]:
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                cache = json.load(file)
+        except FileNotFoundError:
+            return {}
+        except Exception as error:  # pylint: disable=broad-except
+            logging.warning(f"Cache de configurações ignorado: {error}")
+            return {}
+        if not isinstance(cache, dict) or cache.get("version") != self._version:
+            return {}
+        return cache.get("entries", {})
+
+    def _cached(self, filepath: str, entry: list) -> Optional[DAGConfig]:
+        try:
+            return DAGConfig.model_validate(entry[3])
+        except Exception as error:  # pylint: disable=broad-except
+            logging.warning(f"Cache de {filepath} ignorado: {error}")
+            return None
+
+    def parse(self, filepath: str) -> DAGConfig:
+        """Return the ``DAGConfig`` of `filepath`, parsing the file only
+        if it changed since it was cached."""
+        stat = os.stat(filepath)
+        entry = self._entries.get(filepath)
+        if entry and entry[:2] == [stat.st_mtime_ns, stat.st_size]:
+            dag_specs = self._cached(filepath, entry)
+            if dag_specs is not None:
+                self._used[filepath] = entry
+                return dag_specs
+
+        with open(filepath, "rb") as file:
+            content_hash = hashlib.sha1(file.read()).hexdigest()
+        dag_specs = (
+            self._cached(filepath, entry)
+            if entry and entry[2] == content_hash
+            else None
+        )
+        if dag_specs is None:
+            dag_specs = self.parser(filepath).parse()
+
+        self._used[filepath] = [
+            stat.st_mtime_ns,
+            stat.st_size,
+            content_hash,
+            dag_specs.model_dump(mode="json"),
+        ]
+        self._changed = True
+        return dag_specs
+
+    def save(self):
+        """Write the entries of the files parsed since the cache was
+        loaded, dropping the removed files. Does nothing if no entry
+        changed."""
+        if not self._changed and self._used.keys() == self._entries.keys():
+            return
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump({"version": self._version, "entries": self._used}, file)
+            os.replace(tmp_path, self.path)
+        except (OSError, TypeError, ValueError) as error:
+            logging.warning(f"Não foi possível gravar o cache de configurações: {error}")
+            return
+        self._entries = dict(self._used)
+        self._changed = False
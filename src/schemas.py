@@ -377,6 +377,10 @@ class DAGConfig(BaseModel):
         "`subject`, `skip_null`"
     )
 
+    def search_key(self, counter: int) -> str:
+        """Return the key that identifies the `counter`-th search of the DAG."""
+        return f"{self.id}.{counter}"
+
     @field_validator("search")
     @staticmethod
     def cast_to_list(
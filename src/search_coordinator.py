@@ -0,0 +1,299 @@
+"""Run the INLABS searches shared by many DAGs only once per day."""
+
+import copy
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+from datetime import date
+from typing import Dict, List, Optional
+
+from airflow.sdk import Variable
+
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from ro_dou_src.utils.open_search.config import get_flag  # type: ignore
+from ro_dou_src.utils.open_search.query_builder import OpenSearchQueryBuilder  # type: ignore
+
+
+class SearchCoordinator:
+    """Groups the INLABS searches of all DAGs by their non-text filters
+    (sections, departments, publication types, ignored terms and dates),
+    runs one union query per group and stores the hits in a file shared
+    by the digest DAGs.
+
+    Every expression of the union query is named, so each stored record
+    keeps the expressions it matched. A DAG triggered by
+    ``OUTPUT_DATASET`` then loads its own slice with ``load_slice``
+    instead of querying OpenSearch again.
+
+    Only searches with a literal ``terms`` list are coordinated. Searches
+    without terms, or with terms fetched from a database or an Airflow
+    variable, keep using the regular query path.
+
+    Attributes:
+        DAG_ID (str): Id of the DAG which runs the shared searches.
+        OUTPUT_DATASET (str): Dataset updated once the shared searches
+            are stored.
+        DIR_NAME (str): Directory, inside ``path_tmp``, of the stored
+            results.
+        RETENTION_DAYS (int): Age, in days, after which stored results
+            are removed.
+    """
+
+    DAG_ID = "ro-dou_inlabs_search_coordinator"
+    OUTPUT_DATASET = "inlabs_searches"
+    DIR_NAME = "search_coordinator"
+    RETENTION_DAYS = 7
+
+    def __init__(self, base_path: Optional[str] = None):
+        """Args:
+        base_path (str, optional): Directory of the stored results.
+            Defaults to ``DIR_NAME`` inside the ``path_tmp`` variable.
+        """
+        self.base_path = base_path or os.path.join(
+            Variable.get("path_tmp"), self.DIR_NAME
+        )
+
+    @staticmethod
+    def enabled() -> bool:
+        """Return True if the coordinator is enabled in the config.
+
+        The flag changes the DAGs structure and is checked while parsing
+        the DAG files, so it is only read from the environment.
+        """
+        return get_flag("RO_DOU_INLABS_USE_SEARCH_COORDINATOR", use_variable=False)
+
+    @classmethod
+    def triggered_run(cls, context: dict) -> bool:
+        """Return True if the DAG run was triggered by ``OUTPUT_DATASET``."""
+        events = context.get("triggering_asset_events") or {}
+        return any(
+            getattr(asset, "uri", asset) == cls.OUTPUT_DATASET for asset in events
+        )
+
+    @staticmethod
+    def group_key(search_terms: dict) -> str:
+        """Return the key of the group of searches sharing the filters of
+        `search_terms`. The ``texto`` key is ignored and list filters are
+        compared regardless of their order."""
+        filters = {
+            key: value if key == "pubdate" else sorted(value)
+            for key, value in search_terms.items()
+            if key != "texto"
+        }
+        return hashlib.sha1(
+            json.dumps(filters, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+    @staticmethod
+    def _expressions(terms: List[str]) -> List[str]:
+        return [term for term in terms if term and term.strip()]
+
+    def collect(self, dag_configs, reference_date: date) -> Dict[str, dict]:
+        """Group the coordinated searches of `dag_configs`.
+
+        A DAG whose filters fail to be applied is logged and left out, so
+        it runs its own searches.
+
+        Args:
+            dag_configs (Iterable[DAGConfig]): Parsed DAG configurations.
+            reference_date (date): Reference date of the searches.
+
+        Returns:
+            Dict[str, dict]: Group key -> ``{"search_terms": dict,
+                "expressions": set}``.
+        """
+        from searchers import INLABSSearcher
+
+        searcher = INLABSSearcher()
+        groups: Dict[str, dict] = {}
+        for specs in dag_configs:
+            try:
+                searches = [
+                    (
+                        searcher._apply_filters(
+                            {"texto": []},
+                            search.dou_sections,
+                            search.department,
+                            search.department_ignore,
+                            search.terms_ignore,
+                            search.pubtype,
+                            reference_date,
+                            search.date,
+                        ),
+                        self._expressions(search.terms),
+                    )
+                    for search in specs.search
+                    if "DOU" not in search.sources
+                    and "INLABS" in search.sources
+                    and isinstance(search.terms, list)
+                    and self._expressions(search.terms)
+                ]
+                searches = [
+                    (self.group_key(search_terms), search_terms, expressions)
+                    for search_terms, expressions in searches
+                ]
+            except Exception:
+                logging.exception(
+                    f"Buscas da DAG {getattr(specs, 'id', specs)} não compartilhadas."
+                )
+                continue
+            for key, search_terms, expressions in searches:
+                group = groups.setdefault(
+                    key,
+                    {"search_terms": search_terms, "expressions": set()},
+                )
+                group["expressions"].update(expressions)
+        return groups
+
+    def run(self, dag_configs, reference_date: date, client=None) -> int:
+        """Run one union query per group of searches and store the hits.
+
+        A group whose query fails is logged and not stored, so its DAGs
+        run their own searches when ``load_slice`` finds no file.
+
+        Args:
+            dag_configs (Iterable[DAGConfig]): Parsed DAG configurations.
+            reference_date (date): Reference date of the searches.
+            client (OpenSearch, optional): OpenSearch client instance.
+
+        Returns:
+            int: Number of groups searched.
+        """
+        from hooks.inlabs_hook import INLABSHook
+        from ro_dou_src.utils.open_search.client_open_search import OpenSearchClient  # type: ignore
+
+        groups = self.collect(dag_configs, reference_date)
+        os.makedirs(self.base_path, exist_ok=True)
+        self._remove_expired_files()
+        client = client or OpenSearchClient().get_client()
+
+        for key, group in groups.items():
+            expressions = sorted(group["expressions"])
+            try:
+                records = self._search_group(
+                    client, group["search_terms"], expressions
+                )
+            except Exception:
+                self._remove(key)
+                logging.exception(f"Grupo {key}: falha na busca compartilhada.")
+                continue
+            if records is None:
+                # Not stored, so each DAG of the group runs its own search.
+                self._remove(key)
+                logging.warning(
+                    f"Grupo {key}: mais de {INLABSHook.MAX_HITS} resultados. "
+                    "Resultados não compartilhados."
+                )
+                continue
+            self._write(key, {"expressions": expressions, "records": records})
+            logging.info(
+                f"Grupo {key}: {len(expressions)} expressões, "
+                f"{len(records)} resultados."
+            )
+
+        logging.info(f"Buscas compartilhadas executadas: {len(groups)}")
+        return len(groups)
+
+    @staticmethod
+    def _search_group(
+        client, search_terms: dict, expressions: List[str]
+    ) -> Optional[List[dict]]:
+        """Run the union query of `expressions` with the filters of
+        `search_terms` and return its records, or None if it has more
+        than ``INLABSHook.MAX_HITS`` hits."""
+        from hooks.inlabs_hook import INLABSHook
+
+        search_terms = {**search_terms, "texto": expressions, "name_expressions": True}
+        extra_search_terms = INLABSHook._adapt_search_terms_to_extra(
+            copy.deepcopy(search_terms)
+        )
+        hits = INLABSHook._search_hits(client, search_terms, extra_search_terms)
+        records = []
+        for hit in hits:
+            if len(records) == INLABSHook.MAX_HITS:
+                hits.close()
+                return None
+            record = INLABSHook._map_opensearch_hit(hit)
+            record["matched_expressions"] = [
+                name[len(OpenSearchQueryBuilder.EXPRESSION_NAME_PREFIX) :]
+                for name in hit.get("matched_queries", [])
+                if name.startswith(OpenSearchQueryBuilder.EXPRESSION_NAME_PREFIX)
+            ]
+            records.append(record)
+        return records
+
+    def load_slice(self, search_terms: dict) -> Optional[List[dict]]:
+        """Return the stored records matching the expressions of
+        `search_terms`.
+
+        Args:
+            search_terms (dict): Search payload built by ``INLABSSearcher``.
+
+        Returns:
+            List[dict] | None: Records in the format of
+                ``INLABSHook._map_opensearch_hit``, or None when the
+                search was not coordinated and must query OpenSearch.
+        """
+        path = self._path(self.group_key(search_terms))
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as file:
+            shared = json.load(file)
+
+        expressions = set(self._expressions(search_terms.get("texto", [])))
+        if not expressions or not expressions <= set(shared["expressions"]):
+            return None
+
+        searched_expression = ", ".join(search_terms["texto"])
+        records = []
+        for record in shared["records"]:
+            record_expressions = set(record.pop("matched_expressions"))
+            matched = expressions & record_expressions
+            if not matched:
+                continue
+            if not record_expressions <= expressions:
+                # Highlights may point at expressions of other DAGs.
+                record["opensearch_highlights"] = []
+            allowed_terms = {
+                term
+                for expression in matched
+                for term in OpenSearchQueryBuilder.texto_terms(expression)
+            }
+            matched_terms = [
+                term for term in record["matched_terms"] if term in allowed_terms
+            ]
+            record.update(
+                {
+                    "searched_expression": searched_expression,
+                    "matched_terms": matched_terms,
+                    "matched_terms_text": ", ".join(matched_terms),
+                    "matches": ", ".join(matched_terms),
+                }
+            )
+            records.append(record)
+        return records
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.base_path, f"{key}.json")
+
+    def _write(self, key: str, content: dict):
+        """Write `content` atomically, so DAGs never read a partial file."""
+        tmp_path = f"{self._path(key)}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(content, file, ensure_ascii=False)
+        os.replace(tmp_path, self._path(key))
+
+    def _remove(self, key: str):
+        if os.path.exists(self._path(key)):
+            os.remove(self._path(key))
+
+    def _remove_expired_files(self):
+        expiration = time.time() - self.RETENTION_DAYS * 24 * 60 * 60
+        for name in os.listdir(self.base_path):
+            path = os.path.join(self.base_path, name)
+            if os.path.getmtime(path) < expiration:
+                os.remove(path)
@@ -8,6 +8,7 @@ import time
 import sys
 import os
 from abc import ABC
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from io import StringIO
 from random import random
@@ -24,6 +25,9 @@ sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 from hooks.dou_hook import DOUHook
 from hooks.inlabs_hook import INLABSHook
 from hooks.doesp_hook import DOESPHook
+from search_coordinator import SearchCoordinator
+from utils import deadline
+from utils.http_cache import HTTPCache
 from utils.search_domains import (
     Field,
     SearchDate,
@@ -157,7 +161,20 @@ class BaseSearcher(ABC):
 
 
 class DOUSearcher(BaseSearcher):
+    """Searches the terms in the DOU website.
+
+    Up to ``MAX_WORKERS`` terms are searched at the same time. The
+    requests of all of them are paced by the rate limiter of ``DOUHook``.
+
+    With ``BATCH_SIZE`` greater than 1, exact searches send up to
+    ``BATCH_SIZE`` terms in a single ``OR`` query and assign each result
+    back to the terms found in it. A publication is then only reported
+    under the terms visible in its title or abstract.
+    """
+
     SPLIT_MATCH_RE = re.compile(r"(.*?)<.*?>(.*?)<.*?>")
+    MAX_WORKERS = int(os.getenv("RO_DOU__DOU_MAX_WORKERS", 4))
+    BATCH_SIZE = int(os.getenv("RO_DOU__DOU_BATCH_SIZE", 1))
     dou_hook = DOUHook()
 
     def exec_search(
@@ -215,57 +232,177 @@ class DOUSearcher(BaseSearcher):
             logging.info("No specific terms provided, searching all")
             term_list = ["*"]
 
-        for search_term in term_list:
-            logging.info("Starting search for term: %s", search_term)
+        # To perform a search without specifying terms, use the broad search function
+        search_terms = ["" if term == "*" else term for term in term_list]
+        batches = self._batch_terms(search_terms, is_exact_search)
 
-            # To perform a search without specifying terms, use the broad search function
-            search_term = "" if search_term == "*" else search_term
+        def search_batch(batch: List[str]) -> List[list]:
+            return [
+                self._filter_results(
+                    search_term,
+                    results,
+                    ignore_signature_match,
+                    force_rematch,
+                    department,
+                    department_ignore,
+                    terms_ignore,
+                    pubtype,
+                )
+                for search_term, results in zip(
+                    batch,
+                    self._search_batch(
+                        batch,
+                        dou_sections,
+                        search_date,
+                        reference_date,
+                        field,
+                        is_exact_search,
+                    ),
+                )
+            ]
 
-            results = self._search_text_with_retry(
-                search_term=search_term,
-                sections=[Section[s] for s in dou_sections],
-                reference_date=reference_date,
-                search_date=SearchDate[search_date],
-                field=Field[field],
-                is_exact_search=is_exact_search,
+        term_results = {}
+        executor = ThreadPoolExecutor(max_workers=max(1, self.MAX_WORKERS))
+        try:
+            for batch, batch_results in zip(
+                batches, executor.map(deadline.propagate(search_batch), batches)
+            ):
+                term_results.update(zip(batch, batch_results))
+        finally:
+            executor.shutdown(cancel_futures=True)
+            logging.info("DOU requests: %s", self.dou_hook.latency_stats())
+            logging.info("DOU cache: %s", self.dou_hook.cache.stats())
+
+        # Keep the results in the order of the terms
+        for search_term in search_terms:
+            results = term_results[search_term]
+            if results:
+                # To execute a search without terms, use the key "all_publications"
+                result_key = "all_publications" if search_term == "" else search_term
+                search_results[result_key] = results
+
+        return search_results
+
+    def _batch_terms(self, search_terms: List[str], is_exact_search: bool) -> List[list]:
+        """Split `search_terms` in the batches searched with a single
+        query, of up to ``BATCH_SIZE`` terms.
+
+        Only exact searches are batched. The broad search ("") and terms
+        with double quotes are always searched alone.
+        """
+        if self.BATCH_SIZE <= 1 or not is_exact_search:
+            return [[term] for term in search_terms]
+
+        batchable = [term for term in search_terms if term and '"' not in term]
+        alone = [[term] for term in search_terms if not term or '"' in term]
+        return [
+            batchable[i : i + self.BATCH_SIZE]
+            for i in range(0, len(batchable), self.BATCH_SIZE)
+        ] + alone
+
+    def _search_batch(
+        self,
+        batch: List[str],
+        dou_sections,
+        search_date,
+        reference_date,
+        field,
+        is_exact_search,
+    ) -> List[list]:
+        """Search the terms of `batch` with a single ``OR`` query and
+        return the results of each term.
+
+        Each result is assigned to the terms found in its title or
+        abstract. If any result matches none of them, the terms are
+        searched one by one instead, so no result is lost.
+        """
+        search_args = (dou_sections, search_date, reference_date, field, is_exact_search)
+        if len(batch) == 1:
+            return [self._fetch_results(batch[0], *search_args)]
+
+        hits = self._fetch_results(batch, *search_args)
+        hit_terms = [
+            [term for term in batch if self._hit_matches(term, hit)] for hit in hits
+        ]
+        if not all(hit_terms):
+            logging.info(
+                "Results not assigned to a term of %s. Searching them one by one.",
+                batch,
             )
+            return [self._fetch_results(term, *search_args) for term in batch]
 
-            # In cases where no terms are specified, skip the matching checks
-            if search_term != "":
-                if ignore_signature_match:
-                    results = [
-                        r
-                        for r in results
-                        if not self._is_signature(search_term, r.get("abstract"))
-                    ]
-                if force_rematch:
-                    results = [
-                        r
-                        for r in results
-                        if self._really_matched(search_term, r.get("abstract"))
-                    ]
+        return [
+            [dict(hit) for hit, terms in zip(hits, hit_terms) if term in terms]
+            for term in batch
+        ]
 
-            if department or department_ignore:
-                self._match_department(results, department, department_ignore)
+    def _hit_matches(self, search_term: str, hit: dict) -> bool:
+        return self._really_matched(
+            search_term, hit.get("abstract") or ""
+        ) or self._really_matched(search_term, hit.get("title") or "")
 
-            if terms_ignore:
-                self._match_terms_ignore(results, terms_ignore)
+    def _fetch_results(
+        self,
+        search_term: Union[str, List[str]],
+        dou_sections,
+        search_date,
+        reference_date,
+        field,
+        is_exact_search,
+    ) -> list:
+        """Search a term, or the list of terms of a batch, in the DOU."""
+        logging.info("Starting search for term: %s", search_term)
+
+        return self.dou_hook.search_text(
+            search_term=search_term,
+            sections=[Section[s] for s in dou_sections],
+            reference_date=reference_date,
+            search_date=SearchDate[search_date],
+            field=Field[field],
+            is_exact_search=is_exact_search,
+        )
 
-            if pubtype:
-                self._match_pubtype(results, pubtype)
+    def _filter_results(
+        self,
+        search_term,
+        results,
+        ignore_signature_match,
+        force_rematch,
+        department,
+        department_ignore,
+        terms_ignore,
+        pubtype,
+    ) -> list:
+        """Apply the filters of the search to the results of a term."""
+        # In cases where no terms are specified, skip the matching checks
+        if search_term != "":
+            if ignore_signature_match:
+                results = [
+                    r
+                    for r in results
+                    if not self._is_signature(search_term, r.get("abstract"))
+                ]
+            if force_rematch:
+                results = [
+                    r
+                    for r in results
+                    if self._really_matched(search_term, r.get("abstract"))
+                ]
 
-            self._render_section_descriptions(results)
+        if department or department_ignore:
+            self._match_department(results, department, department_ignore)
 
-            # self._add_standard_highlight_formatting(results)
+        if terms_ignore:
+            self._match_terms_ignore(results, terms_ignore)
 
-            if results:
-                # To execute a search without terms, use the key "all_publications"
-                result_key = "all_publications" if search_term == "" else search_term
-                search_results[result_key] = results
+        if pubtype:
+            self._match_pubtype(results, pubtype)
 
-            time.sleep(self.SCRAPPING_INTERVAL * random() * 2)
+        self._render_section_descriptions(results)
 
-        return search_results
+        # self._add_standard_highlight_formatting(results)
+
+        return results
 
     def _add_standard_highlight_formatting(self, results: list) -> None:
         for result in results:
@@ -275,69 +412,6 @@ class DOUSearcher(BaseSearcher):
                 .replace("</span>", "</%%>")
             )
 
-    def _search_text_with_retry(
-        self,
-        search_term,
-        sections,
-        reference_date,
-        search_date,
-        field,
-        is_exact_search,
-        max_retries=5,
-    ) -> list:
-
-        retry = 1
-
-        while True:
-            try:
-                return self.dou_hook.search_text(
-                    search_term=search_term,
-                    sections=sections,
-                    reference_date=reference_date,
-                    search_date=search_date,
-                    field=field,
-                    is_exact_search=is_exact_search,
-                )
-            except Exception as e:
-                import requests
-
-                # If the underlying error is SSL related, don't retry — likely permanent
-                if isinstance(e, requests.exceptions.SSLError):
-                    logging.error(
-                        "SSL error encountered for term '%s' — aborting retries: %s",
-                        search_term,
-                        e,
-                    )
-                    raise
-
-                # If it's a ValueError from missing script tag, it may indicate API structure change
-                # Still retry in case it's temporary
-                if isinstance(e, ValueError):
-                    logging.warning(
-                        "ValueError encountered for term '%s': %s", search_term, str(e)
-                    )
-
-                if retry > max_retries:
-                    logging.error(
-                        "Error - Max retries reached for term '%s'. Last error: %s",
-                        search_term,
-                        str(e),
-                    )
-                    raise
-
-                logging.info(
-                    "Attempt %s of %s for term '%s'. Error: %s",
-                    retry,
-                    max_retries,
-                    search_term,
-                    str(e),
-                )
-                logging.info(
-                    "Sleeping for 30 seconds before retry dou_hook.search_text()."
-                )
-                time.sleep(30)
-                retry += 1
-
     def _is_signature(self, search_term: str, abstract: str) -> bool:
         """This function checks if the search_term (usually used to search for people's names)
         is present in the signature. To achieve this, the function takes advantage of a "bug" in the API.
@@ -427,6 +501,7 @@ class DOUSearcher(BaseSearcher):
 class QDSearcher(BaseSearcher):
 
     API_BASE_URL = "https://api.queridodiario.ok.org.br/gazettes"
+    cache = HTTPCache("qd", ttl=int(os.getenv("RO_DOU__QD_CACHE_TTL", 3600)))
 
     def exec_search(
         self,
@@ -443,7 +518,7 @@ class QDSearcher(BaseSearcher):
         search_results = {}
 
         for search_term in term_list:
-
+            deadline.check()
             results = self._search_term(
                 territory_id=territory_id,
                 search_term=search_term,
@@ -455,8 +530,9 @@ class QDSearcher(BaseSearcher):
             )
             if results:
                 search_results[search_term] = results
-            time.sleep(self.SCRAPPING_INTERVAL * random() * 2)
+            time.sleep(deadline.timeout(self.SCRAPPING_INTERVAL * random() * 2))
 
+        logging.info("QD cache: %s", self.cache.stats())
         return self._group_results(search_results, term_list)
 
     def _search_term(
@@ -478,7 +554,13 @@ class QDSearcher(BaseSearcher):
             number_of_excerpts,
         )
 
-        req_result = requests.get(self.API_BASE_URL, params=payload)
+        req_result = self.cache.fetch(
+            self.API_BASE_URL,
+            payload,
+            lambda: requests.get(
+                self.API_BASE_URL, params=payload, timeout=deadline.timeout(None)
+            ),
+        )
 
         parsed_results = [
             self.parse_result(result, result_as_email)
@@ -571,6 +653,8 @@ class INLABSSearcher(BaseSearcher):
         show_relevancy: Optional[bool] = None,
         pubtype: List[str] = None,
         reference_date: datetime = datetime.now(),
+        search_key: Optional[str] = None,
+        use_search_coordinator: bool = False,
     ) -> Dict:
         """
         Execute a search with given parameters, applying filters and
@@ -605,6 +689,12 @@ class INLABSSearcher(BaseSearcher):
             pubtype (List[str]): List of publication types to filter the search.
             reference_date (datetime, optional): Reference date for the
                 search. Defaults to now.
+            search_key (str, optional): Key of the search in the OpenSearch
+                percolator. Only used when `terms` is a literal list, as
+                only those terms are registered in the percolator.
+            use_search_coordinator (bool): If True, use the results stored
+                by the `SearchCoordinator` when it covers this search.
+                Defaults to False.
 
         Returns:
             Dict: Grouped search results.
@@ -622,6 +712,11 @@ class INLABSSearcher(BaseSearcher):
             reference_date,
             search_date,
         )
+        records = (
+            SearchCoordinator().load_slice(search_terms)
+            if use_search_coordinator and isinstance(terms, list)
+            else None
+        )
 
         search_results = inlabs_hook.search_text(
             ai_config=ai_config,
@@ -635,6 +730,8 @@ class INLABSSearcher(BaseSearcher):
             ignore_inline_tables=ignore_inline_tables,
             min_table_rows=min_table_rows,
             show_relevancy=show_relevancy,
+            search_key=search_key if isinstance(terms, list) else None,
+            records=records,
         )
 
         group_results = self._group_results(search_results, terms, department)
@@ -0,0 +1,83 @@
+"""Cooperative deadline of the searches of a task.
+
+The deadline is held in a context variable, so each source searched
+by ``perform_searches`` has its own, and the hooks check it between
+pages and terms and cap the timeout of their requests with it.
+
+Example usage::
+
+    with deadline(60):
+        for page in pages:
+            check()
+            requests.get(url, timeout=timeout(10))
+"""
+
+import contextvars
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Optional
+
+_deadline: contextvars.ContextVar = contextvars.ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """The search did not finish before its deadline."""
+
+
+@contextmanager
+def deadline(seconds: float):
+    """Set the deadline of the current context to `seconds` from now.
+
+    An outer deadline which expires earlier is kept.
+    """
+    at = time.monotonic() + seconds
+    outer = _deadline.get()
+    token = _deadline.set(at if outer is None else min(at, outer))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Return the seconds left before the deadline, or None if there is
+    no deadline."""
+    at = _deadline.get()
+    return None if at is None else at - time.monotonic()
+
+
+def check():
+    """Raise `DeadlineExceeded` if the deadline has passed."""
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded("Search deadline exceeded")
+
+
+def timeout(default: Optional[float]) -> Optional[float]:
+    """Return `default` capped at the seconds left before the deadline.
+
+    Raises:
+        DeadlineExceeded: If the deadline has passed.
+    """
+    check()
+    left = remaining()
+    if left is None:
+        return default
+    return left if default is None else min(default, left)
+
+
+def propagate(func: Callable) -> Callable:
+    """Wrap `func` to run under the deadline of the current context, as
+    new threads do not inherit it."""
+    at = _deadline.get()
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _deadline.set(at)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _deadline.reset(token)
+
+    return wrapper
@@ -0,0 +1,155 @@
+"""Download files concurrently, streaming them to disk."""
+
+import logging
+import os
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class DownloadError(Exception):
+    """The file could not be fully downloaded or is corrupted."""
+
+
+class Downloader:
+    """Downloads files with bounded concurrency.
+
+    Each response is streamed in chunks to ``<path>.part``, which is
+    renamed to `path` only after it is complete and verified, so the
+    whole file is never held in memory. An interrupted download is
+    resumed from the bytes already written with a ``Range`` request (or
+    restarted if the server ignores it). The size is checked against the
+    ``Content-Length``/``Content-Range`` of the response and ZIP files
+    are checked against the CRC-32 of every member.
+
+    Example usage::
+
+        downloader = Downloader(session, max_workers=4)
+        for path in downloader.download_all({url: "/tmp/file.zip"}):
+            extract(path)
+    """
+
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(
+        self, session: requests.Session, max_workers: int = 4, max_retries: int = 3
+    ):
+        """Args:
+        session (requests.Session): Session used by every download. Its
+            connection pool is resized to `max_workers`.
+        max_workers (int): Concurrent downloads. Defaults to 4.
+        max_retries (int): Resumptions of an interrupted download.
+            Defaults to 3.
+        """
+        self.session = session
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max_retries
+        adapter = HTTPAdapter(pool_maxsize=self.max_workers)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+
+    def download_all(
+        self, files: Dict[str, str], headers: Optional[dict] = None
+    ) -> Iterator[str]:
+        """Download every url of `files` to its path.
+
+        Yields the paths as the downloads finish, so the caller can
+        process a file while the others are still downloading.
+
+        Raises:
+            DownloadError: If a file fails after `max_retries`.
+        """
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            futures = [
+                executor.submit(self.download, url, path, headers)
+                for url, path in files.items()
+            ]
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def download(self, url: str, path: str, headers: Optional[dict] = None) -> str:
+        """Download `url` to `path`, resuming it if interrupted.
+
+        Raises:
+            DownloadError: If the file fails after `max_retries`.
+        """
+        part_path = f"{path}.part"
+        for attempt in range(self.max_retries + 1):
+            try:
+                expected_size = self._stream(url, part_path, headers)
+                break
+            except (
+                requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout,
+                requests.exceptions.ChunkedEncodingError,
+            ) as error:
+                if attempt == self.max_retries:
+                    raise DownloadError(f"Download of {url} failed: {error}") from error
+                logging.warning(
+                    "Download of %s interrupted (%s). Resuming.", url, error
+                )
+
+        size = os.path.getsize(part_path)
+        if expected_size is not None and size != expected_size:
+            os.remove(part_path)
+            raise DownloadError(
+                f"Download of {url} has {size} bytes, expected {expected_size}"
+            )
+        if path.endswith(".zip"):
+            self._check_zip(url, part_path)
+
+        os.replace(part_path, path)
+        logging.info("Downloaded %s (%s bytes)", path, size)
+        return path
+
+    def _stream(self, url: str, part_path: str, headers: Optional[dict]) -> Optional[int]:
+        """Append the response of `url` to `part_path` and return the
+        expected size of the whole file, if known."""
+        request_headers = dict(headers or {})
+        if os.path.exists(part_path):
+            request_headers["Range"] = f"bytes={os.path.getsize(part_path)}-"
+
+        with self.session.get(
+            url, headers=request_headers, stream=True, timeout=60
+        ) as response:
+            if response.status_code == 416 and "Range" in request_headers:
+                # The partial file is not a prefix of the current one.
+                os.remove(part_path)
+                return self._stream(url, part_path, headers)
+            response.raise_for_status()
+            if response.status_code == 206:
+                mode = "ab"
+                total = response.headers.get("Content-Range", "").rpartition("/")[2]
+                expected_size = int(total) if total.isdigit() else None
+            else:
+                mode = "wb"
+                length = response.headers.get("Content-Length", "")
+                expected_size = int(length) if length.isdigit() else None
+                if response.headers.get("Content-Encoding"):
+                    # The length is of the encoded body.
+                    expected_size = None
+
+            with open(part_path, mode) as f:
+                for chunk in response.iter_content(chunk_size=self.CHUNK_SIZE):
+                    f.write(chunk)
+
+        return expected_size
+
+    @staticmethod
+    def _check_zip(url: str, path: str):
+        try:
+            with zipfile.ZipFile(path) as zip_file:
+                corrupted = zip_file.testzip()
+        except (zipfile.BadZipFile, zlib.error) as error:
+            os.remove(path)
+            raise DownloadError(f"Download of {url} is not a valid ZIP: {error}") from error
+        if corrupted is not None:
+            os.remove(path)
+            raise DownloadError(f"Download of {url} has a corrupted member: {corrupted}")
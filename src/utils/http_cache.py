@@ -0,0 +1,157 @@
+"""Share the HTTP responses of the scrapers across DAGs."""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import closing
+from typing import Callable, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+
+class HTTPCache:
+    """Caches successful GET responses in a SQLite file.
+
+    Responses are keyed by URL and query parameters, and expire after
+    the `ttl` of their source. The file can be placed on a filesystem
+    shared by the workers (``RO_DOU__HTTP_CACHE_PATH``), so DAGs scraping
+    the same term, section and date within the TTL are served without
+    requests to the upstream site. It keeps SQLite's default rollback
+    journal, as WAL mode needs memory shared by the processes of a single
+    host, and writers wait up to 30 seconds for the lock.
+
+    Cache errors are logged and treated as misses, so the cache never
+    fails a search.
+
+    Example usage::
+
+        cache = HTTPCache("qd", ttl=3600)
+        response = cache.fetch(url, params, lambda: requests.get(url, params=params))
+        cache.stats()
+        # {'hits': 0, 'misses': 1}
+    """
+
+    DEFAULT_PATH = os.path.join(tempfile.gettempdir(), "ro_dou_http_cache.sqlite")
+
+    def __init__(self, source: str, ttl: int, path: Optional[str] = None):
+        """Args:
+        source (str): Name of the scraped source, part of the key.
+        ttl (int): Seconds a response is kept. Zero or less disables
+            the cache.
+        path (str, optional): SQLite file. Defaults to the
+            ``RO_DOU__HTTP_CACHE_PATH`` environment variable or
+            ``DEFAULT_PATH``.
+        """
+        self.source = source
+        self.ttl = ttl
+        self.path = path or os.getenv("RO_DOU__HTTP_CACHE_PATH", self.DEFAULT_PATH)
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=30)
+        if not self._initialized:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, expires_at REAL, status INTEGER, "
+                "url TEXT, headers TEXT, content BLOB)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS responses_expires_at "
+                "ON responses (expires_at)"
+            )
+            self._initialized = True
+        return connection
+
+    def _key(self, url: str, params) -> str:
+        if isinstance(params, dict):
+            params = sorted(params.items())
+        return hashlib.sha256(
+            json.dumps([self.source, url, params], default=str).encode("utf-8")
+        ).hexdigest()
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self._hits += 1
+            else:
+                self._misses += 1
+
+    def get(self, url: str, params=None) -> Optional[requests.Response]:
+        """Return the cached response of `url` and `params`, or None."""
+        if self.ttl <= 0:
+            return None
+        try:
+            with closing(self._connect()) as connection:
+                row = connection.execute(
+                    "SELECT status, url, headers, content FROM responses "
+                    "WHERE key = ? AND expires_at > ?",
+                    (self._key(url, params), time.time()),
+                ).fetchone()
+        except sqlite3.Error as error:
+            logging.warning("HTTP cache unavailable: %s", error)
+            row = None
+
+        self._count(row is not None)
+        if row is None:
+            return None
+
+        response = requests.Response()
+        response.status_code, response.url = row[0], row[1]
+        response.headers = CaseInsensitiveDict(json.loads(row[2]))
+        response._content = row[3]
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        return response
+
+    def set(self, url: str, params, response: requests.Response):
+        """Store `response` of `url` and `params` if it succeeded."""
+        if self.ttl <= 0 or response is None or response.status_code != 200:
+            return
+        now = time.time()
+        try:
+            with closing(self._connect()) as connection, connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        self._key(url, params),
+                        now + self.ttl,
+                        response.status_code,
+                        response.url,
+                        json.dumps(dict(response.headers)),
+                        response.content,
+                    ),
+                )
+                connection.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+        except sqlite3.Error as error:
+            logging.warning("HTTP cache unavailable: %s", error)
+
+    def fetch(
+        self, url: str, params, request: Callable[[], requests.Response]
+    ) -> requests.Response:
+        """Return the cached response of `url` and `params`, or call
+        `request` and cache its response."""
+        response = self.get(url, params)
+        if response is None:
+            response = request()
+            self.set(url, params, response)
+        return response
+
+    def stats(self, reset: bool = True) -> dict:
+        """Return the hits and misses since the last reset.
+
+        Args:
+            reset (bool): Clear the counters. Defaults to True.
+        """
+        with self._lock:
+            stats = {"hits": self._hits, "misses": self._misses}
+            if reset:
+                self._hits = self._misses = 0
+        return stats
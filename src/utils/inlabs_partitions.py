@@ -0,0 +1,211 @@
+"""Manage ``dou_inlabs.article_raw`` as a table partitioned by month."""
+
+import logging
+from datetime import date
+from typing import Optional, Tuple, Union
+
+from .pg_copy import table_columns  # type: ignore
+
+COLUMN_TYPES = {
+    "id": "BIGINT NOT NULL",
+    "name": "TEXT",
+    "idoficio": "BIGINT",
+    "pubname": "TEXT",
+    "arttype": "TEXT",
+    "pubdate": "TIMESTAMP WITHOUT TIME ZONE NOT NULL",
+    "artclass": "TEXT",
+    "artcategory": "TEXT",
+    "artsize": "BIGINT",
+    "artnotes": "TEXT",
+    "numberpage": "BIGINT",
+    "pdfpage": "TEXT",
+    "editionnumber": "TEXT",
+    "highlighttype": "TEXT",
+    "highlightpriority": "FLOAT",
+    "highlight": "TEXT",
+    "highlightimage": "TEXT",
+    "highlightimagename": "TEXT",
+    "idmateria": "BIGINT",
+    "midias": "TEXT",
+    "identifica": "TEXT",
+    "data": "TEXT",
+    "ementa": "TEXT",
+    "titulo": "TEXT",
+    "subtitulo": "TEXT",
+    "texto": "TEXT",
+    "assina": "TEXT",
+    "texto_norm": "TEXT",
+    "assina_norm": "TEXT",
+}
+
+COLUMNS_DDL = ",\n".join(
+    [f"{name} {column_type}" for name, column_type in COLUMN_TYPES.items()]
+    + ["PRIMARY KEY (id, pubdate)"]
+)
+
+EXTENSIONS = ["pg_trgm", "unaccent"]
+
+INDEXED_COLUMNS = ["pubdate", "pubname", "artcategory"]
+
+# Trigram search of substrings and regular expressions of ``texto``.
+TEXT_INDEXES = {
+    "texto_norm_trgm": "gin (texto_norm {schema}.gin_trgm_ops)",
+}
+
+
+def month_bounds(day: Union[str, date]) -> Tuple[date, date]:
+    """Return the first day of the month of `day` and of the next one."""
+    if isinstance(day, str):
+        day = date.fromisoformat(day[:10])
+    start = day.replace(day=1)
+    end = (
+        start.replace(year=start.year + 1, month=1)
+        if start.month == 12
+        else start.replace(month=start.month + 1)
+    )
+    return start, end
+
+
+def partition_name(table: str, day: Union[str, date]) -> str:
+    """Return the name of the partition of `table` holding `day`,
+    e.g. ``dou_inlabs.article_raw_2024_04``."""
+    start, _ = month_bounds(day)
+    return f"{table}_{start:%Y_%m}"
+
+
+def ensure_partition(cursor, table: str, day: Union[str, date]) -> str:
+    """Create the partition of `table` holding `day` if it does not exist
+    and return its name."""
+    start, end = month_bounds(day)
+    partition = partition_name(table, start)
+    cursor.execute(
+        f"CREATE TABLE IF NOT EXISTS {partition} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{start}') TO ('{end}')"
+    )
+    return partition
+
+
+def ensure_partitions(cursor, table: str, source: str):
+    """Create the partitions of `table` holding every ``pubdate`` of the
+    rows of `source`, such as the staging table of ``replace_day``."""
+    cursor.execute(
+        f"SELECT DISTINCT date_trunc('month', pubdate)::date FROM {source} "
+        "WHERE pubdate IS NOT NULL"
+    )
+    for (month,) in cursor.fetchall():
+        ensure_partition(cursor, table, month)
+
+
+def _relkind(cursor, table: str) -> Optional[str]:
+    schema, name = table.split(".", maxsplit=1)
+    cursor.execute(
+        """
+        SELECT c.relkind
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = %s AND c.relname = %s
+        """,
+        (schema, name),
+    )
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def _normalized_columns(schema: str) -> dict:
+    """SQL expressions of ``texto_norm`` and ``assina_norm``, normalized
+    as the loader does with ``plain_text`` and ``normalize``: tags are
+    replaced by spaces, whitespace is collapsed and the accents are
+    removed by ``unaccent``."""
+    return {
+        "texto_norm": (
+            f"lower({schema}.unaccent(btrim(regexp_replace("
+            "regexp_replace(coalesce(texto, ''), '<[^>]+>', ' ', 'g'), "
+            "'\\s+', ' ', 'g'))))"
+        ),
+        "assina_norm": f"lower({schema}.unaccent(coalesce(assina, '')))",
+    }
+
+
+def _migrate(cursor, table: str):
+    """Move the rows of the unpartitioned `table` into a new partitioned
+    table with the same name.
+
+    ``texto_norm`` and ``assina_norm`` of the rows loaded before they
+    existed are computed by the same ``INSERT``. Rows without
+    ``pubdate`` cannot be partitioned. If there is any, the old table is
+    kept as ``<table>_unpartitioned`` with a warning.
+    """
+    schema = table.split(".", maxsplit=1)[0]
+    legacy = f"{table}_unpartitioned"
+    logging.info("Partitioning %s by month.", table)
+    cursor.execute(f"ALTER TABLE {table} RENAME TO {legacy.split('.')[-1]}")
+    cursor.execute(f"CREATE TABLE {table} ({COLUMNS_DDL}) PARTITION BY RANGE (pubdate)")
+    ensure_partitions(cursor, table, legacy)
+    legacy_columns = table_columns(cursor, legacy)
+    select = {
+        column: column
+        for column in table_columns(cursor, table)
+        if column in legacy_columns
+    }
+    for column, expression in _normalized_columns(schema).items():
+        select[column] = (
+            f"coalesce({column}, {expression})"
+            if column in legacy_columns
+            else expression
+        )
+    cursor.execute(
+        f"INSERT INTO {table} ({', '.join(select)}) "
+        f"SELECT {', '.join(select.values())} FROM {legacy} "
+        "WHERE pubdate IS NOT NULL"
+    )
+    cursor.execute(f"SELECT count(*) FROM {legacy} WHERE pubdate IS NULL")
+    (without_pubdate,) = cursor.fetchone()
+    if without_pubdate:
+        logging.warning(
+            "%s rows of %s have no pubdate and were not partitioned. "
+            "They are kept in %s.",
+            without_pubdate,
+            table,
+            legacy,
+        )
+    else:
+        cursor.execute(f"DROP TABLE {legacy}")
+
+
+def ensure_partitioned_table(connection, table: str):
+    """Create `table` partitioned by month of ``pubdate``, or convert the
+    existing unpartitioned table, and create its indexes.
+
+    Indexes created on the partitioned table are created on every
+    partition, including the ones created later by `ensure_partitions`.
+    The ``pg_trgm`` and ``unaccent`` extensions, used by the searches in
+    SQL mode, are created in the schema of `table`.
+    """
+    schema, name = table.split(".", maxsplit=1)
+    try:
+        with connection.cursor() as cursor:
+            for extension in EXTENSIONS:
+                cursor.execute(
+                    f"CREATE EXTENSION IF NOT EXISTS {extension} SCHEMA {schema}"
+                )
+            relkind = _relkind(cursor, table)
+            if relkind is None:
+                cursor.execute(
+                    f"CREATE TABLE {table} ({COLUMNS_DDL}) PARTITION BY RANGE (pubdate)"
+                )
+            elif relkind != "p":
+                _migrate(cursor, table)
+            for column in INDEXED_COLUMNS:
+                cursor.execute(
+                    f"CREATE INDEX IF NOT EXISTS {name}_{column}_idx "
+                    f"ON {table} ({column})"
+                )
+            for index, method in TEXT_INDEXES.items():
+                cursor.execute(
+                    f"CREATE INDEX IF NOT EXISTS {name}_{index}_idx "
+                    f"ON {table} USING {method.format(schema=schema)}"
+                )
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
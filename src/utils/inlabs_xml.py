@@ -0,0 +1,71 @@
+"""Read the articles of the INLABS XML files in a single streaming pass."""
+
+import html
+import re
+from datetime import datetime
+from functools import lru_cache
+from typing import Iterable, Iterator, Optional
+
+from lxml import etree
+from slugify import slugify  # type: ignore
+
+_ASSINA_RE = re.compile(
+    r"<p\b[^>]*\bclass\s*=\s*[\"']?[^\"'>]*\bassina\b[^>]*>(.*?)</p\s*>",
+    re.IGNORECASE | re.DOTALL,
+)
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+@lru_cache(maxsize=None)
+def _column(tag: str) -> str:
+    return slugify(tag, separator="_")
+
+
+def _value(text: Optional[str]) -> Optional[str]:
+    """Empty attributes and elements are loaded as NULL."""
+    if text is None:
+        return None
+    return text.strip() or None
+
+
+def get_assina(texto: Optional[str]) -> Optional[str]:
+    """Return the text of the ``<p class="assina">`` paragraphs of the
+    article HTML, joined by commas, or None if there is none."""
+    signatures = [
+        html.unescape(_TAG_RE.sub("", match))
+        for match in _ASSINA_RE.findall(texto or "")
+    ]
+    return ", ".join(signatures) if signatures else None
+
+
+def iter_articles(paths: Iterable[str]) -> Iterator[dict]:
+    """Yield one record per ``<article>`` of the XML files in `paths`.
+
+    The record has the article attributes and the elements of the
+    article and of its ``<body>``, as slugified column names of
+    ``dou_inlabs.article_raw``, plus ``pubdate`` as a datetime and the
+    ``assina`` signatures of ``texto``. Each article is released after
+    it is read, so memory does not grow with the size of the files.
+    """
+    for path in paths:
+        for _, article in etree.iterparse(
+            path, events=("end",), tag="article", huge_tree=True
+        ):
+            record = {_column(key): _value(value) for key, value in article.attrib.items()}
+            for child in article:
+                if child.tag == "body":
+                    for field in child:
+                        if isinstance(field.tag, str):
+                            record[_column(field.tag)] = _value(field.text)
+                elif isinstance(child.tag, str):
+                    record[_column(child.tag)] = _value(child.text)
+
+            if record.get("pubdate"):
+                record["pubdate"] = datetime.strptime(record["pubdate"], "%d/%m/%Y")
+            record["assina"] = get_assina(record.get("texto"))
+            yield record
+
+            article.clear()
+            while article.getprevious() is not None:
+                del article.getparent()[0]
+
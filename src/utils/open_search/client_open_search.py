@@ -1,28 +1,62 @@
 """Utility module for managing OpenSearch client connections.
 This module provides a wrapper class for creating and managing connections"""
 
+import os
+import threading
+
 from opensearchpy import OpenSearch  # type: ignore
-from .config import OPENSEARCH_HOST, OPENSEARCH_USER, OPENSEARCH_PASS, \
-    OPENSEARCH_SSL, OPENSEARCH_VERIFY_CERTS  # type: ignore
+from .config import get_setting  # type: ignore
 
 
 class OpenSearchClient:
-    """Client wrapper for OpenSearch connections."""
+    """Client wrapper for OpenSearch connections.
+
+    Clients are kept in a process-level registry keyed by the connection
+    settings, so every task run by the same worker process reuses the
+    same connection pool (and its open keep-alive connections) instead
+    of opening new ones. The process id is part of the key, so a forked
+    worker never shares sockets with its parent.
+    """
+
+    _clients: dict = {}
+    _lock = threading.Lock()
 
     def __init__(self):
         """Initialize the OpenSearch client using credentials from config."""
+        host = get_setting("OPENSEARCH_HOST")
+        if not host:
+            raise EnvironmentError("Environment variable OPENSEARCH_HOST not found!")
+
         auth = None
-        if OPENSEARCH_USER:
-            auth = (OPENSEARCH_USER, OPENSEARCH_PASS)
+        if get_setting("OPENSEARCH_USER"):
+            auth = (get_setting("OPENSEARCH_USER"), get_setting("OPENSEARCH_PASS"))
+
+        settings = {
+            "hosts": [host],
+            "http_compress": True,
+            "http_auth": auth,
+            "use_ssl": get_setting("OPENSEARCH_SSL"),
+            "verify_certs": get_setting("OPENSEARCH_VERIFY_CERTS"),
+            "pool_maxsize": int(get_setting("OPENSEARCH_POOL_MAXSIZE")),
+            "timeout": int(get_setting("OPENSEARCH_TIMEOUT")),
+            "max_retries": int(get_setting("OPENSEARCH_MAX_RETRIES")),
+            "retry_on_timeout": True,
+        }
+        key = (os.getpid(), repr(sorted(settings.items())))
 
-        self._client = OpenSearch(
-            hosts=[OPENSEARCH_HOST],
-            http_compress=True,
-            http_auth=auth,
-            use_ssl=OPENSEARCH_SSL,
-            verify_certs=OPENSEARCH_VERIFY_CERTS,
-        )
+        with self._lock:
+            if key not in self._clients:
+                self._clients[key] = OpenSearch(**settings)
+            self._client = self._clients[key]
 
     def get_client(self) -> OpenSearch:
         """Return the underlying OpenSearch client instance."""
         return self._client
+
+    @classmethod
+    def close_all(cls):
+        """Close and forget every client of the registry."""
+        with cls._lock:
+            for client in cls._clients.values():
+                client.close()
+            cls._clients.clear()
@@ -4,43 +4,78 @@ parameters and defines constants for index names and other settings.
 """
 
 import os
-from airflow.sdk import Variable
-
-# Try to load OpenSearch connection parameters from Airflow Variables, falling
-# back to environment variables if not set in Airflow.
-
-RO_DOU_INLABS_USE_OPENSEARCH = Variable.get(
-    "RO_DOU_INLABS_USE_OPENSEARCH",
-    os.getenv("RO_DOU_INLABS_USE_OPENSEARCH", 'false'),
-)
-
-OPENSEARCH_HOST = Variable.get(
-    "OPENSEARCH_HOST",
-    os.getenv("OPENSEARCH_HOST", "http://localhost:9200"),
-)
-
-OPENSEARCH_USER = Variable.get(
-    "OPENSEARCH_USER",
-    os.getenv("OPENSEARCH_USER"),
-)
-
-OPENSEARCH_PASS = Variable.get(
-    "OPENSEARCH_PASS",
-    os.getenv("OPENSEARCH_PASS"),
-)
-OPENSEARCH_SSL = Variable.get(
-    "OPENSEARCH_SSL",
-    os.getenv("OPENSEARCH_SSL", False),
-)
-OPENSEARCH_VERIFY_CERTS = Variable.get(
-    "OPENSEARCH_VERIFY_CERTS",
-    os.getenv("OPENSEARCH_VERIFY_CERTS", False),
-)
-
-if not OPENSEARCH_HOST:
-    raise EnvironmentError("Environment variable OPENSEARCH_HOST not found!")
+import time
+
+# OpenSearch connection parameters and feature flags are resolved lazily,
+# on first use, so importing this module (and parsing the DAG files that
+# import it) does not query Airflow Variables. Each setting is read from:
+#
+# 1. the ``AIRFLOW_VAR_<NAME>`` environment variable, if set;
+# 2. the Airflow Variable ``<NAME>``, cached for ``SETTINGS_TTL`` seconds;
+# 3. the ``<NAME>`` environment variable, or the default below.
+
+SETTINGS_DEFAULTS = {
+    "RO_DOU_INLABS_USE_OPENSEARCH": "false",
+    "OPENSEARCH_HOST": "http://localhost:9200",
+    "OPENSEARCH_USER": None,
+    "OPENSEARCH_PASS": None,
+    "OPENSEARCH_SSL": False,
+    "OPENSEARCH_VERIFY_CERTS": False,
+    "OPENSEARCH_POOL_MAXSIZE": 10,
+    "OPENSEARCH_TIMEOUT": 30,
+    "OPENSEARCH_MAX_RETRIES": 3,
+    "RO_DOU_INLABS_USE_PERCOLATOR": "false",
+    "RO_DOU_INLABS_USE_SEARCH_COORDINATOR": "false",
+}
+
+SETTINGS_TTL = int(os.getenv("RO_DOU_SETTINGS_TTL", 60))
+
+_settings_cache: dict = {}
+
+
+def get_setting(name: str, use_variable: bool = True):
+    """Return the value of the setting `name`.
+
+    Args:
+        name (str): Setting name, one of ``SETTINGS_DEFAULTS``.
+        use_variable (bool): If False, only the environment is read. Used
+            by settings needed while parsing DAG files. Defaults to True.
+    """
+    override = os.getenv(f"AIRFLOW_VAR_{name}")
+    if override is not None:
+        return override
+
+    default = os.getenv(name, SETTINGS_DEFAULTS[name])
+    if not use_variable:
+        return default
+
+    now = time.monotonic()
+    cached = _settings_cache.get(name)
+    if cached and cached[1] > now:
+        return cached[0]
+
+    from airflow.sdk import Variable
+
+    value = Variable.get(name, default)
+    _settings_cache[name] = (value, now + SETTINGS_TTL)
+    return value
+
+
+def get_flag(name: str, use_variable: bool = True) -> bool:
+    """Return True if the setting `name` is ``true`` (case-insensitive)."""
+    return str(get_setting(name, use_variable)).lower() == "true"
+
+
+def __getattr__(name: str):
+    """Resolve settings accessed as module attributes lazily."""
+    if name in SETTINGS_DEFAULTS:
+        return get_setting(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 INDEX_NAME = "dou"
+PERCOLATOR_INDEX_NAME = "dou_percolator"
+PERCOLATOR_MATCHES_INDEX_NAME = "dou_percolator_matches"
 
 COLUMNS_NAME = [
     "id",
@@ -136,3 +171,34 @@ MAPPING = {
         },
     },
 }
+
+# The percolator index must map every field referenced by the stored
+# queries with the same analyzers used in the `dou` index.
+PERCOLATOR_MAPPING = {
+    "settings": MAPPING["settings"],
+    "mappings": {
+        "properties": {
+            "query": {"type": "percolator"},
+            "search_key": {"type": "keyword"},
+            "term": {"type": "keyword"},
+            "terms_hash": {"type": "keyword"},
+            "version": {"type": "keyword"},
+            "since": {"type": "date", "format": "yyyy-MM-dd"},
+            "texto_plain": MAPPING["mappings"]["properties"]["texto_plain"],
+        },
+    },
+}
+
+PERCOLATOR_MATCHES_MAPPING = {
+    "mappings": {
+        "properties": {
+            "search_key": {"type": "keyword"},
+            "term": {"type": "keyword"},
+            "doc_id": {"type": "keyword"},
+            "pubdate": {
+                "type": "date",
+                "format": "yyyy-MM-dd||strict_date_optional_time",
+            },
+        },
+    },
+}
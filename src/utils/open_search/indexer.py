@@ -1,11 +1,16 @@
 """Indexing pipeline for DOU articles from PostgreSQL into OpenSearch."""
 
 import logging
-import re
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import List, Tuple
 
-from opensearchpy.helpers import bulk  # type: ignore
+from opensearchpy.helpers import streaming_bulk  # type: ignore
 from .client_open_search import OpenSearchClient  # type: ignore
 from .config import INDEX_NAME, MAPPING, COLUMNS_NAME  # type: ignore
+from .percolator import Percolator  # type: ignore
+from ..term_matcher import plain_text  # type: ignore
 
 
 class Indexer:
@@ -19,12 +24,24 @@ class Indexer:
     3. ``run`` — orchestrates the full pipeline, calling the two steps above
        and bulk-loading the documents into OpenSearch.
 
+    Rows are read through a server-side cursor and indexed by
+    ``THREAD_COUNT`` threads in batches of ``CHUNK_SIZE`` documents, so
+    memory does not grow with the number of articles of the day. Each
+    bulk request carries up to ``MAX_CHUNK_BYTES`` and is retried up to
+    ``MAX_RETRIES`` times, with exponential backoff, while OpenSearch
+    answers ``429 Too Many Requests``.
+
     Example usage::
 
         indexer = Indexer(conn_id="inlabs_db")
         indexer.run(pubdate="2024-04-01")
     """
 
+    THREAD_COUNT = int(os.getenv("RO_DOU__INDEXER_THREAD_COUNT", 4))
+    CHUNK_SIZE = int(os.getenv("RO_DOU__INDEXER_CHUNK_SIZE", 500))
+    MAX_CHUNK_BYTES = int(os.getenv("RO_DOU__INDEXER_MAX_CHUNK_BYTES", 10 * 1024 * 1024))
+    MAX_RETRIES = int(os.getenv("RO_DOU__INDEXER_MAX_RETRIES", 5))
+
     def __init__(self, conn_id: str = "inlabs_db"):
         """Args:
         conn_id (str): Airflow connection ID for the INLABS PostgreSQL database.
@@ -45,13 +62,14 @@ class Indexer:
     def _fetch_from_postgres(self, pubdate: str, batch_size: int = 500):
         """Yield article documents from the INLABS PostgreSQL database.
 
-        Queries ``{self.STG_TABLE}`` filtering by ``pubdate`` and streams rows in
-        batches to avoid loading the full result set into memory at once.
+        Queries ``{self.STG_TABLE}`` filtering by ``pubdate`` through a named
+        (server-side) cursor, so only `batch_size` rows are held in memory
+        at once.
 
         Args:
             pubdate (str): Publication date to filter by (``YYYY-MM-DD``).
-            batch_size (int): Number of rows fetched per database round-trip.
-                Defaults to 500.
+            batch_size (int): Number of rows fetched per database round-trip
+                (the cursor ``itersize``). Defaults to 500.
 
         Yields:
             dict: One document per article row, with ``pubdate`` serialised to
@@ -60,29 +78,29 @@ class Indexer:
         from airflow.providers.postgres.hooks.postgres import PostgresHook  # type: ignore
 
         hook = PostgresHook(postgres_conn_id=self.conn_id)
+        conn = hook.get_conn()
 
         try:
-            with hook.get_conn().cursor() as cur:
+            with conn.cursor(name="indexer_articles") as cur:
+                cur.itersize = batch_size
                 cur.execute(
                     f"SELECT {', '.join(COLUMNS_NAME)} FROM {self.STG_TABLE} WHERE pubdate IS NOT NULL AND pubdate = %s",
                     (pubdate,),
                 )
-                while True:
-                    rows = cur.fetchmany(batch_size)
-                    if not rows:
-                        break
-                    for row in rows:
-                        doc = dict(zip(COLUMNS_NAME, row))
-                        if doc["pubdate"]:
-                            doc["pubdate"] = doc["pubdate"].strftime("%Y-%m-%d")
-                        yield doc
+                for row in cur:
+                    doc = dict(zip(COLUMNS_NAME, row))
+                    if doc["pubdate"]:
+                        doc["pubdate"] = doc["pubdate"].strftime("%Y-%m-%d")
+                    yield doc
         finally:
-            hook.get_conn().close()
+            conn.close()
 
     @staticmethod
     def _to_bulk_actions(docs):
         """Wrap documents in the OpenSearch bulk action format.
 
+        Adds ``texto_plain``, the text without HTML tags.
+
         Args:
             docs (Iterable[dict]): Documents to wrap.
 
@@ -90,30 +108,105 @@ class Indexer:
             dict: Bulk action dict with ``_index``, ``_id``, and ``_source``.
         """
         for doc in docs:
-            texto = doc.get("texto") or ""
-            doc["texto_plain"] = re.sub(
-                r"\s+", " ", re.sub("<[^>]+>", " ", texto)
-            ).strip()
+            doc["texto_plain"] = plain_text(doc.get("texto"))
             yield {"_index": INDEX_NAME, "_id": doc["id"], "_source": doc}
 
-    def run(self, pubdate: str, batch_size: int = 500):
+    @staticmethod
+    def _batched(docs, batch_size: int):
+        """Group `docs` in lists of up to `batch_size` documents."""
+        batch = []
+        for doc in docs:
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _index_batch(self, docs: list) -> Tuple[int, List[dict]]:
+        """Bulk-load `docs`, retrying the requests rejected with 429.
+
+        Returns:
+            tuple: The number of indexed documents and the errors of the
+                others.
+        """
+        errors = [
+            item
+            for ok, item in streaming_bulk(
+                self.client,
+                self._to_bulk_actions(docs),
+                chunk_size=self.CHUNK_SIZE,
+                max_chunk_bytes=self.MAX_CHUNK_BYTES,
+                max_retries=self.MAX_RETRIES,
+                raise_on_error=False,
+                yield_ok=False,
+            )
+            if not ok
+        ]
+        return len(docs) - len(errors), errors
+
+    def run(self, pubdate: str, batch_size: int = 500, percolate: bool = False):
         """Run the full PostgreSQL → OpenSearch indexing pipeline.
 
         Ensures the index exists, fetches articles from PostgreSQL, and
-        bulk-loads them into OpenSearch. Errors are reported but do not raise.
+        bulk-loads them into OpenSearch while the next rows are fetched.
+        Errors are reported but do not raise.
 
         Args:
             pubdate (str): Publication date to index (``YYYY-MM-DD``).
             batch_size (int): Rows fetched per PostgreSQL round-trip. Defaults to 500.
+                The documents are bulk-loaded in batches of ``CHUNK_SIZE``.
+            percolate (bool): If True, percolate each indexed batch against
+                the DAG terms registered in the ``Percolator``. Defaults to
+                False.
         """
         self._ensure_index()
 
-        success, errors = bulk(
-            self.client,
-            self._to_bulk_actions(self._fetch_from_postgres(pubdate, batch_size)),
-            raise_on_error=False,
+        percolator = Percolator(self.client) if percolate else None
+        success = 0
+        errors = []
+        matches = 0
+        started = time.monotonic()
+
+        def _collect(futures):
+            nonlocal success, matches
+            for future in futures:
+                docs = pending.pop(future)
+                batch_success, batch_errors = future.result()
+                success += batch_success
+                errors.extend(batch_errors)
+                if percolator:
+                    matches += percolator.percolate(docs)
+                elapsed = time.monotonic() - started
+                logging.info(
+                    "Indexados %s documento(s) (%.0f docs/s)",
+                    success,
+                    success / elapsed if elapsed else 0,
+                )
+
+        threads = max(1, self.THREAD_COUNT)
+        executor = ThreadPoolExecutor(max_workers=threads)
+        pending = {}
+        try:
+            for docs in self._batched(
+                self._fetch_from_postgres(pubdate, batch_size), self.CHUNK_SIZE
+            ):
+                pending[executor.submit(self._index_batch, docs)] = docs
+                # Bound the batches in memory to two per thread.
+                if len(pending) >= 2 * threads:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    _collect(done)
+            _collect(list(pending))
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        elapsed = time.monotonic() - started
+        logging.info(
+            f"Indexados: {success} documento(s) em {elapsed:.1f}s "
+            f"({success / elapsed if elapsed else 0:.0f} docs/s)"
         )
-        logging.info(f"Indexados: {success} documento(s)")
+        if percolator:
+            logging.info(f"Correspondências do percolator: {matches}")
         if errors:
             logging.info(f"Erros: {len(errors)}")
             for err in errors[:5]:
@@ -0,0 +1,327 @@
+"""Reverse search of DOU articles against the terms of every Ro-DOU DAG."""
+
+import hashlib
+import json
+import logging
+import uuid
+from datetime import date, timedelta
+
+from opensearchpy.helpers import bulk, scan  # type: ignore
+from .client_open_search import OpenSearchClient  # type: ignore
+from .config import (  # type: ignore
+    PERCOLATOR_INDEX_NAME,
+    PERCOLATOR_MAPPING,
+    PERCOLATOR_MATCHES_INDEX_NAME,
+    PERCOLATOR_MATCHES_MAPPING,
+)
+from .query_builder import OpenSearchQueryBuilder  # type: ignore
+
+
+class Percolator:
+    """Stores the text queries of all DAGs once and percolates the articles
+    of each day against them.
+
+    Each INLABS search of a DAG is identified by its
+    ``DAGConfig.search_key``. Every configured term of the search
+    is stored as a percolator query built with
+    ``OpenSearchQueryBuilder.build_texto_clause``. When a batch of articles
+    is indexed, ``percolate`` records which terms of which search matched
+    each article, so the digest DAG only has to look up its matches instead
+    of running its own full text query.
+
+    Only searches with a literal ``terms`` list are registered. Terms
+    fetched from a database or an Airflow variable are resolved at run time
+    and keep using the regular query path.
+
+    The queries of a search store the ``terms_hash`` of its terms and the
+    first publication date (``since``) percolated with them, so
+    ``is_registered`` tells whether the stored matches cover a search as
+    it is configured now.
+
+    Example usage::
+
+        percolator = Percolator()
+        percolator.register(dag_configs, "2024-04-02")
+        percolator.percolate(docs)
+        if percolator.is_registered("my_dag.1", terms_hash, "2024-04-01"):
+            percolator.matched_terms("my_dag.1", "2024-04-01", "2024-04-02")
+
+    Attributes:
+        RETENTION_DAYS (int): Age, in days, after which stored matches are
+            deleted by ``prune_matches``. Longer than the widest search
+            date range (``ANO``).
+    """
+
+    RETENTION_DAYS = 400
+
+    def __init__(self, client=None):
+        """Args:
+        client (OpenSearch, optional): OpenSearch client instance. A new
+            client is created when omitted.
+        """
+        self.client = client or OpenSearchClient().get_client()
+
+    def _ensure_indices(self):
+        """Create the percolator and matches indices if they do not exist."""
+        for index, mapping in (
+            (PERCOLATOR_INDEX_NAME, PERCOLATOR_MAPPING),
+            (PERCOLATOR_MATCHES_INDEX_NAME, PERCOLATOR_MATCHES_MAPPING),
+        ):
+            if not self.client.indices.exists(index=index):
+                self.client.indices.create(index=index, body=mapping)
+                logging.info(f"Índice '{index}' criado.")
+            else:
+                # Adds the fields of indices created by older versions.
+                self.client.indices.put_mapping(
+                    index=index, body=mapping["mappings"]
+                )
+
+    @staticmethod
+    def terms_hash(terms: list, terms_ignore: list = None) -> str:
+        """Return the hash of the terms of a search, regardless of their
+        order and of blank terms."""
+        content = {
+            "terms": sorted({term for term in terms if term and term.strip()}),
+            "terms_ignore": sorted({term for term in terms_ignore or [] if term}),
+        }
+        return hashlib.sha1(
+            json.dumps(content, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+    def _registered(self) -> dict:
+        """Return search key -> ``(terms_hash, since)`` of the stored
+        queries."""
+        registered = {}
+        for hit in scan(
+            self.client,
+            index=PERCOLATOR_INDEX_NAME,
+            query={"_source": ["search_key", "terms_hash", "since"]},
+        ):
+            source = hit["_source"]
+            registered[source["search_key"]] = (
+                source.get("terms_hash"),
+                source.get("since"),
+            )
+        return registered
+
+    @classmethod
+    def _percolator_actions(
+        cls, dag_configs, version: str, since: str, registered: dict = None
+    ):
+        """Yield one percolator query bulk action per registered term.
+
+        Args:
+            dag_configs (Iterable[DAGConfig]): Parsed DAG configurations.
+            version (str): Version of this registration.
+            since (str): First publication date percolated with the
+                queries of a search whose terms changed.
+            registered (dict, optional): Search key -> ``(terms_hash,
+                since)`` of the stored queries, as returned by
+                ``_registered``. The ``since`` of a search whose terms did
+                not change is kept.
+
+        Yields:
+            dict: Bulk action dict with ``_index``, ``_id``, and ``_source``.
+        """
+        registered = registered or {}
+        for specs in dag_configs:
+            for counter, search in enumerate(specs.search, 1):
+                if "INLABS" not in search.sources or not isinstance(
+                    search.terms, list
+                ):
+                    continue
+                search_key = specs.search_key(counter)
+                terms_hash = cls.terms_hash(search.terms, search.terms_ignore)
+                stored_hash, stored_since = registered.get(search_key, (None, None))
+                search_since = (
+                    stored_since
+                    if stored_hash == terms_hash and stored_since
+                    else since
+                )
+                must_not = [
+                    {"match_phrase": {"texto_plain": value}}
+                    for value in search.terms_ignore or []
+                    if value
+                ]
+                for term in search.terms:
+                    clause = (
+                        OpenSearchQueryBuilder.build_texto_clause(term)
+                        if term and term.strip()
+                        else {}
+                    )
+                    if not clause:
+                        continue
+                    query = {"bool": {"must": [clause]}}
+                    if must_not:
+                        query["bool"]["must_not"] = must_not
+                    yield {
+                        "_index": PERCOLATOR_INDEX_NAME,
+                        "_id": f"{search_key}:{term}",
+                        "_source": {
+                            "search_key": search_key,
+                            "term": term,
+                            "terms_hash": terms_hash,
+                            "version": version,
+                            "since": search_since,
+                            "query": query,
+                        },
+                    }
+
+    def register(self, dag_configs, since: str):
+        """Replace the stored percolator queries by the terms of `dag_configs`.
+
+        The new queries are written first and only then the queries of
+        previous registrations are deleted, so a concurrent search never
+        finds the percolator empty. If any query fails to be written, the
+        previous ones are kept.
+
+        Args:
+            dag_configs (Iterable[DAGConfig]): Parsed DAG configurations.
+            since (str): Publication date (``YYYY-MM-DD``) of the articles
+                about to be percolated.
+        """
+        self._ensure_indices()
+        version = uuid.uuid4().hex
+        success, errors = bulk(
+            self.client,
+            self._percolator_actions(dag_configs, version, since, self._registered()),
+            raise_on_error=False,
+            refresh=True,
+        )
+        logging.info(f"Consultas registradas no percolator: {success}")
+        if errors:
+            logging.info(f"Erros: {len(errors)}")
+            logging.warning("Consultas anteriores do percolator mantidas.")
+            return
+        self.client.delete_by_query(
+            index=PERCOLATOR_INDEX_NAME,
+            body={"query": {"bool": {"must_not": [{"term": {"version": version}}]}}},
+            refresh=True,
+        )
+
+    def is_registered(self, search_key: str, terms_hash: str, pubdate_from: str) -> bool:
+        """Return True if the queries of `search_key` were registered with
+        `terms_hash` and percolated since `pubdate_from` or earlier.
+
+        Args:
+            search_key (str): Key returned by ``DAGConfig.search_key``.
+            terms_hash (str): ``terms_hash`` of the terms of the search.
+            pubdate_from (str): First publication date (``YYYY-MM-DD``) of
+                the search.
+        """
+        if not self.client.indices.exists(index=PERCOLATOR_INDEX_NAME):
+            return False
+        query = {
+            "query": {
+                "bool": {
+                    "filter": [
+                        {"term": {"search_key": search_key}},
+                        {"term": {"terms_hash": terms_hash}},
+                        {"range": {"since": {"lte": pubdate_from}}},
+                    ]
+                }
+            }
+        }
+        return self.client.count(index=PERCOLATOR_INDEX_NAME, body=query)["count"] > 0
+
+    def prune_matches(self, reference_date: str) -> int:
+        """Delete the matches published ``RETENTION_DAYS`` or more before
+        `reference_date` (``YYYY-MM-DD``) and return how many."""
+        before = date.fromisoformat(reference_date) - timedelta(
+            days=self.RETENTION_DAYS
+        )
+        response = self.client.delete_by_query(
+            index=PERCOLATOR_MATCHES_INDEX_NAME,
+            body={"query": {"range": {"pubdate": {"lt": before.isoformat()}}}},
+        )
+        return response.get("deleted", 0)
+
+    def percolate(self, docs: list) -> int:
+        """Percolate a batch of indexed articles and store their matches.
+
+        Args:
+            docs (list[dict]): Article documents with ``id``, ``pubdate`` and
+                ``texto_plain``.
+
+        Returns:
+            int: Number of (search, term, article) matches stored.
+
+        Raises:
+            RuntimeError: If any match fails to be stored.
+        """
+        if not docs:
+            return 0
+
+        query = {
+            "query": {
+                "percolate": {
+                    "field": "query",
+                    "documents": [
+                        {"texto_plain": doc.get("texto_plain", "")} for doc in docs
+                    ],
+                }
+            }
+        }
+
+        actions = []
+        for hit in scan(self.client, index=PERCOLATOR_INDEX_NAME, query=query):
+            source = hit["_source"]
+            slots = hit.get("fields", {}).get("_percolator_document_slot", [0])
+            for slot in slots:
+                doc = docs[slot]
+                actions.append(
+                    {
+                        "_index": PERCOLATOR_MATCHES_INDEX_NAME,
+                        "_id": f"{source['search_key']}:{source['term']}:{doc['id']}",
+                        "_source": {
+                            "search_key": source["search_key"],
+                            "term": source["term"],
+                            "doc_id": str(doc["id"]),
+                            "pubdate": doc["pubdate"],
+                        },
+                    }
+                )
+
+        if actions:
+            success, errors = bulk(self.client, actions, raise_on_error=False)
+            if errors:
+                # The search would be reported as registered without them.
+                logging.error(f"Erros ao gravar matches do percolator: {errors[:5]}")
+                raise RuntimeError(
+                    f"{len(errors)} of {len(actions)} percolator matches not stored"
+                )
+        return len(actions)
+
+    def matched_terms(self, search_key: str, pubdate_from: str, pubdate_to: str) -> dict:
+        """Return the stored matches of a search in a publication date range.
+
+        Args:
+            search_key (str): Key returned by ``DAGConfig.search_key``.
+            pubdate_from (str): First publication date (``YYYY-MM-DD``).
+            pubdate_to (str): Last publication date (``YYYY-MM-DD``).
+
+        Returns:
+            dict: Article id -> list of matched terms.
+        """
+        query = {
+            "query": {
+                "bool": {
+                    "filter": [
+                        {"term": {"search_key": search_key}},
+                        {
+                            "range": {
+                                "pubdate": {"gte": pubdate_from, "lte": pubdate_to}
+                            }
+                        },
+                    ]
+                }
+            }
+        }
+
+        matches: dict = {}
+        for hit in scan(
+            self.client, index=PERCOLATOR_MATCHES_INDEX_NAME, query=query
+        ):
+            source = hit["_source"]
+            matches.setdefault(source["doc_id"], []).append(source["term"])
+        return matches
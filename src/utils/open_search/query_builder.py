@@ -20,6 +20,8 @@ class OpenSearchQueryBuilder:
     - ``identifica``, ``titulo``, ``subtitulo``, ``name``: title/name filters
       (match-phrase).
     - ``terms_ignore``: exact phrases to exclude from ``texto_plain``.
+    - ``name_expressions``: if True, also name each ``texto`` expression
+      clause with the whole expression (see ``build_texto_clause``).
 
     Example usage::
 
@@ -33,6 +35,8 @@ class OpenSearchQueryBuilder:
         response = client.search(body=query_body, index=INDEX_NAME)
     """
 
+    EXPRESSION_NAME_PREFIX = "expression:"
+
     def __init__(self):
         self.payload: dict
 
@@ -275,10 +279,36 @@ class OpenSearchQueryBuilder:
         return {}
 
     @classmethod
-    def build_texto_clause(cls, expression: str) -> dict:
-        """Build a named OpenSearch clause for one configured text expression."""
+    def build_texto_clause(cls, expression: str, name_expression: bool = False) -> dict:
+        """Build a named OpenSearch clause for one configured text expression.
+
+        When ``name_expression`` is True the clause is also named with the
+        whole expression (prefixed by ``EXPRESSION_NAME_PREFIX``), so
+        ``matched_queries`` tells which expressions fully matched a hit.
+        """
         node = cls._parse_texto_expression(expression)
-        return cls._texto_node_to_clause(node)
+        clause = cls._texto_node_to_clause(node)
+        if clause and name_expression:
+            return {
+                "bool": {
+                    "must": [clause],
+                    "_name": cls.EXPRESSION_NAME_PREFIX + expression,
+                }
+            }
+        return clause
+
+    @classmethod
+    def texto_terms(cls, expression: str) -> list:
+        """Return the terms of a text expression, as named in its clauses."""
+
+        def collect(node):
+            if not node:
+                return []
+            if node[0] == "TERM":
+                return [node[1]]
+            return [term for child in node[1:] for term in collect(child)]
+
+        return collect(cls._parse_texto_expression(expression))
 
     def _generate_opensearch_query(self) -> dict:
         """Build an OpenSearch bool query body from ``self.payload``.
@@ -321,7 +351,10 @@ class OpenSearchQueryBuilder:
         for key, values in filtered_dict.items():
             if key == "texto":
                 phrase_clauses = [
-                    self.build_texto_clause(term)
+                    self.build_texto_clause(
+                        term,
+                        name_expression=self.payload.get("name_expressions", False),
+                    )
                     for term in values
                     if term and term.strip()
                 ]
@@ -0,0 +1,136 @@
+"""Bulk load records into Postgres with ``COPY FROM STDIN``."""
+
+import logging
+from datetime import date
+from typing import Callable, Iterable, Iterator, List, Optional
+
+
+def _csv_field(value) -> str:
+    """Unquoted empty fields are NULL, every other value is quoted."""
+    if value is None:
+        return ""
+    if isinstance(value, date):
+        value = value.isoformat()
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+class CopyStream:
+    """File-like object reading `records` as the CSV rows of `columns`.
+
+    Rows are produced as ``COPY`` reads them, so the records are never
+    all in memory. Keys of the records which are not in `columns` are
+    skipped with a warning.
+
+    Example usage::
+
+        stream = CopyStream(records, ["id", "texto"])
+        cursor.copy_expert("COPY t (id, texto) FROM STDIN WITH (FORMAT csv)", stream)
+        stream.rows
+    """
+
+    def __init__(self, records: Iterable[dict], columns: List[str]):
+        self.columns = columns
+        self.rows = 0
+        self._lines = self._iter_lines(iter(records))
+        self._buffer = ""
+        self._pos = 0
+        self._unknown = set()
+
+    def _iter_lines(self, records: Iterator[dict]) -> Iterator[str]:
+        known = set(self.columns)
+        for record in records:
+            unknown = record.keys() - known - self._unknown
+            if unknown:
+                logging.warning("Skipping unknown columns: %s", sorted(unknown))
+                self._unknown |= unknown
+            self.rows += 1
+            yield ",".join(_csv_field(record.get(col)) for col in self.columns) + "\n"
+
+    def read(self, size: Optional[int] = -1) -> str:
+        if size is None or size < 0:
+            data = self._buffer[self._pos :] + "".join(self._lines)
+            self._buffer, self._pos = "", 0
+            return data
+        chunks = []
+        while size > 0:
+            if self._pos >= len(self._buffer):
+                self._buffer, self._pos = next(self._lines, ""), 0
+                if not self._buffer:
+                    break
+            chunk = self._buffer[self._pos : self._pos + size]
+            self._pos += len(chunk)
+            size -= len(chunk)
+            chunks.append(chunk)
+        return "".join(chunks)
+
+
+def table_columns(cursor, table: str) -> List[str]:
+    """Return the columns of `table` (``schema.name``) in order, without
+    the generated ones, which cannot be written."""
+    schema, name = table.split(".", maxsplit=1)
+    cursor.execute(
+        """
+        SELECT column_name
+            FROM information_schema.columns
+            WHERE table_schema = %s AND table_name = %s AND is_generated = 'NEVER'
+            ORDER BY ordinal_position
+        """,
+        (schema, name),
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def replace_day(
+    connection,
+    table: str,
+    reference_date: str,
+    records: Iterable[dict],
+    prepare: Optional[Callable] = None,
+) -> int:
+    """Replace the rows of `table` published on `reference_date` by
+    `records` in a single transaction, and return the rows loaded.
+
+    `records` may also hold rows of other days, e.g. of an extra edition
+    or of a previous run. These replace the rows with the same ``id`` and
+    ``pubdate``, so a rerun does not violate the primary key.
+
+    The records are copied into a temporary staging table, which is not
+    WAL-logged, and only then swapped for the day's rows, so readers see
+    either the previous or the new load and a failed load leaves the
+    table untouched. `prepare`, if given, is called with the cursor and
+    the name of the staging table before the swap, e.g. to create the
+    partitions of the staged rows.
+    """
+    stage = f"{table.split('.')[-1]}_stage"
+    try:
+        with connection.cursor() as cursor:
+            columns = table_columns(cursor, table)
+            column_list = ", ".join(columns)
+            cursor.execute(
+                f"CREATE TEMP TABLE {stage} (LIKE {table} INCLUDING DEFAULTS) "
+                "ON COMMIT DROP"
+            )
+            stream = CopyStream(records, columns)
+            cursor.copy_expert(
+                f"COPY {stage} ({column_list}) FROM STDIN WITH (FORMAT csv)", stream
+            )
+            if prepare is not None:
+                prepare(cursor, stage)
+            cursor.execute(
+                f"DELETE FROM {table} "
+                "WHERE pubdate >= %(day)s::date AND pubdate < %(day)s::date + 1",
+                {"day": reference_date},
+            )
+            cursor.execute(
+                f"DELETE FROM {table} t USING {stage} s "
+                "WHERE t.id = s.id AND t.pubdate = s.pubdate"
+            )
+            cursor.execute(
+                f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {stage}"
+            )
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+
+    return stream.rows
@@ -0,0 +1,50 @@
+"""Limit the rate of requests shared by many threads."""
+
+import threading
+import time
+
+
+class TokenBucket:
+    """Thread-safe token bucket.
+
+    The bucket holds up to `capacity` tokens and is refilled with `rate`
+    tokens per second. Every request takes one token, waiting for it if
+    the bucket is empty, so the threads sharing the bucket never exceed
+    `rate` requests per second (after an initial burst of `capacity`).
+
+    Example usage::
+
+        bucket = TokenBucket(rate=2)
+        for url in urls:
+            bucket.acquire()
+            requests.get(url)
+    """
+
+    def __init__(self, rate: float, capacity: float = 1):
+        """Args:
+        rate (float): Requests per second. Zero or less disables the
+            limit.
+        capacity (float): Maximum burst of requests. Defaults to 1.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, blocking until one is available."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
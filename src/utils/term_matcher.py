@@ -0,0 +1,160 @@
+"""Match a fixed list of terms against many texts in a single pass."""
+
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Iterable, List
+
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_SPACES_RE = re.compile(r"\s+")
+
+
+def plain_text(html: str) -> str:
+    """Return `html` without tags and with collapsed whitespace."""
+    return _SPACES_RE.sub(" ", _TAG_RE.sub(" ", html or "")).strip()
+
+
+def normalize(text: str) -> str:
+    """Normalize text by removing accents and converting to lowercase.
+
+    Returns an empty string when `text` is not a string.
+    """
+    return (
+        unicodedata.normalize("NFKD", text)
+        .encode("ascii", "ignore")
+        .decode("ascii")
+        .lower()
+        if isinstance(text, str)
+        else ""
+    )
+
+
+def _trie_pattern(terms: Iterable[str]) -> str:
+    """Return a regex alternation of `terms` shaped as a prefix tree.
+
+    Terms sharing a prefix share the same branch, so the regex engine
+    walks the tree once per text position instead of trying every term.
+    Longer terms are tried first and shorter ones on backtracking.
+    """
+    trie: dict = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def _pattern(node: dict) -> str:
+        branches = [
+            re.escape(char) + _pattern(child)
+            for char, child in sorted(node.items())
+            if char
+        ]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        return f"(?:{body})?" if "" in node else body
+
+    return _pattern(trie)
+
+
+class TermMatcher:
+    """Finds and highlights whole-word occurrences of `terms` in texts.
+
+    Terms and texts are compared after ``normalize``, so "Ministerio"
+    matches "Ministério". The terms are compiled once into a single
+    prefix tree regex and each text is scanned in one pass.
+
+    Use ``TermMatcher.cached`` to reuse the matcher of a list of terms
+    across the records of a search.
+
+    Example usage::
+
+        matcher = TermMatcher.cached(["pregão", "pregão eletrônico"])
+        matcher.find("Aviso de Pregão Eletrônico")
+        # ['pregão', 'pregão eletrônico']
+        matcher.highlight("Aviso de Pregão Eletrônico")
+        # 'Aviso de <%%>Pregão Eletrônico</%%>'
+    """
+
+    def __init__(self, terms: Iterable[str]):
+        self.terms = [term for term in dict.fromkeys(terms) if term]
+        self._originals: dict = {}
+        for term in self.terms:
+            self._originals.setdefault(normalize(term), []).append(term)
+        self._direct_pattern = None
+
+        if not self._originals:
+            self._find_pattern = self._highlight_pattern = None
+            return
+
+        trie = _trie_pattern(self._originals)
+        # The lookahead reports matches starting at every word boundary,
+        # including matches overlapping a previous one.
+        self._find_pattern = re.compile(rf"\b(?=({trie})\b)")
+        self._highlight_pattern = re.compile(rf"\b({trie})\b")
+
+        # Terms that also match wherever a longer term matches, as they
+        # are one of its prefixes ending at a word boundary.
+        self._prefixes = {
+            term: [
+                term[: boundary.start()]
+                for boundary in re.finditer(r"\b", term)
+                if 0 < boundary.start() < len(term)
+                and term[: boundary.start()] in self._originals
+            ]
+            for term in self._originals
+        }
+
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _cached(terms: tuple) -> "TermMatcher":
+        return TermMatcher(terms)
+
+    @classmethod
+    def cached(cls, terms: Iterable[str]) -> "TermMatcher":
+        """Return a shared matcher of `terms`, building it only once."""
+        return cls._cached(tuple(terms))
+
+    def find(self, text: str) -> List[str]:
+        """Return the terms found in `text`, sorted case-insensitively."""
+        if self._find_pattern is None:
+            return []
+        found = set()
+        for match in self._find_pattern.finditer(normalize(text)):
+            found.add(match.group(1))
+            found.update(self._prefixes[match.group(1)])
+        return sorted(
+            (term for key in found for term in self._originals[key]),
+            key=str.lower,
+        )
+
+    def highlight(self, text: str) -> str:
+        """Wrap the terms found in `text` with `<%%>` and `</%%>`.
+
+        Positions found in the normalized text are mapped back to the
+        original text, which is safe while ``normalize`` maps each
+        character to exactly one character. Otherwise the original text
+        is matched case-insensitively without normalization.
+        """
+        if self._highlight_pattern is None:
+            return text
+
+        normalized_text = normalize(text)
+        if len(normalized_text) != len(text):
+            if self._direct_pattern is None:
+                self._direct_pattern = re.compile(
+                    rf"\b({_trie_pattern(term.lower() for term in self.terms)})\b",
+                    re.IGNORECASE,
+                )
+            return self._direct_pattern.sub(r"<%%>\1</%%>", text)
+
+        result = []
+        last_end = 0
+        for match in self._highlight_pattern.finditer(normalized_text):
+            result.append(text[last_end : match.start()])
+            result.append(f"<%%>{text[match.start() : match.end()]}</%%>")
+            last_end = match.end()
+        result.append(text[last_end:])
+
+        return "".join(result)
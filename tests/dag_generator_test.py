@@ -1,12 +1,19 @@
 """DouDagGenerator unit tests
 """
 
+import time
+
 import pandas as pd
 import pytest
-from dags.ro_dou_src.dou_dag_generator import _channel_name_from_url, merge_results
+from dags.ro_dou_src.dou_dag_generator import (
+    DouDigestDagGenerator,
+    _channel_name_from_url,
+    merge_results,
+)
 from dags.ro_dou_src.notification.email_sender import EmailSender, repack_match
 from airflow.sdk.definitions.asset import Dataset
 from airflow.timetables.assets import AssetOrTimeSchedule
+from utils import deadline
 
 
 def test_repack_match(report_example):
@@ -111,6 +118,87 @@ def test_merge_results(merge_results_samples):
     assert merged_result == merge_results_samples[2]
 
 
+def _slow(result, seconds=0.3):
+    def search():
+        time.sleep(seconds)
+        return result
+
+    return search
+
+
+def test_run_searches_runs_sources_concurrently(merge_results_samples):
+    started = time.monotonic()
+    result = DouDigestDagGenerator._run_searches(
+        {
+            "QD": _slow(merge_results_samples[0]),
+            "DOU": _slow(merge_results_samples[1]),
+        }
+    )
+
+    assert time.monotonic() - started < 0.55
+    assert result == merge_results_samples[2]
+
+
+def test_run_searches_single_source_result_is_unchanged():
+    result = {"single_group": {}}
+
+    assert DouDigestDagGenerator._run_searches({"DOESP": lambda: result}) is result
+    assert DouDigestDagGenerator._run_searches({}) == {}
+
+
+def test_run_searches_source_timeout(monkeypatch, merge_results_samples):
+    monkeypatch.setenv("RO_DOU__QD_SEARCH_TIMEOUT", "0.1")
+
+    with pytest.raises(TimeoutError, match="QD"):
+        DouDigestDagGenerator._run_searches(
+            {
+                "QD": _slow(merge_results_samples[0], 1),
+                "DOU": lambda: merge_results_samples[1],
+            }
+        )
+
+
+def test_run_searches_merges_in_source_order(merge_results_samples):
+    result = DouDigestDagGenerator._run_searches(
+        {
+            "QD": _slow(merge_results_samples[0]),
+            "DOU": lambda: merge_results_samples[1],
+        }
+    )
+
+    assert result == merge_results_samples[2]
+
+
+def test_run_searches_stops_source_at_deadline(monkeypatch):
+    monkeypatch.setenv("RO_DOU__QD_SEARCH_TIMEOUT", "0.1")
+    pages = []
+
+    def search():
+        while True:
+            deadline.check()
+            pages.append(1)
+            time.sleep(0.01)
+
+    with pytest.raises(TimeoutError, match="QD"):
+        DouDigestDagGenerator._run_searches({"QD": search})
+    time.sleep(0.1)
+    searched = len(pages)
+    time.sleep(0.1)
+
+    assert len(pages) == searched
+
+
+def test_deadline_caps_timeouts():
+    assert deadline.timeout(10) == 10
+    with deadline.deadline(1):
+        assert deadline.timeout(10) <= 1
+        assert deadline.timeout(None) <= 1
+        assert deadline.propagate(deadline.remaining)() <= 1
+    with deadline.deadline(0):
+        with pytest.raises(deadline.DeadlineExceeded):
+            deadline.timeout(10)
+
+
 @pytest.mark.parametrize(
     "url, expected_channel",
     [
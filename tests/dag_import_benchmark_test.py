@@ -0,0 +1,78 @@
+"""Import-time budget of the DAG generation module.
+
+``dou_dag_generator`` is imported, and generates every DAG, on each
+parse of the DAG files, so it must not import the dependencies used only
+by the tasks. The module is imported in a fresh interpreter with
+``python -X importtime``, as ``test_dag_loading.py`` does.
+
+The timing test is skipped by default. Run with::
+
+    RO_DOU_BENCHMARK=1 pytest -s dag_import_benchmark_test.py
+
+The budget, in seconds, can be changed with ``RO_DOU_IMPORT_BUDGET``.
+"""
+
+import os
+import subprocess
+import sys
+from typing import Dict
+
+import pytest
+from dags.ro_dou_src import dou_dag_generator
+
+# Resolved from the package, as the tests and the code are not siblings in
+# the container (/opt/airflow/tests and /opt/airflow/dags/ro_dou_src).
+SRC_DIR = os.path.dirname(os.path.abspath(dou_dag_generator.__file__))
+
+TASK_ONLY_MODULES = ["pandas", "bs4", "html2text", "opensearchpy", "apprise"]
+
+IMPORT_BUDGET = float(os.getenv("RO_DOU_IMPORT_BUDGET", 5))
+
+
+def _import_times() -> Dict[str, int]:
+    """Return the cumulative import time, in microseconds, of every
+    module imported by ``dou_dag_generator``."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import dou_dag_generator"],
+        cwd=SRC_DIR,
+        env={
+            **os.environ,
+            "PYTHONPATH": os.pathsep.join(
+                [SRC_DIR, os.getenv("PYTHONPATH", "")]
+            ),
+        },
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.fixture(scope="module")
+def import_times() -> Dict[str, int]:
+    return _import_times()
+
+
+def test_task_only_dependencies_are_not_imported(import_times):
+    imported = {name.split(".")[0] for name in import_times}
+
+    assert imported.isdisjoint(TASK_ONLY_MODULES)
+
+
+@pytest.mark.skipif(
+    not os.getenv("RO_DOU_BENCHMARK"), reason="RO_DOU_BENCHMARK not set"
+)
+def test_import_time_budget(import_times):
+    seconds = import_times["dou_dag_generator"] / 1_000_000
+    slowest = sorted(import_times.items(), key=lambda item: -item[1])[:10]
+    print(f"\ndou_dag_generator: {seconds:.2f}s (orçamento {IMPORT_BUDGET}s)")
+    for name, cumulative in slowest:
+        print(f"  {cumulative / 1_000_000:.3f}s {name}")
+
+    assert seconds < IMPORT_BUDGET
@@ -0,0 +1,80 @@
+"""Benchmark of the extraction of the results of a DOU search page.
+
+Skipped by default. Run with::
+
+    RO_DOU_BENCHMARK=1 pytest -s dou_hook_benchmark_test.py
+"""
+
+import json
+import os
+import time
+
+import pytest
+
+from hooks.dou_hook import DOUHook
+
+pytestmark = pytest.mark.skipif(
+    not os.getenv("RO_DOU_BENCHMARK"), reason="RO_DOU_BENCHMARK not set"
+)
+
+PAGES = 20
+
+
+def _search_page(page: int) -> bytes:
+    """A search page shaped like the in.gov.br ones: a large portal
+    layout around the 20 results of the page."""
+    results = [
+        {
+            "pubName": "DO1",
+            "title": f"PORTARIA Nº {page * 20 + i}, DE 1º DE ABRIL DE 2024",
+            "urlTitle": f"portaria-n-{page * 20 + i}-de-1-de-abril-de-2024",
+            "content": "Estabelece <span class='highlight'>procedimentos</span> "
+            "para o recebimento e o tratamento de manifestações...",
+            "pubDate": "01/04/2024",
+            "classPK": str(page * 20 + i),
+            "displayDateSortable": "20240401",
+            "hierarchyList": ["Ministério da Gestão", "SEGES"],
+            "hierarchyStr": "Ministério da Gestão/SEGES",
+            "artType": "Portaria",
+        }
+        for i in range(20)
+    ]
+    layout = "".join(
+        f'<div class="portlet" id="p{i}"><ul>'
+        + "".join(f'<li><a href="/web/{i}/{j}">Item {j}</a></li>' for j in range(20))
+        + "</ul></div>"
+        for i in range(150)
+    )
+    return (
+        "<!DOCTYPE html><html><head><title>Busca - DOU</title></head><body>"
+        f"{layout}"
+        '<div class="pagination"><button id="2btn">2</button>'
+        '<button id="lastPage">10</button></div>'
+        f'<script type="application/json" id="{DOUHook.RESULTS_SCRIPT_ID}">'
+        f'{json.dumps({"jsonArray": results})}</script>'
+        f"{layout}</body></html>"
+    ).encode("utf-8")
+
+
+def _elapsed(parse, pages) -> float:
+    start = time.perf_counter()
+    for page in pages:
+        parse(page)
+    return time.perf_counter() - start
+
+
+def test_parse_page_benchmark():
+    pages = [_search_page(page) for page in range(PAGES)]
+
+    soup_time = _elapsed(DOUHook._parse_page_soup, pages)
+    scan_time = _elapsed(DOUHook._parse_page, pages)
+    print(
+        f"\n{PAGES} pages of {len(pages[0]) // 1024} KB: "
+        f"BeautifulSoup {soup_time:.3f}s, scan {scan_time:.3f}s "
+        f"({soup_time / scan_time:.0f}x)"
+    )
+
+    assert all(
+        DOUHook._parse_page(page) == DOUHook._parse_page_soup(page) for page in pages
+    )
+    assert scan_time < soup_time
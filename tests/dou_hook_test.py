@@ -0,0 +1,151 @@
+import json
+from unittest.mock import patch
+
+import pytest
+import requests
+
+from hooks.dou_hook import DOUHook
+from utils.http_cache import HTTPCache
+from utils.search_domains import Field
+
+
+class FakeResponse:
+    def __init__(self, status=200, headers=None, content=None):
+        self.status_code = status
+        self.headers = headers or {}
+        self.url = DOUHook.IN_API_BASE_URL
+        self.content = _page([]) if content is None else content
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"HTTP {self.status_code}")
+
+
+@pytest.fixture
+def dou_hook(monkeypatch) -> DOUHook:
+    monkeypatch.setattr(DOUHook.rate_limiter, "rate", 0)
+    monkeypatch.setattr(DOUHook.cache, "ttl", 0)
+    return DOUHook()
+
+
+def test_request_page_honors_retry_after(dou_hook):
+    responses = [
+        FakeResponse(429, {"Retry-After": "7"}),
+        requests.exceptions.ConnectionError("reset"),
+        FakeResponse(200),
+    ]
+
+    with patch.object(
+        DOUHook.session, "get", side_effect=responses
+    ) as mock_get, patch("hooks.dou_hook.time.sleep") as mock_sleep, patch(
+        "hooks.dou_hook.random", return_value=0.5
+    ):
+        response = dou_hook._request_page(with_retry=True, payload={"q": "SEGES"})
+
+    assert response.status_code == 200
+    assert mock_get.call_count == 3
+    # Retry-After, then the backoff of the second attempt with jitter.
+    assert [c.args[0] for c in mock_sleep.call_args_list] == [7.0, 3.0]
+    stats = dou_hook.latency_stats()
+    assert stats["requests"] == 3
+    assert stats["retries"] == 2
+    assert dou_hook.latency_stats() == {"requests": 0, "retries": 0}
+
+
+def test_request_page_without_retry_raises(dou_hook):
+    with patch.object(
+        DOUHook.session, "get", return_value=FakeResponse(503)
+    ), patch("hooks.dou_hook.time.sleep") as mock_sleep:
+        with pytest.raises(requests.exceptions.HTTPError):
+            dou_hook._request_page(with_retry=False, payload={"q": "SEGES"})
+
+    mock_sleep.assert_not_called()
+
+
+def test_request_page_retries_page_without_results_script(dou_hook):
+    error_page = FakeResponse(200, content=b"<html><body>Erro</body></html>")
+
+    with patch.object(
+        DOUHook.session, "get", side_effect=[error_page, FakeResponse(200)]
+    ) as mock_get, patch("hooks.dou_hook.time.sleep") as mock_sleep:
+        response = dou_hook._request_page(with_retry=True, payload={"q": "SEGES"})
+
+    assert dou_hook._parse_page(response.content)[1] == []
+    assert mock_get.call_count == 2
+    mock_sleep.assert_called_once()
+
+
+def test_request_page_returns_page_without_results_script_after_retries(dou_hook):
+    error_page = FakeResponse(200, content=b"<html><body>Erro</body></html>")
+
+    with patch.object(
+        DOUHook.session, "get", return_value=error_page
+    ) as mock_get, patch("hooks.dou_hook.time.sleep"):
+        response = dou_hook._request_page(with_retry=True, payload={"q": "SEGES"})
+
+    assert response is error_page
+    assert mock_get.call_count == DOUHook.MAX_RETRIES + 1
+
+
+def _page(results, pagination=""):
+    params = json.dumps({"jsonArray": results})
+    return (
+        "<html><head><title>Busca</title></head><body>"
+        f'<div class="pagination">{pagination}</div>'
+        '<script type="application/json" '
+        f'id="{DOUHook.RESULTS_SCRIPT_ID}">{params}</script>'
+        "</body></html>"
+    ).encode("utf-8")
+
+
+@pytest.mark.parametrize(
+    "pagination, number_pages",
+    [
+        ("", 1),
+        ('<button id="2btn">2</button>', 2),
+        ('<button id="2btn">2</button><button id="lastPage"> 7 </button>', 7),
+        ('<button class="btn" id="lastPage"><span>12</span></button>', 12),
+    ],
+)
+def test_parse_page_matches_soup_parse(pagination, number_pages):
+    content = _page(
+        [{"title": "Portaria nº 1 <b>SEGES</b>", "pubName": "DO1"}], pagination
+    )
+
+    assert DOUHook._parse_page(content) == DOUHook._parse_page_soup(content)
+    assert DOUHook._parse_page(content)[0] == number_pages
+
+
+def test_parse_page_without_results_script():
+    content = b'<html><body><button id="lastPage">3</button></body></html>'
+
+    assert DOUHook._parse_page(content) == (3, None)
+
+
+def test_request_page_caches_only_pages_with_results(dou_hook, monkeypatch, tmp_path):
+    monkeypatch.setattr(DOUHook, "cache", HTTPCache("dou", 60, str(tmp_path / "c")))
+    responses = {"SEGES": _page([]), "SOF": b"<html><body>Erro</body></html>"}
+
+    def _get(url, params, **kwargs):
+        response = requests.Response()
+        response.status_code, response.url = 200, url
+        response._content = responses[params["q"]]
+        return response
+
+    with patch.object(DOUHook.session, "get", side_effect=_get) as mock_get:
+        for _ in range(2):
+            dou_hook._request_page(with_retry=False, payload={"q": "SEGES"})
+            dou_hook._request_page(with_retry=False, payload={"q": "SOF"})
+
+    assert [c.kwargs["params"]["q"] for c in mock_get.call_args_list] == [
+        "SEGES",
+        "SOF",
+        "SOF",
+    ]
+
+
+def test_get_query_str_joins_terms(dou_hook):
+    assert (
+        dou_hook._get_query_str(["SEGES", "Ministério da Gestão"], Field.TUDO, True)
+        == '"SEGES" OR "Ministério da Gestão"'
+    )
@@ -0,0 +1,128 @@
+import io
+import os
+import zipfile
+
+import pytest
+import requests
+
+from utils.downloader import DownloadError, Downloader
+
+
+def _zip_bytes(name="artigo.xml", content=b"<xml/>" * 1000) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        zip_file.writestr(name, content)
+    return buffer.getvalue()
+
+
+class FakeResponse:
+    def __init__(self, body, status=200, headers=None, fail_after=None):
+        self.body = body
+        self.status_code = status
+        self.headers = headers or {}
+        self.fail_after = fail_after
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"HTTP {self.status_code}")
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), 10):
+            if self.fail_after is not None and start >= self.fail_after:
+                raise requests.exceptions.ChunkedEncodingError("connection reset")
+            yield self.body[start : start + 10]
+
+
+class FakeSession(requests.Session):
+    """Serves `files`, dropping the connection of the first response
+    of the urls in `interrupt` halfway."""
+
+    def __init__(self, files, interrupt=(), honor_range=True):
+        super().__init__()
+        self.files = files
+        self.interrupt = set(interrupt)
+        self.honor_range = honor_range
+        self.ranges = []
+
+    def get(self, url, headers=None, **kwargs):
+        body = self.files[url]
+        fail_after = None
+        if url in self.interrupt:
+            self.interrupt.remove(url)
+            fail_after = len(body) // 2
+        range_header = (headers or {}).get("Range")
+        self.ranges.append(range_header)
+        if range_header and self.honor_range:
+            start = int(range_header[len("bytes=") : -1])
+            return FakeResponse(
+                body[start:],
+                206,
+                {"Content-Range": f"bytes {start}-{len(body) - 1}/{len(body)}"},
+            )
+        return FakeResponse(
+            body, headers={"Content-Length": str(len(body))}, fail_after=fail_after
+        )
+
+
+def test_download_all_yields_every_file(tmp_path):
+    files = {f"https://inlabs/{i}": _zip_bytes(f"{i}.xml") for i in range(5)}
+    downloader = Downloader(FakeSession(files), max_workers=3)
+
+    paths = list(
+        downloader.download_all(
+            {url: str(tmp_path / f"{i}.zip") for i, url in enumerate(files)}
+        )
+    )
+
+    assert sorted(paths) == sorted(str(tmp_path / f"{i}.zip") for i in range(5))
+    for i, url in enumerate(files):
+        assert (tmp_path / f"{i}.zip").read_bytes() == files[url]
+    assert not list(tmp_path.glob("*.part"))
+
+
+@pytest.mark.parametrize("honor_range", [True, False])
+def test_interrupted_download_is_resumed(tmp_path, honor_range):
+    body = _zip_bytes()
+    session = FakeSession(
+        {"https://inlabs/a": body}, interrupt=["https://inlabs/a"], honor_range=honor_range
+    )
+
+    path = Downloader(session).download("https://inlabs/a", str(tmp_path / "a.zip"))
+
+    assert open(path, "rb").read() == body
+    assert session.ranges[0] is None
+    # The bytes written before the connection dropped are not requested again.
+    written = -(-(len(body) // 2) // 10) * 10
+    assert session.ranges[1] == f"bytes={written}-"
+
+
+def test_truncated_download_is_rejected(tmp_path):
+    body = _zip_bytes()
+
+    class TruncatingSession(FakeSession):
+        def get(self, url, headers=None, **kwargs):
+            return FakeResponse(body[:-5], headers={"Content-Length": str(len(body))})
+
+    with pytest.raises(DownloadError, match="expected"):
+        Downloader(TruncatingSession({})).download(
+            "https://inlabs/a", str(tmp_path / "a.zip")
+        )
+
+    assert not os.listdir(tmp_path)
+
+
+def test_corrupted_zip_is_rejected(tmp_path):
+    body = bytearray(_zip_bytes())
+    body[40] ^= 0xFF
+    session = FakeSession({"https://inlabs/a": bytes(body)})
+
+    with pytest.raises(DownloadError):
+        Downloader(session).download("https://inlabs/a", str(tmp_path / "a.zip"))
+
+    assert not os.listdir(tmp_path)
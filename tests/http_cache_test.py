@@ -0,0 +1,86 @@
+import sqlite3
+from unittest.mock import Mock, patch
+
+import pytest
+import requests
+
+from utils.http_cache import HTTPCache
+
+URL = "https://www.in.gov.br/consulta/-/buscar/dou"
+
+
+def _response(status=200, content=b'{"jsonArray": []}'):
+    response = requests.Response()
+    response.status_code = status
+    response.url = URL
+    response.headers["Content-Type"] = "text/html; charset=UTF-8"
+    response._content = content
+    return response
+
+
+@pytest.fixture
+def cache(tmp_path) -> HTTPCache:
+    return HTTPCache("dou", ttl=60, path=str(tmp_path / "cache.sqlite"))
+
+
+def test_fetch_serves_cached_response(cache):
+    request = Mock(return_value=_response())
+
+    first = cache.fetch(URL, {"q": "SEGES", "s": "do1"}, request)
+    second = cache.fetch(URL, {"s": "do1", "q": "SEGES"}, request)
+
+    request.assert_called_once()
+    assert second.status_code == 200
+    assert second.content == first.content
+    assert second.text == '{"jsonArray": []}'
+    assert second.headers["content-type"] == "text/html; charset=UTF-8"
+    assert cache.stats() == {"hits": 1, "misses": 1}
+    assert cache.stats() == {"hits": 0, "misses": 0}
+
+
+def test_cache_is_shared_by_instances_of_the_same_source(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    HTTPCache("dou", ttl=60, path=path).set(URL, {"q": "SEGES"}, _response())
+
+    assert HTTPCache("dou", ttl=60, path=path).get(URL, {"q": "SEGES"}) is not None
+    assert HTTPCache("qd", ttl=60, path=path).get(URL, {"q": "SEGES"}) is None
+
+
+def test_cache_keeps_the_rollback_journal(cache):
+    cache.set(URL, {"q": "SEGES"}, _response())
+
+    with sqlite3.connect(cache.path) as connection:
+        (mode,) = connection.execute("PRAGMA journal_mode").fetchone()
+    assert mode == "delete"
+
+
+def test_response_expires_after_ttl(cache):
+    cache.set(URL, {"q": "SEGES"}, _response())
+
+    with patch("utils.http_cache.time.time", return_value=2e9 + 61):
+        assert cache.get(URL, {"q": "SEGES"}) is None
+
+
+def test_failed_response_is_not_cached(cache):
+    cache.set(URL, {"q": "SEGES"}, _response(status=503))
+
+    assert cache.get(URL, {"q": "SEGES"}) is None
+
+
+def test_zero_ttl_disables_cache(tmp_path):
+    cache = HTTPCache("dou", ttl=0, path=str(tmp_path / "cache.sqlite"))
+    request = Mock(return_value=_response())
+
+    cache.fetch(URL, {"q": "SEGES"}, request)
+    cache.fetch(URL, {"q": "SEGES"}, request)
+
+    assert request.call_count == 2
+    assert not (tmp_path / "cache.sqlite").exists()
+
+
+def test_unavailable_cache_is_a_miss(tmp_path):
+    cache = HTTPCache("dou", ttl=60, path=str(tmp_path / "missing" / "cache.sqlite"))
+    request = Mock(return_value=_response())
+
+    assert cache.fetch(URL, {"q": "SEGES"}, request).status_code == 200
+    assert cache.stats() == {"hits": 0, "misses": 1}
@@ -0,0 +1,173 @@
+"""Benchmarks of ``INLABSHook.TextDictHandler`` result processing.
+
+Skipped by default. Run with::
+
+    RO_DOU_BENCHMARK=1 pytest -s inlabs_hook_benchmark_test.py
+"""
+
+import os
+import time
+from datetime import datetime
+
+import pandas as pd
+import pytest
+from ai.provider import AIProvider
+from schemas import AIConfig, AISearchConfig
+
+pytestmark = pytest.mark.skipif(
+    not os.getenv("RO_DOU_BENCHMARK"), reason="RO_DOU_BENCHMARK not set"
+)
+
+HITS = 10_000
+
+_TERMS = ["licitação", "pregão eletrônico", "SEGES", "contrato"]
+
+
+def _hits(n: int) -> pd.DataFrame:
+    rows = []
+    for i in range(n):
+        term = _TERMS[i % len(_TERMS)]
+        rows.append(
+            {
+                "artcategory": "Ministério da Gestão/SEGES",
+                "arttype": "Portaria",
+                "id": i,
+                "assina": "FULANO DE TAL",
+                "ementa": None,
+                "identifica": f"PORTARIA Nº {i}, DE 15 DE MARÇO DE 2024",
+                "name": f"15.03.2024 bsb DOU {i}",
+                "pdfpage": "http://xxx.gov.br/",
+                "pubdate": datetime(2024, 3, 15),
+                "pubname": ["DO1", "DO2", "DO3", "DO1E"][i % 4],
+                "texto": (
+                    f'<p class="identifica">PORTARIA Nº {i}</p>'
+                    + "<p>Texto inicial da publicação. </p>" * 10
+                    + f"<p>Trata do {term} da unidade.</p>"
+                    + "<table><tr><td>a</td></tr><tr><td></td></tr></table>"
+                    + "<p>FULANO DE TAL</p>"
+                ),
+                "matched_terms": [term],
+                "opensearch_highlights": [],
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+def _row_wise_steps(handler, df: pd.DataFrame) -> pd.DataFrame:
+    """The per-record steps as they ran before, one ``apply`` each."""
+    df = df.copy()
+    df["texto"] = df["texto"].apply(handler._remove_duplicated_title)
+    df["texto"] = df["texto"].apply(handler._remove_empty_tr)
+    df["matches"] = df["matched_terms"].apply(", ".join)
+    df["matches_assina"] = df.apply(
+        lambda row: handler._normalize(row["matches"])
+        in handler._normalize(row["assina"]),
+        axis=1,
+    )
+    df["texto"] = df.apply(
+        lambda row: handler._highlight_search_text(
+            [t for t in row["matches"].split(", ") if t], row["texto"], []
+        ),
+        axis=1,
+    )
+    df["identifica"] = df.apply(
+        lambda row: handler._highlight_terms(
+            [t for t in row["matches"].split(", ") if t], row["identifica"]
+        ),
+        axis=1,
+    )
+    df["count_assina"] = df.apply(
+        lambda row: row["texto"].count(row["assina"]), axis=1
+    )
+    return df
+
+
+def _fused_steps(handler, df: pd.DataFrame) -> pd.DataFrame:
+    """The same steps in one pass per record, as in the transform."""
+    df = df.copy()
+    df["texto"] = [handler._clean_texto(text) for text in df["texto"]]
+    df["matches"] = [", ".join(terms) for terms in df["matched_terms"]]
+    processed = [
+        handler._process_matches(*row)
+        for row in zip(
+            df["matches"],
+            df["assina"],
+            df["texto"],
+            df["identifica"],
+            df["opensearch_highlights"],
+        )
+    ]
+    (
+        df["texto"],
+        df["identifica"],
+        df["matches_assina"],
+        df["count_assina"],
+    ) = [list(column) for column in zip(*processed)]
+    return df
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def test_benchmark_transform_search_results(inlabs_hook):
+    handler = inlabs_hook.TextDictHandler()
+    df = _hits(HITS)
+
+    row_wise, row_wise_time = _timed(_row_wise_steps, handler, df)
+    fused, fused_time = _timed(_fused_steps, handler, df)
+
+    columns = ["texto", "identifica", "matches_assina", "count_assina"]
+    pd.testing.assert_frame_equal(
+        row_wise[columns], fused[columns], check_dtype=False
+    )
+
+    _, transform_time = _timed(
+        lambda: handler.transform_search_results(
+            ai_config=AIConfig(
+                provider=AIProvider.openai, api_key_var="KEY", model="gpt-4o-mini"
+            ),
+            ai_search_config=AISearchConfig(use_ai_summary=False, has_ementa=False),
+            response=df,
+            text_terms=_TERMS,
+            ignore_signature_match=True,
+        )
+    )
+
+    print(
+        f"\n{HITS} hits: row-wise {row_wise_time:.2f}s, "
+        f"fused {fused_time:.2f}s ({row_wise_time / fused_time:.1f}x), "
+        f"transform_search_results {transform_time:.2f}s"
+    )
+
+
+def _annex(size: int, closed_tables: bool = True) -> str:
+    """Return an annex-like document of about `size` characters with the
+    highlight after a big table."""
+    row = "<tr><td>Item</td><td>R$ 1.000,00</td><td>Descrição do item</td></tr>"
+    if closed_tables:
+        body = "<table>" + row * (size // len(row)) + "</table>"
+    else:
+        body = "<table>" * (size // len(row)) + row * (size // len(row) // 7)
+    return (
+        "<p>Anexo</p>"
+        + body
+        + "<p>Texto do anexo. </p>" * 1000
+        + "<%%>termo</%%>"
+        + "<p>Texto final. </p>" * 1000
+    )
+
+
+@pytest.mark.parametrize("closed_tables", [True, False])
+def test_benchmark_trim_text(inlabs_hook, closed_tables):
+    handler = inlabs_hook.TextDictHandler()
+
+    timings = []
+    for size in (250_000, 500_000, 1_000_000):
+        text = _annex(size, closed_tables)
+        _, elapsed = _timed(handler._trim_text, text, 400)
+        timings.append(f"{len(text) / 1_000_000:.2f} MB {elapsed * 1000:.0f}ms")
+
+    print(f"\n_trim_text (closed tables: {closed_tables}): " + ", ".join(timings))
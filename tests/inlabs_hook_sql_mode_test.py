@@ -0,0 +1,149 @@
+import re
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from dags.ro_dou_src.hooks.inlabs_hook_sql_mode import (
+    INLABSSQLModeHook,
+    _Parameters,
+    _texto_condition,
+)
+
+
+def _render(condition: str, params: dict) -> str:
+    """Replace the placeholders by the quoted parameters."""
+    for name, value in params.items():
+        condition = condition.replace(f"%({name})s", "'" + value.replace("'", "''") + "'")
+    return condition
+
+
+@pytest.mark.parametrize(
+    "term, condition",
+    [
+        (
+            "Gestão",
+            r"(texto_norm LIKE '%gestao%' AND texto_norm ~ '\ygestao\y')",
+        ),
+        (
+            "Ministério  da Gestão",
+            "(texto_norm LIKE '%ministerio%da%gestao%' "
+            r"AND texto_norm ~ '\yministerio\s+da\s+gestao\y')",
+        ),
+        (
+            "D'Ávila",
+            r"(texto_norm LIKE '%d''avila%' AND texto_norm ~ '\yd''avila\y')",
+        ),
+        (
+            "100%_ok",
+            r"(texto_norm LIKE '%100\%\_ok%' AND texto_norm ~ '\y100%_ok\y')",
+        ),
+        ("%", r"texto_norm ~ '\y%\y'"),
+    ],
+)
+def test_texto_condition(term, condition):
+    params = _Parameters()
+
+    assert _render(_texto_condition(term, params), params) == condition
+
+
+def _matches(condition: str, params: dict, text: str) -> bool:
+    """Evaluate a positive condition over `text` as Postgres would."""
+    like, pattern = (params[name] for name in re.findall(r"%\((\w+)\)s", condition))
+    like_re = "".join(
+        ".*" if part == "%" else "." if part == "_" else re.escape(part[-1])
+        for part in re.findall(r"\\.|%|_|[^\\%_]", like)
+    )
+    return bool(
+        re.fullmatch(like_re, text, re.DOTALL)
+        and re.search(pattern.replace(r"\y", r"\b"), text)
+    )
+
+
+@pytest.mark.parametrize(
+    "term, text",
+    [
+        ("SEGES", "portaria seges/me no 5"),
+        ("gov.br", "acesse www.gov.br/seges"),
+        ("gov.br", "escreva para fulano@gov.br"),
+        ("12345.678901/2023", "processo 12345.678901/2023-11"),
+        ("Ministério da Gestão", "o ministerio  da gestao e da inovacao"),
+    ],
+)
+def test_texto_condition_matches_words_inside_tokens(term, text):
+    params = _Parameters()
+
+    assert _matches(_texto_condition(term, params), params, text)
+
+
+def test_negative_texto_condition():
+    params = _Parameters()
+
+    assert _texto_condition("Lei 8.112", params, positive=False) == (
+        "texto_norm !~ %(p0)s"
+    )
+    assert params == {"p0": r"\ylei\s+8\.112\y"}
+
+
+def test_generate_sql_binds_every_term():
+    query = INLABSSQLModeHook._generate_sql(
+        {
+            "texto": ["Gestão & Inovação ! Tecnologia", "SEGES"],
+            "terms_ignore": ["Sem efeito"],
+            "pubdate": ["2024-04-01"],
+        }
+    )
+
+    assert "FROM dou_inlabs.article_raw" in query["select"]
+    assert "_norm" not in query["select"].split("FROM")[0]
+    for term in ("gestao", "inovacao", "tecnologia", "seges", "efeito", "2024"):
+        assert term not in query["select"]
+    assert (
+        "(pubdate BETWEEN '2024-04-01'::date AND '2024-04-01'::date)) AND "
+        "(("
+        "(texto_norm LIKE '%gestao%' AND texto_norm ~ '\\ygestao\\y')"
+        " AND "
+        "(texto_norm LIKE '%inovacao%' AND texto_norm ~ '\\yinovacao\\y')"
+        " AND "
+        "texto_norm !~ '\\ytecnologia\\y'"
+        ") OR "
+        "(texto_norm LIKE '%seges%' AND texto_norm ~ '\\yseges\\y')"
+        ") AND (texto_norm !~ '\\ysem\\s+efeito\\y')"
+    ) in _render(query["select"], query["parameters"])
+
+
+def test_generate_sql_covers_extra_edition():
+    query = INLABSSQLModeHook._generate_sql(
+        {"texto": ["SEGES"], "pubname": ["DO1"], "pubdate": ["2024-04-01"]}
+    )
+
+    assert (
+        "WHERE ("
+        "(pubdate BETWEEN '2024-04-01'::date AND '2024-04-01'::date AND "
+        "(dou_inlabs.unaccent(pubname) ~* dou_inlabs.unaccent('\\yDO1\\y')))"
+        " OR "
+        "(pubdate BETWEEN '2024-03-31'::date AND '2024-03-31'::date AND "
+        "(dou_inlabs.unaccent(pubname) ~* dou_inlabs.unaccent('\\yDO1E\\y')))"
+        ")"
+    ) in _render(query["select"], query["parameters"])
+
+
+def test_search_text_runs_a_single_query():
+    with patch(
+        "dags.ro_dou_src.hooks.inlabs_hook_sql_mode.PostgresHook"
+    ) as mock_hook:
+        mock_hook.return_value.get_pandas_df.return_value = pd.DataFrame()
+        result = INLABSSQLModeHook().search_text(
+            ai_config={},
+            ai_search_config={},
+            search_terms={"texto": ["SEGES"], "pubname": ["DO1"], "pubdate": ["2024-04-01"]},
+            ignore_signature_match=False,
+            full_text=False,
+            text_length=400,
+            use_summary=False,
+        )
+
+    assert result == {}
+    mock_hook.return_value.run.assert_not_called()
+    mock_hook.return_value.get_pandas_df.assert_called_once()
+    assert "parameters" in mock_hook.return_value.get_pandas_df.call_args.kwargs
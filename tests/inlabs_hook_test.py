@@ -57,6 +57,142 @@ def test_adapt_search_terms_to_extra(inlabs_hook, data_in, data_out):
     assert inlabs_hook._adapt_search_terms_to_extra(data_in) == data_out
 
 
+def test_split_terms_in_batches(inlabs_hook):
+    """Split long term lists keeping the remaining filters in each batch."""
+    payload = {
+        "texto": [f"term{i}" for i in range(1100)],
+        "pubname": ["DO1"],
+        "pubdate": ["2024-04-01"],
+    }
+
+    batches = inlabs_hook._split_terms_in_batches(payload)
+
+    assert [len(b["texto"]) for b in batches] == [500, 500, 100]
+    assert all(b["pubname"] == ["DO1"] for b in batches)
+    assert inlabs_hook._split_terms_in_batches({"texto": ["a"]}) == [{"texto": ["a"]}]
+
+
+def test_multi_search_hits_merges_and_deduplicates(inlabs_hook):
+    """Send all queries through `_msearch` and keep the first hit of each id."""
+    client = MagicMock()
+    client.msearch.return_value = {
+        "responses": [
+            {"hits": {"hits": [{"_id": "1"}, {"_id": "2"}]}},
+            {"hits": {"hits": [{"_id": "2"}, {"_id": "3"}]}},
+        ]
+    }
+
+    hits = list(inlabs_hook._multi_search_hits(client, [{"q": 1}, {"q": 2}]))
+
+    assert [h["_id"] for h in hits] == ["1", "2", "3"]
+    client.msearch.assert_called_once()
+    body = client.msearch.call_args.kwargs["body"]
+    assert body[1] == {"q": 1}
+    assert body[3] == {"q": 2}
+
+
+def test_multi_search_hits_bounds_request_size(inlabs_hook):
+    """Split the queries in requests of `MSEARCH_MAX_SEARCHES` searches."""
+    client = MagicMock()
+    client.msearch.side_effect = lambda body: {
+        "responses": [{"hits": {"hits": []}}] * (len(body) // 2)
+    }
+    queries = [{"q": i} for i in range(inlabs_hook.MSEARCH_MAX_SEARCHES + 1)]
+
+    list(inlabs_hook._multi_search_hits(client, queries))
+
+    assert client.msearch.call_count == 2
+
+
+def test_multi_search_hits_raises_on_query_error(inlabs_hook):
+    client = MagicMock()
+    client.msearch.return_value = {
+        "responses": [{"error": {"type": "too_many_clauses"}, "status": 400}]
+    }
+
+    with pytest.raises(RuntimeError):
+        list(inlabs_hook._multi_search_hits(client, [{"q": 1}]))
+
+
+def test_multi_search_hits_paginates_truncated_query(inlabs_hook, monkeypatch):
+    """Paginate with PIT + `search_after` when the first page is incomplete."""
+    monkeypatch.setattr(type(inlabs_hook), "PAGE_SIZE", 2)
+    client = MagicMock()
+    client.msearch.return_value = {
+        "responses": [
+            {
+                "hits": {
+                    "total": {"value": 3, "relation": "eq"},
+                    "hits": [{"_id": "1"}, {"_id": "2"}],
+                }
+            }
+        ]
+    }
+    client.create_point_in_time.return_value = {"pit_id": "pit-1"}
+    client.search.side_effect = [
+        {
+            "pit_id": "pit-1",
+            "hits": {
+                "hits": [
+                    {"_id": "1", "sort": [2.0, "1"]},
+                    {"_id": "2", "sort": [1.0, "2"]},
+                ]
+            },
+        },
+        {"pit_id": "pit-1", "hits": {"hits": [{"_id": "3", "sort": [0.5, "3"]}]}},
+    ]
+
+    hits = list(
+        inlabs_hook._multi_search_hits(client, [{"sort": [{"_score": "desc"}]}])
+    )
+
+    assert [h["_id"] for h in hits] == ["1", "2", "3"]
+    second_body = client.search.call_args_list[1].kwargs["body"]
+    assert second_body["search_after"] == [1.0, "2"]
+    assert second_body["pit"]["id"] == "pit-1"
+    assert second_body["sort"] == [{"_score": "desc"}, {"id": "asc"}]
+    client.delete_point_in_time.assert_called_once_with(body={"pit_id": ["pit-1"]})
+
+
+def test_limit_hits_stops_pagination_at_max_hits(inlabs_hook, monkeypatch):
+    """Stop reading a paginated query at `MAX_HITS` and delete its PIT."""
+    monkeypatch.setattr(type(inlabs_hook), "PAGE_SIZE", 2)
+    monkeypatch.setattr(type(inlabs_hook), "MAX_HITS", 3)
+    client = MagicMock()
+    client.msearch.return_value = {
+        "responses": [
+            {
+                "hits": {
+                    "total": {"value": 6, "relation": "eq"},
+                    "hits": [{"_id": "1"}, {"_id": "2"}],
+                }
+            }
+        ]
+    }
+    client.create_point_in_time.return_value = {"pit_id": "pit-1"}
+    client.search.side_effect = [
+        {
+            "hits": {
+                "hits": [
+                    {"_id": str(i), "sort": [float(-i), str(i)]}
+                    for i in range(page, page + 2)
+                ]
+            }
+        }
+        for page in (1, 3, 5)
+    ]
+
+    hits = list(
+        inlabs_hook._limit_hits(
+            inlabs_hook._multi_search_hits(client, [{"sort": [{"_score": "desc"}]}])
+        )
+    )
+
+    assert [h["_id"] for h in hits] == ["1", "2", "3"]
+    assert client.search.call_count == 2
+    client.delete_point_in_time.assert_called_once_with(body={"pit_id": ["pit-1"]})
+
+
 def test_map_opensearch_hit_uses_matched_queries(inlabs_hook):
     """Map OpenSearch ``matched_queries`` into matched term fields."""
     hit = {
@@ -925,6 +1061,81 @@ def test_remove_empty_tr_keeps_header_row(inlabs_hook):
     assert len(rows) == 2  # cabeçalho vazio removido; header+dados mantidos
 
 
+@pytest.mark.parametrize("ignore_inline_tables", [False, True])
+def test_clean_texto_matches_sequential_steps(inlabs_hook, ignore_inline_tables):
+    """The single-parse cleaning gives the same HTML as the separate steps."""
+    H = inlabs_hook.TextDictHandler()
+    html = (
+        '<p class="identifica">PORTARIA Nº 1</p><p>Texto.</p>'
+        "<table><tr><td>a</td></tr><tr><td> </td></tr><tr><td>b</td></tr></table>"
+    )
+    expected = H._remove_empty_tr(H._remove_duplicated_title(html))
+    if ignore_inline_tables:
+        expected = H._replace_inline_tables(expected, 2)
+
+    assert H._clean_texto(html, ignore_inline_tables, 2) == expected
+    assert H._clean_texto(None) == ""
+
+
+def test_excerpt_segments(inlabs_hook):
+    text = "<p>ab</p><table><tr><td>t</td></tr></table>c<%%>d<b>e</b></%%><table>"
+    segments = inlabs_hook.TextDictHandler()._excerpt_segments(text)
+
+    assert [
+        (kind, text[start:end], visible)
+        for kind, start, end, visible, _ in segments
+    ] == [
+        ("run", "<p>ab</p>", 2),
+        ("table", "<table><tr><td>t</td></tr></table>", 1),
+        ("run", "c", 1),
+        ("marker", "<%%>d<b>e</b></%%>", 2),
+        # Without a closing tag, a table opening is a plain tag
+        ("run", "<table>", 0),
+    ]
+
+
+@pytest.mark.parametrize(
+    "ignore_inline_tables, matches",
+    [(False, ["portaria, pregão, SEGES"]), (True, ["portaria, SEGES"])],
+)
+def test_transform_search_results_matches_cleaned_text(
+    inlabs_hook, ignore_inline_tables, matches
+):
+    """Match over the cleaned `texto`, without the title paragraph and
+    the omitted inline tables."""
+    texto = (
+        '<p class="identifica">PORTARIA Nº 1</p><p>Texto da SEGES.</p>'
+        "<table><tr><td>pregão</td></tr></table>"
+    )
+    df = pd.DataFrame(
+        {
+            "id": [1],
+            "pubname": ["DO1"],
+            "pubdate": [pd.Timestamp("2024-04-01")],
+            "texto": [texto],
+            "identifica": ["PORTARIA Nº 1"],
+            "name": ["Portaria 1"],
+            "arttype": ["Portaria"],
+            "artcategory": ["Ministério"],
+            "assina": [None],
+            "pdfpage": ["http://in.gov.br/1"],
+            "ementa": [None],
+        }
+    )
+
+    result = inlabs_hook.TextDictHandler().transform_search_results(
+        ai_config=_MIN_AI_CONFIG,
+        ai_search_config=_MIN_AI_SEARCH_CONFIG,
+        response=df,
+        text_terms=["SEGES", "pregão", "extra", "portaria"],
+        ignore_signature_match=False,
+        full_text=True,
+        ignore_inline_tables=ignore_inline_tables,
+    )
+
+    assert list(result) == matches
+
+
 def test_min_table_rows_counts_header_row(inlabs_hook):
     """Tabela com cabeçalho <th> + N-1 linhas de dados deve contar N linhas."""
     header = "<tr><th>Etapa</th><th>Data</th></tr>"
@@ -0,0 +1,227 @@
+from datetime import date, datetime
+
+import pytest
+
+from utils.inlabs_partitions import (
+    ensure_partition,
+    ensure_partitioned_table,
+    ensure_partitions,
+    month_bounds,
+    partition_name,
+)
+
+TABLE = "dou_inlabs.article_raw"
+
+
+class FakeCursor:
+    """Records the statements and answers the catalog queries."""
+
+    def __init__(self, relkind, connection=None, without_pubdate=0):
+        self.relkind = relkind
+        self.connection = connection
+        self.without_pubdate = without_pubdate
+        self.statements = []
+        self.copied = None
+        self._result = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def execute(self, sql, params=None):
+        if self.connection:
+            self.connection.check_idle()
+        sql = " ".join(sql.split())
+        self.statements.append(sql)
+        if "pg_class" in sql:
+            self._result = [(self.relkind,)] if self.relkind else []
+        elif "date_trunc" in sql:
+            self._result = [(date(2024, 4, 1),), (date(2024, 5, 1),)]
+        elif "information_schema.columns" in sql:
+            columns = ["id", "pubdate", "texto"]
+            if params[1] == "article_raw":
+                columns.append("texto_norm")
+            self._result = [(column,) for column in columns]
+        elif "count(*)" in sql:
+            self._result = [(self.without_pubdate,)]
+
+    def copy_expert(self, sql, file):
+        self.connection.check_idle()
+        self.statements.append(sql)
+        self.connection.copying = True
+        try:
+            self.copied = file.read()
+        finally:
+            self.connection.copying = False
+
+    def fetchone(self):
+        return self._result[0] if self._result else None
+
+    def fetchall(self):
+        return self._result
+
+
+class FakeRows:
+    """Server-side cursor, which FETCHes its rows as it is iterated."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def execute(self, sql, params=None):
+        self.connection.check_idle()
+
+    def __iter__(self):
+        self.connection.check_idle()
+        yield (1, datetime(2024, 4, 2), "<p>Portaria Nº 5 da <b>SEGES</b></p>", None)
+
+
+class FakeConnection:
+    """Like libpq, refuses any command while a COPY is in progress."""
+
+    def __init__(self, relkind, without_pubdate=0):
+        self.cursor_ = FakeCursor(relkind, self, without_pubdate)
+        self.copying = False
+        self.committed = False
+
+    def check_idle(self):
+        if self.copying:
+            raise RuntimeError("another command is already in progress")
+
+    def cursor(self, name=None):
+        return FakeRows(self) if name else self.cursor_
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        pass
+
+
+@pytest.mark.parametrize(
+    "day, bounds",
+    [
+        ("2024-04-18", (date(2024, 4, 1), date(2024, 5, 1))),
+        (date(2024, 12, 31), (date(2024, 12, 1), date(2025, 1, 1))),
+    ],
+)
+def test_month_bounds(day, bounds):
+    assert month_bounds(day) == bounds
+
+
+def test_ensure_partition_creates_month_partition():
+    cursor = FakeCursor("p")
+
+    assert ensure_partition(cursor, TABLE, "2024-12-05") == (
+        "dou_inlabs.article_raw_2024_12"
+    )
+    assert cursor.statements == [
+        "CREATE TABLE IF NOT EXISTS dou_inlabs.article_raw_2024_12 "
+        "PARTITION OF dou_inlabs.article_raw "
+        "FOR VALUES FROM ('2024-12-01') TO ('2025-01-01')"
+    ]
+    assert partition_name(TABLE, date(2024, 12, 5)) == "dou_inlabs.article_raw_2024_12"
+
+
+def test_ensure_partitions_creates_every_month_of_source():
+    cursor = FakeCursor("p")
+
+    ensure_partitions(cursor, TABLE, "article_raw_stage")
+
+    assert cursor.statements[0] == (
+        "SELECT DISTINCT date_trunc('month', pubdate)::date "
+        "FROM article_raw_stage WHERE pubdate IS NOT NULL"
+    )
+    assert [s.split()[5] for s in cursor.statements[1:]] == [
+        "dou_inlabs.article_raw_2024_04",
+        "dou_inlabs.article_raw_2024_05",
+    ]
+
+
+def test_partitioned_table_gets_indexes():
+    connection = FakeConnection("p")
+
+    ensure_partitioned_table(connection, TABLE)
+
+    statements = connection.cursor_.statements
+    assert statements[:2] == [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm SCHEMA dou_inlabs",
+        "CREATE EXTENSION IF NOT EXISTS unaccent SCHEMA dou_inlabs",
+    ]
+    assert statements[3:] == [
+        f"CREATE INDEX IF NOT EXISTS article_raw_{column}_idx ON {TABLE} ({column})"
+        for column in ("pubdate", "pubname", "artcategory")
+    ] + [
+        f"CREATE INDEX IF NOT EXISTS article_raw_texto_norm_trgm_idx ON {TABLE} "
+        "USING gin (texto_norm dou_inlabs.gin_trgm_ops)",
+    ]
+    assert connection.committed
+
+
+def test_missing_table_is_created_partitioned():
+    connection = FakeConnection(None)
+
+    ensure_partitioned_table(connection, TABLE)
+
+    create = connection.cursor_.statements[3]
+    assert create.startswith(f"CREATE TABLE {TABLE} (")
+    assert "texto_norm TEXT" in create and "texto_tsv" not in create
+    assert create.endswith("PRIMARY KEY (id, pubdate)) PARTITION BY RANGE (pubdate)")
+
+
+def test_unpartitioned_table_is_migrated():
+    connection = FakeConnection("r")
+
+    ensure_partitioned_table(connection, TABLE)
+
+    statements = connection.cursor_.statements
+    assert statements[3] == f"ALTER TABLE {TABLE} RENAME TO article_raw_unpartitioned"
+    assert sum("PARTITION OF" in s for s in statements) == 2
+    insert = next(s for s in statements if s.startswith("INSERT"))
+    assert insert.startswith(
+        f"INSERT INTO {TABLE} (id, pubdate, texto, texto_norm, assina_norm) "
+        "SELECT id, pubdate, texto, "
+    )
+    assert insert.endswith(
+        f"FROM {TABLE}_unpartitioned WHERE pubdate IS NOT NULL"
+    )
+    assert f"DROP TABLE {TABLE}_unpartitioned" in statements
+    assert connection.committed
+
+
+def test_migration_fills_normalized_texts():
+    connection = FakeConnection("r")
+
+    ensure_partitioned_table(connection, TABLE)
+
+    insert = next(s for s in connection.cursor_.statements if s.startswith("INSERT"))
+    assert (
+        "lower(dou_inlabs.unaccent(btrim(regexp_replace(regexp_replace("
+        "coalesce(texto, ''), '<[^>]+>', ' ', 'g'), '\\s+', ' ', 'g')))), "
+        "lower(dou_inlabs.unaccent(coalesce(assina, ''))) FROM"
+    ) in insert
+    assert not any(s.startswith("UPDATE") for s in connection.cursor_.statements)
+
+
+def test_migration_runs_no_command_during_copy():
+    connection = FakeConnection("r")
+
+    ensure_partitioned_table(connection, TABLE)
+
+    assert connection.committed
+
+
+def test_migration_keeps_rows_without_pubdate(caplog):
+    connection = FakeConnection("r", without_pubdate=3)
+
+    ensure_partitioned_table(connection, TABLE)
+
+    assert f"DROP TABLE {TABLE}_unpartitioned" not in connection.cursor_.statements
+    assert "3 rows" in caplog.text
@@ -0,0 +1,64 @@
+import pandas as pd
+import pytest
+from bs4 import BeautifulSoup
+from slugify import slugify
+
+from utils.inlabs_xml import get_assina, iter_articles
+
+ARTICLE = """<xml><article id="{id}" name="Portaria {id}" idOficio="99" pubName="DO1"
+artType="Portaria" pubDate="18/10/2026" artClass="00001" artCategory="Ministério"
+artSize="12" artNotes="" numberPage="3" pdfPage="http://pdf" editionNumber="200"
+highlightType="" highlightPriority="" highlight="" highlightimage=""
+highlightimagename="" idMateria="{id}"><body><Identifica><![CDATA[PORTARIA Nº {id}]]></Identifica>
+<Data><![CDATA[]]></Data><Ementa><![CDATA[]]></Ementa><Titulo /><SubTitulo />
+<Texto><![CDATA[<p class="identifica">PORTARIA</p><p>O Secretário &amp; Adjunto resolve:</p>
+<p class="assina">JOSÉ DA <b>SILVA</b></p><p class="cargo">Secretário</p>
+<p class="assina">MARIA &amp; SOUZA</p>]]></Texto></body><Midias /></article></xml>"""
+
+
+@pytest.fixture
+def xml_files(tmp_path):
+    paths = []
+    for article_id in (1, 2, 3):
+        path = tmp_path / f"{article_id}.xml"
+        path.write_text(ARTICLE.format(id=article_id), encoding="utf-8")
+        paths.append(str(path))
+    return paths
+
+
+def _read_with_pandas(xml_file):
+    """The previous reader, joining two pd.read_xml of the file."""
+    df = pd.read_xml(xml_file).join(pd.read_xml(xml_file, xpath="//body"))
+    df.columns = [slugify(col, separator="_") for col in df.columns]
+    df.drop(columns=["body"], inplace=True)
+    df["pubdate"] = pd.to_datetime(df["pubdate"], format="%d/%m/%Y")
+    df["assina"] = df["texto"].apply(
+        lambda text: ", ".join(
+            p.text for p in BeautifulSoup(text, "html.parser").find_all("p", class_="assina")
+        )
+        or None
+    )
+    return df
+
+
+def test_iter_articles_matches_pandas_reader(xml_files):
+    records = list(iter_articles(xml_files))
+    expected = _read_with_pandas(xml_files[0]).iloc[0]
+
+    assert len(records) == 3
+    assert set(records[0]) == set(expected.index)
+    assert records[0]["pubdate"] == expected["pubdate"]
+    for column in ("name", "pubname", "identifica", "texto", "assina"):
+        assert records[0][column] == expected[column]
+    assert int(records[0]["id"]) == expected["id"]
+    assert records[0]["artnotes"] is None and records[0]["titulo"] is None
+    assert [r["id"] for r in records] == ["1", "2", "3"]
+
+
+def test_get_assina():
+    assert get_assina('<p class="assina">JOSÉ</p><p class="x assina">MARIA</p>') == (
+        "JOSÉ, MARIA"
+    )
+    assert get_assina('<p class="assinatura">JOSÉ</p>') is None
+    assert get_assina(None) is None
+
@@ -0,0 +1,45 @@
+from unittest.mock import patch
+
+import pytest
+
+from dags.ro_dou_src.utils.open_search.client_open_search import OpenSearchClient
+
+_CLIENT = "dags.ro_dou_src.utils.open_search.client_open_search"
+
+
+@pytest.fixture(autouse=True)
+def empty_registry():
+    OpenSearchClient._clients.clear()
+    yield
+    OpenSearchClient._clients.clear()
+
+
+def test_clients_are_shared_in_the_process():
+    with patch(f"{_CLIENT}.OpenSearch") as mock_opensearch:
+        first = OpenSearchClient().get_client()
+        second = OpenSearchClient().get_client()
+
+    assert first is second
+    mock_opensearch.assert_called_once()
+    kwargs = mock_opensearch.call_args.kwargs
+    assert kwargs["retry_on_timeout"] is True
+    assert {"pool_maxsize", "timeout", "max_retries"} <= kwargs.keys()
+
+
+def test_clients_are_not_shared_with_a_forked_process():
+    with patch(f"{_CLIENT}.OpenSearch") as mock_opensearch, patch(
+        f"{_CLIENT}.os.getpid", side_effect=[1, 2]
+    ):
+        OpenSearchClient()
+        OpenSearchClient()
+
+    assert mock_opensearch.call_count == 2
+
+
+def test_close_all():
+    with patch(f"{_CLIENT}.OpenSearch") as mock_opensearch:
+        OpenSearchClient()
+        OpenSearchClient.close_all()
+
+    mock_opensearch.return_value.close.assert_called_once()
+    assert OpenSearchClient._clients == {}
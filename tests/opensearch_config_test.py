@@ -0,0 +1,57 @@
+from unittest.mock import patch
+
+import pytest
+
+from dags.ro_dou_src.utils.open_search import config
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.delenv("AIRFLOW_VAR_OPENSEARCH_TIMEOUT", raising=False)
+    monkeypatch.delenv("OPENSEARCH_TIMEOUT", raising=False)
+    config._settings_cache.clear()
+    yield
+    config._settings_cache.clear()
+
+
+def test_airflow_var_env_overrides_variable(monkeypatch):
+    monkeypatch.setenv("AIRFLOW_VAR_OPENSEARCH_TIMEOUT", "5")
+
+    with patch("airflow.sdk.Variable.get") as mock_get:
+        assert config.get_setting("OPENSEARCH_TIMEOUT") == "5"
+
+    mock_get.assert_not_called()
+
+
+def test_variable_is_cached_for_ttl(monkeypatch):
+    monkeypatch.setenv("OPENSEARCH_TIMEOUT", "20")
+
+    with patch("airflow.sdk.Variable.get", return_value="60") as mock_get:
+        assert config.get_setting("OPENSEARCH_TIMEOUT") == "60"
+        assert config.OPENSEARCH_TIMEOUT == "60"
+
+    mock_get.assert_called_once_with("OPENSEARCH_TIMEOUT", "20")
+
+    monkeypatch.setattr(config, "SETTINGS_TTL", -1)
+    config._settings_cache.clear()
+    with patch("airflow.sdk.Variable.get", return_value="90") as mock_get:
+        config.get_setting("OPENSEARCH_TIMEOUT")
+        assert config.get_setting("OPENSEARCH_TIMEOUT") == "90"
+
+    assert mock_get.call_count == 2
+
+
+def test_flag_without_variable_reads_environment_only(monkeypatch):
+    monkeypatch.setenv("RO_DOU_INLABS_USE_SEARCH_COORDINATOR", "True")
+
+    with patch("airflow.sdk.Variable.get") as mock_get:
+        assert config.get_flag(
+            "RO_DOU_INLABS_USE_SEARCH_COORDINATOR", use_variable=False
+        )
+
+    mock_get.assert_not_called()
+
+
+def test_unknown_attribute():
+    with pytest.raises(AttributeError):
+        config.UNKNOWN_SETTING
@@ -0,0 +1,81 @@
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from dags.ro_dou_src.utils.open_search.config import COLUMNS_NAME
+from dags.ro_dou_src.utils.open_search.indexer import Indexer
+
+_INDEXER = "dags.ro_dou_src.utils.open_search.indexer"
+
+
+@pytest.fixture
+def indexer(monkeypatch) -> Indexer:
+    monkeypatch.setattr(Indexer, "THREAD_COUNT", 3)
+    monkeypatch.setattr(Indexer, "CHUNK_SIZE", 10)
+    with patch(f"{_INDEXER}.OpenSearchClient"):
+        indexer = Indexer()
+    indexer.client.indices.exists.return_value = True
+    return indexer
+
+
+def _docs(count):
+    return [
+        {"id": str(i), "texto": f"<p>Portaria {i}</p>", "assina": None}
+        for i in range(count)
+    ]
+
+
+def _fake_streaming_bulk(failed_ids=()):
+    def streaming_bulk(client, actions, **kwargs):
+        assert kwargs["max_retries"] == Indexer.MAX_RETRIES
+        assert not kwargs["yield_ok"]
+        for action in actions:
+            if action["_id"] in failed_ids:
+                yield False, {"index": {"_id": action["_id"], "status": 429}}
+
+    return streaming_bulk
+
+
+def test_run_indexes_every_batch_in_threads(indexer):
+    docs = _docs(95)
+    with patch.object(
+        indexer, "_fetch_from_postgres", return_value=iter(docs)
+    ), patch(
+        f"{_INDEXER}.streaming_bulk", side_effect=_fake_streaming_bulk({"3", "42"})
+    ) as mock_bulk, patch(f"{_INDEXER}.Percolator") as mock_percolator:
+        mock_percolator.return_value.percolate.side_effect = len
+        with patch(f"{_INDEXER}.logging") as mock_logging:
+            indexer.run("2024-04-01", percolate=True)
+
+    assert mock_bulk.call_count == 10
+    percolated = mock_percolator.return_value.percolate.call_args_list
+    assert sorted(doc["id"] for call in percolated for doc in call.args[0]) == sorted(
+        doc["id"] for doc in docs
+    )
+    assert all("texto_plain" in doc for doc in docs)
+    messages = [str(call.args[0]) for call in mock_logging.info.call_args_list]
+    assert any(m.startswith("Indexados: 93 documento(s)") for m in messages)
+    assert "Erros: 2" in messages
+
+
+def test_fetch_from_postgres_uses_server_side_cursor(indexer):
+    row = tuple(
+        datetime(2024, 4, 1) if column == "pubdate" else column
+        for column in COLUMNS_NAME
+    )
+    conn = MagicMock()
+    cursor = conn.cursor.return_value.__enter__.return_value
+    cursor.__iter__.return_value = iter([row, row])
+
+    with patch(
+        "airflow.providers.postgres.hooks.postgres.PostgresHook"
+    ) as mock_hook:
+        mock_hook.return_value.get_conn.return_value = conn
+        docs = list(indexer._fetch_from_postgres("2024-04-01", batch_size=200))
+
+    conn.cursor.assert_called_once_with(name="indexer_articles")
+    assert cursor.itersize == 200
+    cursor.fetchall.assert_not_called()
+    assert [doc["pubdate"] for doc in docs] == ["2024-04-01", "2024-04-01"]
+    conn.close.assert_called_once()
@@ -0,0 +1,310 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from dags.ro_dou_src.utils.open_search.percolator import Percolator
+from dags.ro_dou_src.utils.open_search.config import (
+    PERCOLATOR_INDEX_NAME,
+    PERCOLATOR_MATCHES_INDEX_NAME,
+)
+
+_PERCOLATOR = "dags.ro_dou_src.utils.open_search.percolator"
+
+
+def _specs(dag_id, searches):
+    """Return a minimal DAGConfig-like object."""
+    return SimpleNamespace(
+        id=dag_id,
+        search=searches,
+        search_key=lambda counter: f"{dag_id}.{counter}",
+    )
+
+
+def _search(terms, sources=("INLABS",), terms_ignore=None):
+    return SimpleNamespace(
+        terms=terms, sources=list(sources), terms_ignore=terms_ignore
+    )
+
+
+@pytest.fixture
+def percolator() -> Percolator:
+    return Percolator(client=MagicMock())
+
+
+def test_percolator_actions_registers_inlabs_terms_only():
+    """Register one query per term of INLABS searches with literal terms."""
+    specs = _specs(
+        "dag_a",
+        [
+            _search(["SEGES", "licitação & pregão"], terms_ignore=["edital"]),
+            _search(["SEGES"], sources=["DOU"]),
+            _search(SimpleNamespace(from_airflow_variable="var")),
+        ],
+    )
+
+    actions = list(Percolator._percolator_actions([specs], "v2", "2024-04-01"))
+
+    assert [a["_id"] for a in actions] == [
+        "dag_a.1:SEGES",
+        "dag_a.1:licitação & pregão",
+    ]
+    assert all(a["_index"] == PERCOLATOR_INDEX_NAME for a in actions)
+    query = actions[0]["_source"]["query"]
+    assert query["bool"]["must"][0]["match"]["texto_plain"]["query"] == "SEGES"
+    assert query["bool"]["must_not"] == [
+        {"match_phrase": {"texto_plain": "edital"}}
+    ]
+    assert actions[0]["_source"]["version"] == "v2"
+    assert actions[0]["_source"]["terms_hash"] == Percolator.terms_hash(
+        ["licitação & pregão", "SEGES"], ["edital"]
+    )
+
+
+def test_percolator_actions_keeps_since_of_unchanged_terms():
+    specs = _specs("dag_a", [_search(["SEGES"]), _search(["SOF"])])
+    registered = {
+        "dag_a.1": (Percolator.terms_hash(["SEGES"]), "2024-01-02"),
+        "dag_a.2": (Percolator.terms_hash(["SEGES"]), "2024-01-02"),
+    }
+
+    actions = list(
+        Percolator._percolator_actions([specs], "v2", "2024-04-01", registered)
+    )
+
+    assert [a["_source"]["since"] for a in actions] == ["2024-01-02", "2024-04-01"]
+
+
+def test_register_writes_before_deleting_previous_versions(percolator):
+    percolator.client.indices.exists.return_value = True
+    calls = []
+    percolator.client.delete_by_query.side_effect = (
+        lambda **kwargs: calls.append(("delete", kwargs))
+    )
+
+    def _bulk(client, actions, **kwargs):
+        actions = list(actions)
+        calls.append(("bulk", actions))
+        return len(actions), []
+
+    with patch(f"{_PERCOLATOR}.scan", return_value=[]), patch(
+        f"{_PERCOLATOR}.bulk", side_effect=_bulk
+    ):
+        percolator.register([_specs("dag_a", [_search(["SEGES"])])], "2024-04-01")
+
+    assert [name for name, _ in calls] == ["bulk", "delete"]
+    version = calls[0][1][0]["_source"]["version"]
+    assert calls[1][1]["body"]["query"] == {
+        "bool": {"must_not": [{"term": {"version": version}}]}
+    }
+
+
+def test_register_keeps_previous_queries_on_errors(percolator):
+    percolator.client.indices.exists.return_value = True
+
+    with patch(f"{_PERCOLATOR}.scan", return_value=[]), patch(
+        f"{_PERCOLATOR}.bulk", return_value=(0, [{"index": {"error": "x"}}])
+    ):
+        percolator.register([_specs("dag_a", [_search(["SEGES"])])], "2024-04-01")
+
+    percolator.client.delete_by_query.assert_not_called()
+
+
+def test_terms_hash_ignores_order_and_blank_terms():
+    assert Percolator.terms_hash(["SEGES", "SOF", ""]) == Percolator.terms_hash(
+        ["SOF", "SEGES"]
+    )
+    assert Percolator.terms_hash(["SEGES"]) != Percolator.terms_hash(
+        ["SEGES"], ["edital"]
+    )
+
+
+def test_prune_matches_deletes_matches_past_retention(percolator):
+    percolator.client.delete_by_query.return_value = {"deleted": 3}
+
+    assert percolator.prune_matches("2024-04-01") == 3
+
+    kwargs = percolator.client.delete_by_query.call_args.kwargs
+    assert kwargs["index"] == PERCOLATOR_MATCHES_INDEX_NAME
+    assert kwargs["body"]["query"] == {"range": {"pubdate": {"lt": "2023-02-26"}}}
+
+
+def test_percolate_stores_one_match_per_slot(percolator):
+    docs = [
+        {"id": 1, "pubdate": "2024-04-01", "texto_plain": "SEGES"},
+        {"id": 2, "pubdate": "2024-04-01", "texto_plain": "SEGES e SOF"},
+    ]
+    percolated = [
+        {
+            "_source": {"search_key": "dag_a.1", "term": "SEGES"},
+            "fields": {"_percolator_document_slot": [0, 1]},
+        }
+    ]
+
+    with patch(f"{_PERCOLATOR}.scan", return_value=percolated), patch(
+        f"{_PERCOLATOR}.bulk", return_value=(2, [])
+    ) as mock_bulk:
+        assert percolator.percolate(docs) == 2
+
+    actions = mock_bulk.call_args.args[1]
+    assert [a["_source"]["doc_id"] for a in actions] == ["1", "2"]
+    assert all(a["_index"] == PERCOLATOR_MATCHES_INDEX_NAME for a in actions)
+
+
+def test_percolate_raises_when_matches_are_not_stored(percolator):
+    docs = [{"id": 1, "pubdate": "2024-04-01", "texto_plain": "SEGES"}]
+    percolated = [
+        {
+            "_source": {"search_key": "dag_a.1", "term": "SEGES"},
+            "fields": {"_percolator_document_slot": [0]},
+        }
+    ]
+
+    with patch(f"{_PERCOLATOR}.scan", return_value=percolated), patch(
+        f"{_PERCOLATOR}.bulk", return_value=(0, [{"index": {"error": "x"}}])
+    ), pytest.raises(RuntimeError):
+        percolator.percolate(docs)
+
+
+def test_matched_terms_groups_terms_by_article(percolator):
+    stored = [
+        {"_source": {"doc_id": "1", "term": "SEGES"}},
+        {"_source": {"doc_id": "1", "term": "SOF"}},
+        {"_source": {"doc_id": "2", "term": "SOF"}},
+    ]
+
+    with patch(f"{_PERCOLATOR}.scan", return_value=stored):
+        matches = percolator.matched_terms("dag_a.1", "2024-03-31", "2024-04-01")
+
+    assert matches == {"1": ["SEGES", "SOF"], "2": ["SOF"]}
+
+
+def test_search_text_looks_up_percolator_matches():
+    """Use the stored matches instead of the full text query."""
+    from dags.ro_dou_src.hooks.inlabs_hook import INLABSHook
+
+    client = MagicMock()
+    client.msearch.return_value = {
+        "responses": [
+            {
+                "hits": {
+                    "hits": [
+                        {
+                            "_id": "1",
+                            "_source": {"texto": "SEGES", "pubdate": "2024-04-01"},
+                        }
+                    ]
+                }
+            },
+            {"hits": {"hits": []}},
+        ]
+    }
+    search_terms = {
+        "texto": ["SEGES"],
+        "pubname": ["DO1"],
+        "pubdate": ["2024-04-01", "2024-04-01"],
+    }
+
+    with patch(
+        "dags.ro_dou_src.hooks.inlabs_hook.get_flag", return_value=True
+    ), patch(
+        "dags.ro_dou_src.hooks.inlabs_hook.Percolator.is_registered",
+        return_value=True,
+    ) as mock_registered, patch(
+        "dags.ro_dou_src.hooks.inlabs_hook.Percolator.matched_terms",
+        return_value={"1": ["SEGES"]},
+    ) as mock_matched, patch.object(
+        INLABSHook.TextDictHandler, "transform_search_results", return_value={}
+    ) as mock_transform:
+        INLABSHook().search_text(
+            ai_config=None,
+            ai_search_config=None,
+            search_terms=search_terms,
+            ignore_signature_match=False,
+            full_text=False,
+            text_length=400,
+            use_summary=False,
+            client=client,
+            search_key="dag_a.1",
+        )
+
+    mock_registered.assert_called_once_with(
+        "dag_a.1", Percolator.terms_hash(["SEGES"]), "2024-03-31"
+    )
+    mock_matched.assert_called_once_with("dag_a.1", "2024-03-31", "2024-04-01")
+    body = client.msearch.call_args.kwargs["body"]
+    assert {"ids": {"values": ["1"]}} in body[1]["query"]["bool"]["filter"]
+    assert "SEGES" in str(body[1]["query"]["bool"]["must"])
+    assert "highlight" in body[1]
+    response = mock_transform.call_args.kwargs["response"]
+    assert response.iloc[0]["matched_terms"] == ["SEGES"]
+
+
+def test_percolated_hits_report_terms_of_expressions():
+    """Stored matches hold whole expressions; hits report their terms."""
+    from dags.ro_dou_src.hooks.inlabs_hook import INLABSHook
+
+    client = MagicMock()
+    client.msearch.return_value = {
+        "responses": [
+            {"hits": {"hits": [{"_id": "1", "_source": {}}]}},
+            {"hits": {"hits": [{"_id": "2", "_source": {}, "matched_queries": ["SOF"]}]}},
+        ]
+    }
+    search_terms = {"texto": ["SEGES & SOF"], "pubdate": ["2024-04-01"]}
+    extra_search_terms = {"texto": ["SEGES & SOF"], "pubdate": ["2024-03-31"]}
+
+    with patch(
+        "dags.ro_dou_src.hooks.inlabs_hook.Percolator.matched_terms",
+        return_value={"1": ["SEGES & SOF"], "2": ["SEGES & SOF"], "3": ["SOF"]},
+    ):
+        hits = list(
+            INLABSHook._percolated_hits(
+                client, "dag_a.1", search_terms, extra_search_terms
+            )
+        )
+
+    assert [hit["matched_queries"] for hit in hits] == [["SEGES", "SOF"], ["SOF"]]
+    body = client.msearch.call_args.kwargs["body"]
+    assert {"ids": {"values": ["1", "2"]}} in body[1]["query"]["bool"]["filter"]
+
+
+def test_search_text_runs_full_text_query_when_search_is_not_registered():
+    """Fall back to the full text query when the stored queries do not
+    match the current terms of the search."""
+    from dags.ro_dou_src.hooks.inlabs_hook import INLABSHook
+
+    client = MagicMock()
+    client.msearch.return_value = {
+        "responses": [{"hits": {"hits": []}}, {"hits": {"hits": []}}]
+    }
+    search_terms = {
+        "texto": ["SEGES"],
+        "pubname": ["DO1"],
+        "pubdate": ["2024-04-01", "2024-04-01"],
+    }
+
+    with patch(
+        "dags.ro_dou_src.hooks.inlabs_hook.get_flag", return_value=True
+    ), patch(
+        "dags.ro_dou_src.hooks.inlabs_hook.Percolator.is_registered",
+        return_value=False,
+    ), patch(
+        "dags.ro_dou_src.hooks.inlabs_hook.Percolator.matched_terms"
+    ) as mock_matched:
+        INLABSHook().search_text(
+            ai_config=None,
+            ai_search_config=None,
+            search_terms=search_terms,
+            ignore_signature_match=False,
+            full_text=False,
+            text_length=400,
+            use_summary=False,
+            client=client,
+            search_key="dag_a.1",
+        )
+
+    mock_matched.assert_not_called()
+    body = client.msearch.call_args.kwargs["body"]
+    assert "ids" not in str(body)
+    assert "SEGES" in str(body)
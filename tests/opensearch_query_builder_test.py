@@ -282,3 +282,29 @@ def test_all_final_text_terms_receive_name(query_builder):
         "revogado",
         "SEGES",
     ]
+
+
+def test_build_names_whole_expressions_when_requested(query_builder):
+    """Name each expression clause so fully matched expressions are reported."""
+    query_builder.payload = {
+        "texto": ["licitação & pregão", "SEGES"],
+        "pubdate": ["2024-04-01"],
+        "name_expressions": True,
+    }
+
+    names = _collect_names(_texto_clause(query_builder.build()))
+    should = _texto_clause(query_builder.build())["bool"]["should"]
+
+    assert sorted(names) == ["SEGES", "licitação", "pregão"]
+    assert [clause["bool"]["_name"] for clause in should] == [
+        "expression:licitação & pregão",
+        "expression:SEGES",
+    ]
+
+
+def test_texto_terms_returns_expression_leaves():
+    assert OpenSearchQueryBuilder.texto_terms('"ata de registro" & (SEGES | SOF)') == [
+        "ata de registro",
+        "SEGES",
+        "SOF",
+    ]
@@ -1,6 +1,7 @@
 """ Parsers unit tests
 """
 
+import json
 import os
 import sys
 import inspect
@@ -11,7 +12,14 @@ import pytest
 currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
 parentdir = os.path.dirname(currentdir)
 sys.path.insert(0, parentdir)
-from dou_dag_generator import DouDigestDagGenerator, YAMLParser, DAGConfig
+from unittest.mock import patch
+
+from dou_dag_generator import (
+    DouDigestDagGenerator,
+    YAMLParser,
+    DAGConfig,
+    DAGConfigCache,
+)
 
 
 @pytest.mark.parametrize(
@@ -813,3 +821,57 @@ def test_parse(filepath, result_tuple):
     parsed = YAMLParser(filepath=filepath).parse()
 
     assert parsed.model_dump() == DAGConfig(**result_tuple).model_dump()
+
+
+def test_dag_config_cache_skips_unchanged_files(tmp_path):
+    source = os.path.join(
+        DouDigestDagGenerator().YAMLS_DIR, "examples_and_tests", "basic_example.yaml"
+    )
+    filepath = tmp_path / "basic_example.yaml"
+    filepath.write_text(open(source, encoding="utf-8").read(), encoding="utf-8")
+    cache_path = str(tmp_path / "cache.json")
+
+    cache = DAGConfigCache(path=cache_path)
+    parsed = cache.parse(str(filepath))
+    cache.save()
+
+    with patch.object(YAMLParser, "read") as mock_read:
+        cache = DAGConfigCache(path=cache_path)
+        assert cache.parse(str(filepath)).model_dump() == parsed.model_dump()
+        # Same content with a new mtime is found by its hash.
+        os.utime(filepath, ns=(0, 0))
+        assert cache.parse(str(filepath)).id == parsed.id
+    mock_read.assert_not_called()
+
+    filepath.write_text(
+        filepath.read_text(encoding="utf-8").replace(
+            "id: basic_example", "id: changed_example"
+        ),
+        encoding="utf-8",
+    )
+    assert DAGConfigCache(path=cache_path).parse(str(filepath)).id == "changed_example"
+
+
+def test_dag_config_cache_revalidates_cached_configs(tmp_path):
+    source = os.path.join(
+        DouDigestDagGenerator().YAMLS_DIR, "examples_and_tests", "basic_example.yaml"
+    )
+    cache_path = tmp_path / "cache.json"
+    cache = DAGConfigCache(path=str(cache_path))
+    cache.parse(source)
+    cache.save()
+
+    content = json.loads(cache_path.read_text(encoding="utf-8"))
+    content["entries"][source][3]["search"] = "not a search"
+    cache_path.write_text(json.dumps(content), encoding="utf-8")
+
+    # The invalid entry is ignored and the file parsed again.
+    assert DAGConfigCache(path=str(cache_path)).parse(source).id == "basic_example"
+
+
+def test_dag_config_cache_version_includes_pydantic_version(monkeypatch):
+    version = DAGConfigCache._schema_version()
+    monkeypatch.setattr("pydantic.VERSION", "0.0.0")
+
+    assert DAGConfigCache._schema_version() != version
+
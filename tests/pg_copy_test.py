@@ -0,0 +1,198 @@
+import csv
+import io
+from datetime import datetime
+
+import pytest
+
+from utils.pg_copy import CopyStream, replace_day
+
+COLUMNS = ["id", "pubdate", "texto", "assina"]
+
+RECORDS = [
+    {
+        "id": "1",
+        "pubdate": datetime(2026, 10, 18),
+        "texto": '<p class="assina">JOSÉ "ZÉ"\nSILVA</p>',
+        "assina": "JOSÉ",
+    },
+    {"id": "2", "pubdate": datetime(2026, 10, 18), "texto": "", "assina": None},
+]
+
+
+def test_copy_stream_writes_quoted_csv_with_nulls():
+    stream = CopyStream(iter(RECORDS), COLUMNS)
+
+    data = stream.read()
+
+    assert list(csv.reader(io.StringIO(data))) == [
+        ["1", "2026-10-18T00:00:00", '<p class="assina">JOSÉ "ZÉ"\nSILVA</p>', "JOSÉ"],
+        ["2", "2026-10-18T00:00:00", "", ""],
+    ]
+    # Only NULL is left unquoted, so COPY keeps "" as an empty string.
+    assert data.splitlines()[-1] == '"2","2026-10-18T00:00:00","",'
+    assert stream.rows == 2
+
+
+@pytest.mark.parametrize("size", [1, 7, 8192])
+def test_copy_stream_reads_in_chunks(size):
+    expected = CopyStream(iter(RECORDS), COLUMNS).read()
+    stream = CopyStream(iter(RECORDS), COLUMNS)
+
+    chunks = []
+    while chunk := stream.read(size):
+        assert len(chunk) <= size
+        chunks.append(chunk)
+
+    assert "".join(chunks) == expected
+
+
+def test_copy_stream_skips_unknown_columns(caplog):
+    stream = CopyStream(iter([{"id": "1", "novo": "x"}]), ["id"])
+
+    assert stream.read() == '"1"\n'
+    assert "novo" in caplog.text
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def execute(self, sql, params=None):
+        self.connection.statements.append(" ".join(sql.split()))
+
+    def fetchall(self):
+        return [(column,) for column in COLUMNS]
+
+    def copy_expert(self, sql, file):
+        self.connection.statements.append(sql)
+        self.connection.copied = file.read(8192)
+        if self.connection.fail_copy:
+            raise RuntimeError("COPY failed")
+
+
+class FakeConnection:
+    def __init__(self, fail_copy=False):
+        self.fail_copy = fail_copy
+        self.statements = []
+        self.committed = self.rolled_back = False
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        self.rolled_back = True
+
+
+def test_replace_day_swaps_staging_table_in_one_transaction():
+    connection = FakeConnection()
+
+    rows = replace_day(connection, "dou_inlabs.article_raw", "2026-10-18", iter(RECORDS))
+
+    assert rows == 2
+    assert connection.committed
+    assert [statement.split()[0] for statement in connection.statements] == [
+        "SELECT",
+        "CREATE",
+        "COPY",
+        "DELETE",
+        "DELETE",
+        "INSERT",
+    ]
+    assert connection.statements[2] == (
+        "COPY article_raw_stage (id, pubdate, texto, assina) "
+        "FROM STDIN WITH (FORMAT csv)"
+    )
+
+
+def test_replace_day_rolls_back_failed_load():
+    connection = FakeConnection(fail_copy=True)
+
+    with pytest.raises(RuntimeError):
+        replace_day(connection, "dou_inlabs.article_raw", "2026-10-18", iter(RECORDS))
+
+    assert connection.rolled_back and not connection.committed
+    assert not any(s.startswith("DELETE") for s in connection.statements)
+
+
+def test_replace_day_prepares_staged_rows_before_swap():
+    connection = FakeConnection()
+    prepared = []
+
+    def prepare(cursor, stage):
+        prepared.append(stage)
+        cursor.execute("SELECT pubdate FROM " + stage)
+
+    replace_day(
+        connection,
+        "dou_inlabs.article_raw",
+        "2026-10-18",
+        iter(RECORDS),
+        prepare=prepare,
+    )
+
+    assert prepared == ["article_raw_stage"]
+    assert [statement.split()[0] for statement in connection.statements][2:] == [
+        "COPY",
+        "SELECT",
+        "DELETE",
+        "DELETE",
+        "INSERT",
+    ]
+
+
+class TableConnection(FakeConnection):
+    """Keeps the rows of the table by primary key, as Postgres would."""
+
+    def __init__(self):
+        super().__init__()
+        self.rows = {}
+
+    def cursor(self):
+        return TableCursor(self)
+
+
+class TableCursor(FakeCursor):
+    def execute(self, sql, params=None):
+        super().execute(sql, params)
+        rows = self.connection.rows
+        if sql.startswith("DELETE") and params:
+            day = datetime.fromisoformat(params["day"]).date()
+            for key in [key for key in rows if key[1].startswith(str(day))]:
+                del rows[key]
+        elif sql.startswith("DELETE"):
+            for record in self.staged:
+                rows.pop((record[0], record[1]), None)
+        elif sql.startswith("INSERT"):
+            for record in self.staged:
+                if (record[0], record[1]) in rows:
+                    raise RuntimeError("duplicate key value violates unique constraint")
+                rows[(record[0], record[1])] = record
+
+    def copy_expert(self, sql, file):
+        super().copy_expert(sql, file)
+        self.staged = list(csv.reader(io.StringIO(self.connection.copied)))
+
+
+def test_replace_day_reruns_with_rows_of_other_days():
+    connection = TableConnection()
+    records = RECORDS + [
+        {"id": "3", "pubdate": datetime(2026, 10, 17), "texto": "", "assina": None}
+    ]
+
+    replace_day(connection, "dou_inlabs.article_raw", "2026-10-18", iter(records))
+    replace_day(connection, "dou_inlabs.article_raw", "2026-10-18", iter(records))
+
+    assert sorted(connection.rows) == [
+        ("1", "2026-10-18T00:00:00"),
+        ("2", "2026-10-18T00:00:00"),
+        ("3", "2026-10-17T00:00:00"),
+    ]
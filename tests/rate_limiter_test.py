@@ -0,0 +1,47 @@
+from unittest.mock import patch
+
+from utils.rate_limiter import TokenBucket
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_token_bucket_paces_requests():
+    clock = _Clock()
+    with patch("utils.rate_limiter.time", clock):
+        bucket = TokenBucket(rate=2, capacity=1)
+        for _ in range(5):
+            bucket.acquire()
+
+    # The first token is available at once, the next every 0.5 second.
+    assert clock.now == 2.0
+
+
+def test_token_bucket_allows_bursts_up_to_capacity():
+    clock = _Clock()
+    with patch("utils.rate_limiter.time", clock):
+        bucket = TokenBucket(rate=1, capacity=3)
+        for _ in range(3):
+            bucket.acquire()
+        assert clock.now == 0
+        bucket.acquire()
+
+    assert clock.now == 1.0
+
+
+def test_token_bucket_without_rate_does_not_wait():
+    clock = _Clock()
+    with patch("utils.rate_limiter.time", clock):
+        bucket = TokenBucket(rate=0)
+        for _ in range(10):
+            bucket.acquire()
+
+    assert clock.now == 0
@@ -0,0 +1,210 @@
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from dags.ro_dou_src.search_coordinator import SearchCoordinator
+from dags.ro_dou_src.utils.open_search.query_builder import OpenSearchQueryBuilder
+
+
+def _search(terms, sources=("INLABS",), dou_sections=("SECAO_1",)):
+    return SimpleNamespace(
+        terms=terms,
+        sources=list(sources),
+        dou_sections=list(dou_sections),
+        department=None,
+        department_ignore=None,
+        terms_ignore=None,
+        pubtype=None,
+        date="DIA",
+    )
+
+
+@pytest.fixture
+def coordinator(tmp_path) -> SearchCoordinator:
+    return SearchCoordinator(base_path=str(tmp_path))
+
+
+def test_group_key_ignores_texto_and_list_order():
+    key = SearchCoordinator.group_key(
+        {"texto": ["SEGES"], "pubname": ["DO1", "DO3"], "pubdate": ["2024-04-01"]}
+    )
+
+    assert key == SearchCoordinator.group_key(
+        {"texto": ["SOF"], "pubname": ["DO3", "DO1"], "pubdate": ["2024-04-01"]}
+    )
+    assert key != SearchCoordinator.group_key(
+        {"texto": ["SEGES"], "pubname": ["DO2"], "pubdate": ["2024-04-01"]}
+    )
+
+
+def test_collect_groups_searches_with_same_filters(coordinator):
+    dag_configs = [
+        SimpleNamespace(search=[_search(["SEGES", ""]), _search(["SOF"])]),
+        SimpleNamespace(
+            search=[
+                _search(["SEGES"], dou_sections=["SECAO_2"]),
+                _search(["SEGES"], sources=["DOU", "INLABS"]),
+                _search(None),
+            ]
+        ),
+    ]
+
+    groups = coordinator.collect(dag_configs, date(2024, 4, 1))
+
+    assert sorted(sorted(g["expressions"]) for g in groups.values()) == [
+        ["SEGES"],
+        ["SEGES", "SOF"],
+    ]
+
+
+def test_run_and_load_slice(coordinator):
+    prefix = OpenSearchQueryBuilder.EXPRESSION_NAME_PREFIX
+    client = MagicMock()
+    client.msearch.return_value = {
+        "responses": [
+            {
+                "hits": {
+                    "hits": [
+                        {
+                            "_id": "1",
+                            "_source": {"texto": "SEGES"},
+                            "matched_queries": ["SEGES", f"{prefix}SEGES"],
+                        },
+                        {
+                            "_id": "2",
+                            "_source": {"texto": "SEGES e SOF"},
+                            "matched_queries": [
+                                "SEGES",
+                                "SOF",
+                                f"{prefix}SEGES",
+                                f"{prefix}SOF",
+                            ],
+                        },
+                    ]
+                }
+            },
+            {"hits": {"hits": []}},
+        ]
+    }
+    dag_configs = [SimpleNamespace(search=[_search(["SEGES"]), _search(["SOF"])])]
+
+    assert coordinator.run(dag_configs, date(2024, 4, 1), client=client) == 1
+    assert client.msearch.call_count == 1
+
+    search_terms = {
+        "texto": ["SOF"],
+        "pubname": ["DO1"],
+        "pubdate": ["2024-04-01", "2024-04-01"],
+    }
+    records = coordinator.load_slice(search_terms)
+
+    assert [r["texto"] for r in records] == ["SEGES e SOF"]
+    assert records[0]["matched_terms"] == ["SOF"]
+    assert records[0]["searched_expression"] == "SOF"
+    assert "matched_expressions" not in records[0]
+
+
+def test_load_slice_returns_none_for_uncoordinated_search(coordinator):
+    search_terms = {
+        "texto": ["SEGES"],
+        "pubname": ["DO1"],
+        "pubdate": ["2024-04-01", "2024-04-01"],
+    }
+
+    assert coordinator.load_slice(search_terms) is None
+
+    coordinator._write(
+        SearchCoordinator.group_key(search_terms),
+        {"expressions": ["SOF"], "records": []},
+    )
+
+    assert coordinator.load_slice(search_terms) is None
+
+
+def test_run_does_not_store_group_over_max_hits(coordinator, monkeypatch):
+    from hooks.inlabs_hook import INLABSHook
+
+    monkeypatch.setattr(INLABSHook, "MAX_HITS", 1)
+    client = MagicMock()
+    client.msearch.return_value = {
+        "responses": [
+            {"hits": {"hits": [{"_id": "1", "_source": {}}, {"_id": "2", "_source": {}}]}},
+            {"hits": {"hits": []}},
+        ]
+    }
+    search_terms = {
+        "texto": ["SEGES"],
+        "pubname": ["DO1"],
+        "pubdate": ["2024-04-01", "2024-04-01"],
+    }
+    coordinator._write(
+        SearchCoordinator.group_key(search_terms),
+        {"expressions": ["SEGES"], "records": []},
+    )
+    dag_configs = [SimpleNamespace(search=[_search(["SEGES"])])]
+
+    coordinator.run(dag_configs, date(2024, 4, 1), client=client)
+
+    assert coordinator.load_slice(search_terms) is None
+
+
+def test_collect_skips_dag_with_invalid_filters(coordinator):
+    dag_configs = [
+        SimpleNamespace(id="dag_a", search=[_search(["SEGES"], dou_sections=["X"])]),
+        SimpleNamespace(id="dag_b", search=[_search(["SOF"])]),
+    ]
+
+    groups = coordinator.collect(dag_configs, date(2024, 4, 1))
+
+    assert [sorted(g["expressions"]) for g in groups.values()] == [["SOF"]]
+
+
+def test_collect_skips_dag_with_unsortable_filters(coordinator, monkeypatch):
+    monkeypatch.setattr(
+        "searchers.INLABSSearcher._apply_filters",
+        lambda self, search_terms, dou_sections, department, *args: {
+            **search_terms,
+            "pubname": ["DO1"],
+            **({"artcategory": department} if department else {}),
+        },
+    )
+    bad = _search(["SEGES"])
+    bad.department = ["Ministério da Economia", None]
+    dag_configs = [
+        SimpleNamespace(id="dag_a", search=[bad]),
+        SimpleNamespace(id="dag_b", search=[_search(["SOF"])]),
+    ]
+
+    groups = coordinator.collect(dag_configs, date(2024, 4, 1))
+
+    assert [sorted(g["expressions"]) for g in groups.values()] == [["SOF"]]
+
+
+def test_run_skips_failed_group(coordinator):
+    client = MagicMock()
+    client.msearch.side_effect = [
+        RuntimeError("OpenSearch unavailable"),
+        {"responses": [{"hits": {"hits": []}}, {"hits": {"hits": []}}]},
+    ]
+    dag_configs = [
+        SimpleNamespace(
+            search=[
+                _search(["SEGES"]),
+                _search(["SOF"], dou_sections=["SECAO_2"]),
+            ]
+        )
+    ]
+
+    assert coordinator.run(dag_configs, date(2024, 4, 1), client=client) == 2
+
+    base_terms = {"pubdate": ["2024-04-01", "2024-04-01"]}
+    assert (
+        coordinator.load_slice({**base_terms, "texto": ["SEGES"], "pubname": ["DO1"]})
+        is None
+    )
+    assert (
+        coordinator.load_slice({**base_terms, "texto": ["SOF"], "pubname": ["DO2"]})
+        == []
+    )
@@ -1,5 +1,9 @@
 """Serachers unit tests"""
 
+import time
+from datetime import datetime
+from unittest.mock import patch
+
 import pytest
 
 import pandas as pd
@@ -314,3 +318,94 @@ def test_add_standard_highlight_formatting(dou_searcher):
         "Ministério do Meio Ambiente e Mudança do Clima, os procedimentos "
         "para o recebimento e o tratamento de manifestações..."
     )
+
+
+def test_search_all_terms_keeps_term_order(dou_searcher):
+    delays = {"first": 0.2, "second": 0.1, "third": 0}
+
+    def search_text(search_term, **kwargs):
+        time.sleep(delays[search_term])
+        return [{"section": "do1", "abstract": search_term}]
+
+    with patch.object(
+        dou_searcher.dou_hook, "search_text", side_effect=search_text
+    ), patch.object(dou_searcher, "MAX_WORKERS", 3):
+        search_results = dou_searcher._search_all_terms(
+            ["first", "second", "third"],
+            ["SECAO_1"],
+            "DIA",
+            datetime(2024, 4, 1),
+            "TUDO",
+            True,
+            False,
+            False,
+            None,
+            None,
+            None,
+            None,
+        )
+
+    assert list(search_results) == ["first", "second", "third"]
+    assert search_results["second"][0]["abstract"] == "second"
+
+
+def _search_all_terms(dou_searcher, term_list):
+    return dou_searcher._search_all_terms(
+        term_list,
+        ["SECAO_1"],
+        "DIA",
+        datetime(2024, 4, 1),
+        "TUDO",
+        True,
+        False,
+        False,
+        None,
+        None,
+        None,
+        None,
+    )
+
+
+def test_search_all_terms_batches_terms(dou_searcher):
+    def search_text(search_term, **kwargs):
+        if search_term == ["SEGES", "Ministério da Gestão"]:
+            return [
+                {"section": "do1", "title": "Portaria SEGES", "abstract": "..."},
+                {
+                    "section": "do1",
+                    "title": "Portaria",
+                    "abstract": "a <span class='highlight'>SEGES</span> do "
+                    "<span class='highlight'>Ministerio da Gestao</span>",
+                },
+            ]
+        return []
+
+    with patch.object(
+        dou_searcher.dou_hook, "search_text", side_effect=search_text
+    ) as mock_search, patch.object(dou_searcher, "BATCH_SIZE", 2):
+        search_results = _search_all_terms(
+            dou_searcher, ["SEGES", "Ministério da Gestão", "SOF"]
+        )
+
+    assert mock_search.call_count == 2
+    assert list(search_results) == ["SEGES", "Ministério da Gestão"]
+    assert len(search_results["SEGES"]) == 2
+    assert search_results["Ministério da Gestão"][0]["title"] == "Portaria"
+    assert search_results["SEGES"][1] is not search_results["Ministério da Gestão"][0]
+
+
+def test_search_all_terms_searches_batch_terms_alone_on_unassigned_results(
+    dou_searcher,
+):
+    def search_text(search_term, **kwargs):
+        if isinstance(search_term, list):
+            return [{"section": "do1", "title": "Portaria", "abstract": "..."}]
+        return [{"section": "do1", "title": "Portaria", "abstract": search_term}]
+
+    with patch.object(
+        dou_searcher.dou_hook, "search_text", side_effect=search_text
+    ) as mock_search, patch.object(dou_searcher, "BATCH_SIZE", 2):
+        search_results = _search_all_terms(dou_searcher, ["SEGES", "SOF"])
+
+    assert mock_search.call_count == 3
+    assert search_results["SOF"][0]["abstract"] == "SOF"
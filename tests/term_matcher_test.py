@@ -0,0 +1,53 @@
+import pytest
+
+from dags.ro_dou_src.utils.term_matcher import TermMatcher, plain_text
+
+
+@pytest.mark.parametrize(
+    "terms, text, found",
+    [
+        (["elementum", "tellus"], "Pellentesque vel elementum mauris.", ["elementum"]),
+        (["Flavia"], "Designar Flávia para o cargo.", ["Flavia"]),
+        (["pregão", "pregão eletrônico"], "Pregão Eletrônico", ["pregão", "pregão eletrônico"]),
+        (["SEGES", "seges"], "A SEGES informa.", ["SEGES", "seges"]),
+        (["lor"], "Lorem ipsum", []),
+        (["", None], "Lorem ipsum", []),
+    ],
+)
+def test_find(terms, text, found):
+    assert TermMatcher(terms).find(text) == found
+
+
+def test_find_overlapping_terms():
+    matcher = TermMatcher(["ministério da gestão", "gestão e inovação"])
+
+    assert matcher.find("Ministério da Gestão e Inovação") == [
+        "gestão e inovação",
+        "ministério da gestão",
+    ]
+
+
+@pytest.mark.parametrize(
+    "terms, text, highlighted",
+    [
+        (
+            ["pregão", "pregão eletrônico"],
+            "Aviso de Pregão Eletrônico e pregão.",
+            "Aviso de <%%>Pregão Eletrônico</%%> e <%%>pregão</%%>.",
+        ),
+        (["Flávia"], "Designar Flavia.", "Designar <%%>Flavia</%%>."),
+        (["fim"], "o ﬁm e o fim", "o ﬁm e o <%%>fim</%%>"),
+        ([], "Lorem ipsum", "Lorem ipsum"),
+    ],
+)
+def test_highlight(terms, text, highlighted):
+    assert TermMatcher(terms).highlight(text) == highlighted
+
+
+def test_cached_reuses_matcher():
+    assert TermMatcher.cached(["a", "b"]) is TermMatcher.cached(["a", "b"])
+
+
+def test_plain_text():
+    assert plain_text("<p>Lorem</p>\n<p>ipsum  dolor</p>") == "Lorem ipsum dolor"
+    assert plain_text(None) == ""
@@ -23,6 +23,11 @@ class FakeResponse:
             raise Exception(f"HTTP {self.status_code}")
 
 
+@pytest.fixture(autouse=True)
+def disable_cache(monkeypatch):
+    monkeypatch.setattr(DOESPHook.cache, "ttl", 0)
+
+
 def test_doesp_search_builds_query_and_parses(monkeypatch):
     # Prepare fake journals response
     journals = {